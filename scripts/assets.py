@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asset stage for deploying site/ behind a CDN.
+
+  bundle_css()     concatenate stylesheets and minify them
+  write_bundle()   write the bundle under a content-hashed name,
+                   site/assets/style.<hash>.css, safe to serve as immutable
+  minify_html()    drop comments and insignificant whitespace; <pre>,
+                   <textarea> and <script> are left alone, <style> is minified
+  precompress()    write .gz (and .br when the brotli module is installed)
+                   next to every file in site/, skipping ones that are current
+
+Run directly to precompress an already built site/.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Iterable
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import tempfile
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parents[1]
+SITE_DIR = ROOT / "site"
+HASH_LEN = 10
+COMPRESSED = (".gz", ".br")
+# Smaller files gain nothing from compression once headers are counted
+MIN_COMPRESS_BYTES = 256
+
+# ---- CSS ----
+
+# Quoted strings and unquoted url(...) values are kept verbatim; comments are dropped
+_CSS_TOKEN_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|(?i:url)\([^)"']*\))|/\*.*?\*/""", re.S)
+_CSS_WS_RE = re.compile(r"\s+")
+# No space needed on either side of these; ":" only after it ("a :hover" differs from "a:hover")
+_CSS_PUNCT_RE = re.compile(r" ?([{};,>]) ?|: ")
+
+def minify_css(css: str) -> str:
+    out: list[str] = []
+    code: list[str] = []  # text since the last string, comments replaced by a space
+    pos = 0
+    for m in _CSS_TOKEN_RE.finditer(css):
+        code.append(css[pos:m.start()])
+        if m.group(1):
+            out.append(_minify_css_code("".join(code)))
+            out.append(m.group(1))
+            code = []
+        else:
+            code.append(" ")
+        pos = m.end()
+    code.append(css[pos:])
+    out.append(_minify_css_code("".join(code)))
+    return "".join(out).strip()
+
+def _minify_css_code(code: str) -> str:
+    code = _CSS_WS_RE.sub(" ", code)
+    return _CSS_PUNCT_RE.sub(lambda m: m.group(1) or ":", code).replace(";}", "}")
+
+def bundle_css(sources: Iterable[str]) -> str:
+    return "".join(minify_css(s) for s in sources)
+
+# ---- HTML ----
+
+_HTML_TOKEN_RE = re.compile(r"(<!--.*?-->|<[^>]*>)", re.S)
+_HTML_WS_RE = re.compile(r"\s+")
+_TAG_NAME_RE = re.compile(r"</?([a-zA-Z][a-zA-Z0-9]*)")
+# Whitespace next to these never renders
+BLOCK_TAGS = frozenset("""
+    html head body title meta link style script base br hr
+    div p ul ol li dl dt dd h1 h2 h3 h4 h5 h6 table thead tbody tfoot tr td th
+    header footer nav main section article aside figure figcaption blockquote form
+""".split())
+RAW_TAGS = frozenset({"pre", "textarea", "script", "style"})
+
+def _tag_name(tag: str) -> str:
+    m = _TAG_NAME_RE.match(tag)
+    return m.group(1).lower() if m else ""
+
+def _is_break(tag: str | None) -> bool:
+    """
+    True at the start/end of the page and around block tags, doctype and comments.
+    """
+    if tag is None or tag.startswith("<!"):
+        return True
+    return _tag_name(tag) in BLOCK_TAGS
+
+def _drop_comments(text: str) -> str:
+    out: list[str] = []
+    raw = ""
+    for i, tok in enumerate(_HTML_TOKEN_RE.split(text)):
+        if i % 2:
+            if raw:
+                if tok.startswith("</") and _tag_name(tok) == raw:
+                    raw = ""
+            elif tok.startswith("<!--"):
+                if not tok.startswith("<!--["):  # keep conditional comments
+                    continue
+            elif _tag_name(tok) in RAW_TAGS and not tok.startswith("</") and not tok.endswith("/>"):
+                raw = _tag_name(tok)
+        out.append(tok)
+    return "".join(out)
+
+def minify_html(text: str) -> str:
+    parts = _HTML_TOKEN_RE.split(_drop_comments(text))  # odd indices are tags
+    out: list[str] = []
+    raw = ""  # the raw-text element we are inside, if any
+    for i, tok in enumerate(parts):
+        if i % 2:
+            name = _tag_name(tok)
+            if raw:
+                if tok.startswith("</") and name == raw:
+                    raw = ""
+            elif name in RAW_TAGS and not tok.startswith("</") and not tok.endswith("/>"):
+                raw = name
+            out.append(tok)
+            continue
+        if raw:
+            out.append(minify_css(tok) if raw == "style" else tok)
+            continue
+        s = _HTML_WS_RE.sub(" ", tok)
+        if s.startswith(" ") and _is_break(parts[i - 1] if i else None):
+            s = s[1:]
+        if s.endswith(" ") and _is_break(parts[i + 1] if i + 1 < len(parts) else None):
+            s = s[:-1]
+        out.append(s)
+    return "".join(out)
+
+# ---- files ----
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LEN]
+
+def write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(name, 0o644)
+        os.replace(name, path)
+    except BaseException:
+        Path(name).unlink(missing_ok=True)
+        raise
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """
+    Leave an identical file untouched, so its mtime (and so its compressed
+    siblings) stay current.
+    """
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
+    return True
+
+def write_bundle(data: bytes, out_dir: Path, name: str = "style.css") -> Path:
+    """
+    Write `data` as out_dir/<stem>.<hash>.<ext> and remove older bundles of
+    the same name together with their compressed siblings. The name changes
+    whenever the content does, so the file can be cached forever.
+    """
+    stem, ext = name.rsplit(".", 1)
+    path = out_dir / f"{stem}.{content_hash(data)}.{ext}"
+    write_if_changed(path, data)
+    stale = re.compile(rf"{re.escape(stem)}\.[0-9a-f]{{{HASH_LEN}}}\.{re.escape(ext)}(\.gz|\.br)?")
+    for p in out_dir.iterdir():
+        if stale.fullmatch(p.name) and not p.name.startswith(path.name):
+            p.unlink()
+    return path
+
+def _compressors() -> list[tuple[str, Callable[[bytes], bytes]]]:
+    out: list[tuple[str, Callable[[bytes], bytes]]] = [(".gz", lambda b: gzip.compress(b, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        out.append((".br", brotli.compress))
+    return out
+
+def precompress(root: Path) -> dict[str, int]:
+    """
+    Write compressed siblings for every file under `root`. A sibling newer
+    than its source is kept (ctime counts too: a hardlinked or renamed-in
+    source can carry an old mtime); a variant that would not be smaller is not
+    written (and removed if an old one exists); siblings whose source is gone
+    are deleted.
+    """
+    stats = {"written": 0, "current": 0, "skipped": 0, "removed": 0}
+    compressors = _compressors()
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        if path.suffix in COMPRESSED:
+            if not path.with_suffix("").exists():
+                path.unlink()
+                stats["removed"] += 1
+            continue
+        st = path.stat()
+        changed = max(st.st_mtime_ns, st.st_ctime_ns)
+        data = None
+        for suffix, compress in compressors:
+            out = path.with_name(path.name + suffix)
+            try:
+                if out.stat().st_mtime_ns >= changed:
+                    stats["current"] += 1
+                    continue
+            except FileNotFoundError:
+                pass
+            if data is None:
+                data = path.read_bytes()
+            packed = compress(data) if len(data) >= MIN_COMPRESS_BYTES else data
+            if len(packed) >= len(data):
+                out.unlink(missing_ok=True)
+                stats["skipped"] += 1
+                continue
+            write_atomic(out, packed)
+            stats["written"] += 1
+    return stats
+
+def summary(stats: dict[str, int]) -> str:
+    note = "" if brotli is not None else " (brotli module not installed: .gz only)"
+    return ("Precompressed: " + ", ".join(f"{v} {k}" for k, v in stats.items()) + note)
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Write .gz/.br siblings for every file in the built site.")
+    ap.add_argument("site", nargs="?", type=Path, default=SITE_DIR, help="site directory (default: site)")
+    args = ap.parse_args(argv)
+    if not args.site.is_dir():
+        print(f"No such directory: {args.site}", file=sys.stderr)
+        sys.exit(2)
+    print(summary(precompress(args.site)))
+
+if __name__ == "__main__":
+    main()
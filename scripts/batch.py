@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the builders' batch modes: input discovery, output path
+patterns and a process pool that keeps results in input order.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+import glob
+import os
+import sys
+import traceback
+
+ROOT = Path(__file__).resolve().parents[1]
+
+@dataclass
+class JobResult:
+    source: Path
+    value: Any = None
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+def collect_inputs(specs: list[str]) -> list[Path]:
+    """
+    Expand files, directories (*.yml / *.yaml inside) and glob patterns
+    into a sorted, de-duplicated list of content files.
+    """
+    found: dict[Path, None] = {}
+    for spec in specs:
+        p = Path(spec)
+        if p.is_dir():
+            matches = [*p.glob("*.yml"), *p.glob("*.yaml")]
+        elif p.is_file():
+            matches = [p]
+        else:
+            matches = [Path(x) for x in glob.glob(spec, recursive=True)]
+            if not matches:
+                print(f"No content files match: {spec}", file=sys.stderr)
+        for m in sorted(matches):
+            found[m.resolve()] = None
+    return list(found)
+
+def output_path(content: Path, pattern: str) -> Path:
+    """
+    Fill an output pattern such as "site/{stem}/index.html".
+    {stem} is the YAML file name without suffix, {parent} its directory name.
+    """
+    out = Path(pattern.format(stem=content.stem, parent=content.parent.name))
+    return out if out.is_absolute() else ROOT / out
+
+def check_unique(outs: list[Path], pattern: str) -> None:
+    if len(set(outs)) != len(outs):
+        print(f"Output pattern {pattern!r} maps several inputs to the same file; use {{stem}}.", file=sys.stderr)
+        sys.exit(2)
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+def _call(job: tuple[Callable[..., Any], Path, tuple]) -> JobResult:
+    func, source, args = job
+    try:
+        return JobResult(source, func(source, *args))
+    except Exception as e:
+        detail = traceback.format_exception_only(type(e), e)[-1].strip()
+        return JobResult(source, error=detail)
+
+def run_jobs(func: Callable[..., Any], jobs: list[tuple[Path, tuple]], workers: int) -> list[JobResult]:
+    """
+    Run func(source, *args) for every job and return one JobResult per job,
+    in the same order as `jobs`. A failing job is reported in its JobResult
+    and does not stop the others. With workers <= 1 (or a single job) the
+    work runs in-process, which also keeps tracebacks and prints readable.
+    """
+    calls = [(func, src, args) for src, args in jobs]
+    if workers <= 1 or len(calls) <= 1:
+        return [_call(c) for c in calls]
+
+    workers = min(workers, len(calls))
+    chunksize = max(1, len(calls) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_call, calls, chunksize=chunksize))
+
+def report(results: list[JobResult], elapsed: float, verb: str = "Rendered") -> int:
+    """
+    Print failures and a throughput summary. Returns the number of failures.
+    """
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"FAILED {r.source}: {r.error}", file=sys.stderr)
+    done = len(results) - len(failed)
+    rate = done / elapsed if elapsed > 0 else float("inf")
+    print(f"{verb} {done} files in {elapsed:.2f}s ({rate:.1f} files/s)"
+          + (f", {len(failed)} failed" if failed else ""))
+    return len(failed)
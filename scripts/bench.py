@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the web and LaTeX renderers on synthetic CVs.
+
+  python scripts/bench.py --sizes 10,1000,100000 --json bench.json
+  python scripts/bench.py --compare bench.json      # rerun and show speedups
+
+Every stage (YAML parse, each render_* section, latex_escape, latex_doc and
+the xelatex compile) is timed separately; peak memory per stage is measured
+in a second, traced run. xelatex is stubbed out when it isn't installed.
+"""
+
+from __future__ import annotations
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import html
+import json
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import yaml  # type: ignore
+
+import build_pdf
+import build_web
+from loader import parse_yaml
+from model import Document, normalize
+from names import NameMatcher, name_key, name_variants
+import schema
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FIRST = ["Bin", "Feng", "Tian", "Shuai", "Zhimeng", "Wenchao", "Kai", "Ruofeng", "Ahmad", "Z. Morley"]
+LAST = ["Hu", "Qian", "He", "Wang", "Yin", "Jiang", "Sun", "Liu", "Hassan", "Mao", "Zhang", "Li"]
+WORDS = ["LoRa", "Satellite", "Networks", "Decoding", "Collided", "Transmissions", "Cross-Layer",
+         "Performance", "LEO", "IoT", "Modulation", "Explainable", "5G", "Handover", "Dynamic",
+         "R&D", "100%", "C#", "file_name", "{braces}"]
+VENUES = ["IEEE INFOCOM", "ACM MobiCom", "USENIX NSDI", "ACM SIGCOMM", "Computer Networks", "IEEE ICNP"]
+
+def synthetic_content(pubs: int, authors: int = 6, experience: int = 10, details: int = 4,
+                      refs: int = 5, seed: int = 0) -> dict:
+    """
+    A content.yml-shaped document with `pubs` publications of `authors` authors each,
+    `experience` experience entries of `details` bullet points, and `refs` references.
+    """
+    rnd = random.Random(seed)
+
+    def phrase(n: int) -> str:
+        return " ".join(rnd.choice(WORDS) for _ in range(n))
+
+    def person() -> str:
+        return f"{rnd.choice(FIRST)} {rnd.choice(LAST)}"
+
+    def period() -> str:
+        y = rnd.randint(2005, 2025)
+        return f"Aug. {y} – Jun. {y + rnd.randint(1, 5)}"
+
+    publications = []
+    for i in range(pubs):
+        p: dict[str, Any] = {
+            "title": f"{phrase(8)} ({i})",
+            "authors": ["Bin Hu" if j == i % authors else person() for j in range(authors)],
+            "venue": rnd.choice(VENUES),
+            "year": rnd.randint(2010, 2026),
+        }
+        if i % 3 == 0:
+            p.update(volume=str(rnd.randint(1, 300)), pages=f"{rnd.randint(1, 999)}-{rnd.randint(1000, 2000)}",
+                     doi=f"10.1016/j.synth.{i:07d}")
+        if i % 7 == 0:
+            p["note"] = "To appear"
+        publications.append(p)
+
+    def jobs(n: int) -> list[dict]:
+        return [{"organization": phrase(4), "role": phrase(2), "period": period(),
+                 "details": [phrase(10) for _ in range(details)]} for _ in range(n)]
+
+    return {
+        "name": "Bin Hu",
+        "location": "Los Angeles, CA, USA",
+        "email": ["hubin@usc.edu"],
+        "phone": ["+1 6124563527"],
+        "links": {"website": "https://example.org/", "pdf": "https://example.org/cv.pdf"},
+        "education": [{"institution": phrase(3), "location": phrase(2), "degree": phrase(4),
+                       "department": phrase(5), "period": period(), "Research Area": phrase(6),
+                       "Advisor": "Prof. " + person()} for _ in range(3)],
+        "publications": publications,
+        "experience": jobs(experience),
+        "funded_projects": [{"sponsor": phrase(3), "title": phrase(6)},
+                            {"sponsor": phrase(3), "projects": [phrase(5) for _ in range(3)]}],
+        "industry_experience": jobs(max(1, experience // 4)),
+        "honors_awards": [phrase(7) for _ in range(10)],
+        "references": [{"name": person(), "title": "Professor", "affiliation": phrase(4),
+                        "email": f"ref{i}@example.org"} for i in range(refs)],
+    }
+
+def text_fields(data: dict) -> list[str]:
+    """
+    Every string latex_doc escapes, in roughly the proportions it escapes them.
+    """
+    out: list[str] = []
+    for p in data.get("publications", []):
+        out.append(p["title"])
+        out.extend(p["authors"])
+        out.append(p["venue"])
+        out.extend(str(p[k]) for k in ("volume", "pages", "doi", "note") if k in p)
+    for e in data.get("experience", []) + data.get("industry_experience", []):
+        out.extend([e["organization"], e["role"], e["period"], *e["details"]])
+    return out
+
+def legacy_latex_escape(s: str) -> str:
+    # latex_escape as it was before the translate-table rewrite, kept as the micro-benchmark baseline
+    if s is None:
+        return ""
+    s = str(s)
+    repl = dict(build_pdf.LATEX_SPECIALS)
+    return "".join(repl.get(ch, ch) for ch in s)
+
+def short_strings(n: int, seed: int = 0) -> list[str]:
+    """
+    n short strings shaped like the fields latex_escape sees: repeated names and
+    venues, some years, a minority with special characters.
+    """
+    rnd = random.Random(seed)
+    pool = [f"{f} {l}" for f in FIRST for l in LAST] + VENUES + WORDS + [str(y) for y in range(2000, 2027)]
+    return [rnd.choice(pool) if rnd.random() < 0.8 else f"{rnd.choice(WORDS)} {rnd.randint(0, 10**6)}"
+            for _ in range(n)]
+
+def micro_escape(n: int) -> None:
+    strings = short_strings(n)
+    funcs: list[tuple[str, Callable[[str], str]]] = [
+        ("legacy latex_escape", legacy_latex_escape),
+        ("latex_escape", build_pdf.latex_escape),
+        ("html.escape", lambda s: html.escape(s, quote=True)),
+        ("build_web.h", build_web.h),
+    ]
+    # Start cold so the memoized paths pay for their misses
+    build_pdf._latex_escape_str.cache_clear()
+    build_web.h.cache_clear()
+    assert all(legacy_latex_escape(s) == build_pdf.latex_escape(s) for s in strings[:10000])
+    print(f"escaping {n:,} short strings")
+    times = {}
+    for name, f in funcs:
+        t0 = time.perf_counter()
+        for s in strings:
+            f(s)
+        times[name] = time.perf_counter() - t0
+        print(f"  {name:<22} {times[name]:.3f}s")
+    print(f"  latex_escape speedup: {times['legacy latex_escape'] / times['latex_escape']:.1f}x, "
+          f"h speedup: {times['html.escape'] / times['build_web.h']:.1f}x")
+
+def legacy_bold_my_name(author: str, my_name: str = "Bin Hu") -> str:
+    # bold_my_name before the precompiled matcher: one exact compare, no variants
+    a = build_pdf.latex_escape(author)
+    if author.strip() == my_name:
+        return r"\textbf{" + a + "}"
+    return a
+
+def micro_names(pubs: int, authors: int) -> None:
+    data = synthetic_content(pubs, authors, experience=0, refs=0)
+    author_lists = [p["authors"] for p in data["publications"]]
+    aliases = ["Bin Hu", "Zhi-Li Zhang"]
+    variants = sorted({k for n in aliases for k in name_variants(n)})
+
+    def naive(a: str) -> str:
+        # The same variants without the precompiled index: key and scan per author
+        esc = build_pdf.latex_escape(a)
+        return r"\textbf{" + esc + "}" if any(name_key(a) == v for v in variants) else esc
+
+    def matcher() -> Callable[[str], str]:
+        me = NameMatcher(aliases)
+        return lambda a: build_pdf.bold_my_name(a, me)
+
+    funcs: list[tuple[str, Callable[[], Callable[[str], str]]]] = [
+        ("legacy exact compare", lambda: legacy_bold_my_name),
+        ("variants, per-author scan", lambda: naive),
+        ("NameMatcher", matcher),
+    ]
+    total = sum(len(a) for a in author_lists)
+    print(f"highlighting {total:,} authors in {pubs:,} publications ({authors} per paper), "
+          f"{len(aliases)} aliases -> {len(variants)} variants")
+    for name, make in funcs:
+        build_pdf._latex_escape_str.cache_clear()
+        t0 = time.perf_counter()
+        # Built once per document, as the renderers do
+        f = make()
+        for lst in author_lists:
+            ", ".join([f(a) for a in lst])
+        print(f"  {name:<26} {time.perf_counter() - t0:.3f}s")
+
+def stub_xelatex(tex: Path) -> None:
+    # Stand-in for machines without TeX: same file I/O, no typesetting
+    tex.with_suffix(".pdf").write_bytes(tex.read_bytes())
+
+def real_xelatex(tex: Path) -> None:
+    build_pdf.run_latex(tex, verbose=False)
+
+def stages(data: dict, text: str, tex_mode: str, workdir: Path) -> dict[str, Callable[[], Any]]:
+    fields = text_fields(data)
+    doc = normalize(data)
+    tex = workdir / "cv.tex"
+
+    def drain(render: Callable[[Document], Any]) -> Callable[[], None]:
+        return lambda: deque(render(doc), maxlen=0)
+
+    def compile_tex() -> None:
+        tex.write_text(build_pdf.latex_doc(doc), encoding="utf-8")
+        (real_xelatex if tex_mode == "real" else stub_xelatex)(tex)
+
+    out: dict[str, Callable[[], Any]] = {
+        "yaml_load": lambda: parse_yaml(text),
+        "schema.check": lambda: schema.check(data),
+        "model.normalize": lambda: normalize(data),
+        "web.render_header": drain(build_web.render_header),
+        "web.render_education": drain(build_web.render_education),
+        "web.render_publications": drain(build_web.render_publications),
+        "web.render_experience": drain(build_web.render_experience),
+        "web.render_funded_projects": drain(build_web.render_funded_projects),
+        "web.render_industry": drain(build_web.render_industry),
+        "web.render_references": drain(build_web.render_references),
+        "web.render_html": lambda: build_web.render_html(doc),
+        "pdf.latex_escape": lambda: [build_pdf.latex_escape(s) for s in fields],
+        "pdf.latex_doc": lambda: build_pdf.latex_doc(doc),
+    }
+    if tex_mode != "skip":
+        out[f"pdf.xelatex[{tex_mode}]"] = compile_tex
+    return out
+
+def measure(fn: Callable[[], Any], repeat: int, memory: bool) -> dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    res = {"seconds": best}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            res["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return res
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT),
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except Exception:
+        return ""
+
+def print_table(results: list[dict], baseline: dict | None) -> None:
+    base = {}
+    if baseline:
+        for r in baseline.get("results", []):
+            for name, st in r["stages"].items():
+                base[(r["size"], name)] = st["seconds"]
+
+    print(f"{'size':>8}  {'stage':<28} {'time':>10} {'peak':>10}" + ("  vs base" if base else ""))
+    for r in results:
+        for name, st in r["stages"].items():
+            peak = f"{st['peak_bytes'] / 2**20:.2f}M" if "peak_bytes" in st else "-"
+            line = f"{r['size']:>8}  {name:<28} {st['seconds'] * 1000:>8.2f}ms {peak:>10}"
+            old = base.get((r["size"], name))
+            if old:
+                line += f"  {old / st['seconds']:.2f}x" if st["seconds"] > 0 else ""
+            print(line)
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark the resume renderers on synthetic CVs.")
+    ap.add_argument("--sizes", default="10,100,1000,10000",
+                    help="comma-separated publication counts (default: %(default)s)")
+    ap.add_argument("--authors", type=int, default=6, help="authors per publication")
+    ap.add_argument("--experience", type=int, default=10, help="experience entries")
+    ap.add_argument("--details", type=int, default=4, help="detail lines per experience entry")
+    ap.add_argument("--refs", type=int, default=5, help="references")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per stage; the best is kept")
+    ap.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory run")
+    ap.add_argument("--tex", choices=["auto", "real", "stub", "skip"], default="auto",
+                    help="xelatex stage: real compile, stubbed I/O, or skipped (auto: real if installed)")
+    ap.add_argument("--json", type=Path, default=None, help="write results to this JSON file")
+    ap.add_argument("--compare", type=Path, default=None, help="show speedups against an earlier JSON result")
+    ap.add_argument("--micro", choices=["escape", "names"], default=None,
+                    help="run a micro-benchmark instead (escape: latex_escape/h vs the old implementations, "
+                         "names: author highlighting)")
+    ap.add_argument("--count", type=int, default=1_000_000,
+                    help="strings for --micro escape, publications for --micro names")
+    args = ap.parse_args(argv)
+
+    if args.micro == "escape":
+        micro_escape(args.count)
+        return
+    if args.micro == "names":
+        micro_names(args.count, args.authors)
+        return
+
+    tex_mode = args.tex
+    if tex_mode == "auto":
+        tex_mode = "real" if shutil.which("xelatex") else "stub"
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="cv-bench-") as tmp:
+        for n in sizes:
+            data = synthetic_content(n, args.authors, args.experience, args.details, args.refs)
+            text = yaml.safe_dump(data, allow_unicode=True, sort_keys=False)
+            timings = {name: measure(fn, args.repeat, not args.no_memory)
+                       for name, fn in stages(data, text, tex_mode, Path(tmp)).items()}
+            results.append({"size": n, "yaml_bytes": len(text.encode("utf-8")), "stages": timings})
+
+    doc = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "tex": tex_mode,
+            "params": {k: getattr(args, k) for k in ("authors", "experience", "details", "refs", "repeat")},
+        },
+        "results": results,
+    }
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_table(results, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import publications from BibTeX or CSL-JSON exports.
+
+  python scripts/bib_import.py library.bib [more.json ...] [--in-place]
+
+Entries are parsed one at a time (a BibTeX entry or a CSL-JSON item is the
+most that is held in memory), normalized to the fields the renderers use
+(title, authors, venue, year, volume, pages, doi) and checked against an
+index of the publications already in content.yml: a DOI match or a match on
+the normalized title (case, accents, punctuation and spacing ignored) marks
+a duplicate. Each lookup is a dict probe, so merging a large library is
+linear in its size.
+
+New entries are printed as YAML to paste into content.yml, or, with
+--in-place, appended to its `publications:` block without touching the rest
+of the file.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import unicodedata
+
+from loader import parse_yaml, yaml
+from model import ContentError, normalize
+
+ROOT = Path(__file__).resolve().parents[1]
+CONTENT = ROOT / "content.yml"
+# Field order of the entries in content.yml
+FIELDS = ("title", "authors", "venue", "year", "volume", "pages", "doi")
+READ_CHUNK = 1 << 16
+
+# ---------------------------------------------------------------------------
+# BibTeX
+# ---------------------------------------------------------------------------
+
+_BIB_BRACE_RE = re.compile(r"(?<!\\)[{}]")
+_BIB_HEAD_RE = re.compile(r"@\s*(\w+)\s*\{")
+_BIB_FIELD_RE = re.compile(r"\s*,?\s*([A-Za-z][\w\-:.]*)\s*=\s*")
+_BIB_WORD_RE = re.compile(r"[\w\-:.]+")
+_MONTHS = {m: str(i) for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+
+# \'e, \"{o}, \c{c}, ... -> combining marks, composed with NFC afterwards
+_ACCENTS = {"'": "\u0301", "`": "\u0300", "^": "\u0302", '"': "\u0308", "~": "\u0303", "=": "\u0304",
+            ".": "\u0307", "c": "\u0327", "v": "\u030c", "u": "\u0306", "H": "\u030b", "k": "\u0328"}
+_ACCENT_RE = re.compile(r"\\([`'^\"~=.])\s*\{?\\?([A-Za-z])\}?|\\([cvuHk])(?:\s*\{\\?([A-Za-z])\}|\s+([A-Za-z]))")
+_LATEX_SYMBOLS = {r"\ss": "ß", r"\o": "ø", r"\O": "Ø", r"\ae": "æ", r"\AE": "Æ", r"\aa": "å", r"\AA": "Å",
+                  r"\l": "ł", r"\L": "Ł", r"\i": "ı", r"\&": "&", r"\%": "%", r"\_": "_", r"\$": "$",
+                  r"\#": "#", r"\textendash": "–", r"\textemdash": "—"}
+_LATEX_SYMBOL_RE = re.compile("|".join(re.escape(k) + (r"(?![A-Za-z])" if k[-1].isalpha() else "")
+                                       for k in sorted(_LATEX_SYMBOLS, key=len, reverse=True)))
+_LATEX_CMD_RE = re.compile(r"\\(?:emph|textit|textbf|textsc|textrm|texttt|mathrm|url)\s*")
+
+def latex_to_text(s: str) -> str:
+    """
+    Best-effort plain text for a BibTeX value: accents, common symbols and
+    dashes are converted, formatting commands and protective braces dropped.
+    """
+    if "\\" in s:
+        s = _ACCENT_RE.sub(lambda m: (m.group(2) or m.group(4) or m.group(5)) + _ACCENTS[m.group(1) or m.group(3)], s)
+        s = _LATEX_SYMBOL_RE.sub(lambda m: _LATEX_SYMBOLS[m.group(0)], s)
+        s = _LATEX_CMD_RE.sub("", s)
+    s = s.replace("---", "—").replace("--", "–").replace("~", " ")
+    s = s.replace("{", "").replace("}", "")
+    return unicodedata.normalize("NFC", " ".join(s.split()))
+
+def _bib_entries(f: TextIO) -> Iterator[str]:
+    """
+    Yield the raw text of each @entry{...}, reading the file line by line.
+    Text between entries is a comment in BibTeX and is skipped.
+    """
+    buf: list[str] = []
+    depth = 0
+    inside = False
+    for line in f:
+        start = pos = 0
+        while True:
+            if not inside:
+                at = line.find("@", pos)
+                if at < 0:
+                    break
+                if _BIB_HEAD_RE.match(line, at) is None:
+                    # A stray "@" (an e-mail address in a comment, say)
+                    pos = at + 1
+                    continue
+                inside, depth, start, pos = True, 0, at, at + 1
+            m = _BIB_BRACE_RE.search(line, pos)
+            if m is None:
+                buf.append(line[start:])
+                break
+            pos = m.end()
+            depth += 1 if m.group() == "{" else -1
+            if depth == 0:
+                buf.append(line[start:pos])
+                yield "".join(buf)
+                buf, inside = [], False
+
+def _bib_braced(s: str, i: int, close: str) -> tuple[str, int]:
+    # s[i] is just past the opening delimiter; returns (inner text, index after the closing one)
+    depth = 0
+    j = i
+    while j < len(s):
+        c = s[j]
+        if c == "\\":
+            j += 2
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            if depth == 0 and close == "}":
+                return s[i:j], j + 1
+            depth -= 1
+        elif c == close and depth == 0:
+            return s[i:j], j + 1
+        j += 1
+    raise ValueError("unterminated value")
+
+def _bib_value(s: str, i: int, macros: dict[str, str]) -> tuple[str, int]:
+    parts = []
+    while True:
+        while i < len(s) and s[i].isspace():
+            i += 1
+        c = s[i:i + 1]
+        if c == "{":
+            part, i = _bib_braced(s, i + 1, "}")
+        elif c == '"':
+            part, i = _bib_braced(s, i + 1, '"')
+        else:
+            m = _BIB_WORD_RE.match(s, i)
+            if m is None:
+                raise ValueError(f"unexpected {c!r}")
+            word = m.group()
+            part = word if word.isdigit() else macros.get(word.lower(), _MONTHS.get(word.lower()[:3], word))
+            i = m.end()
+        parts.append(part)
+        while i < len(s) and s[i].isspace():
+            i += 1
+        if s[i:i + 1] != "#":
+            return "".join(parts), i
+        i += 1
+
+def _bib_fields(body: str, i: int, macros: dict[str, str]) -> dict[str, str]:
+    fields = {}
+    while True:
+        m = _BIB_FIELD_RE.match(body, i)
+        if m is None:
+            return fields
+        value, i = _bib_value(body, m.end(), macros)
+        fields[m.group(1).lower()] = value
+
+def iter_bibtex(f: TextIO) -> Iterator[dict[str, str]]:
+    """
+    Yield {"type": ..., "key": ..., <field>: <raw value>} per BibTeX entry.
+    @string macros are expanded; @comment and @preamble are skipped.
+    """
+    macros: dict[str, str] = {}
+    for raw in _bib_entries(f):
+        head = _BIB_HEAD_RE.match(raw)
+        if head is None:
+            continue
+        kind = head.group(1).lower()
+        if kind in ("comment", "preamble"):
+            continue
+        try:
+            if kind == "string":
+                macros.update(_bib_fields(raw, head.end(), macros))
+                continue
+            comma = raw.find(",", head.end())
+            if comma < 0:
+                continue
+            entry = {"type": kind, "key": raw[head.end():comma].strip()}
+            entry.update(_bib_fields(raw, comma + 1, macros))
+        except (ValueError, IndexError) as e:
+            print(f"Skipping malformed BibTeX entry {raw[:60]!r}: {e}", file=sys.stderr)
+            continue
+        yield entry
+
+def _split_authors(s: str) -> list[str]:
+    # " and " at brace depth 0 separates names; "{Barnes and Noble}" stays one name
+    names, depth, start = [], 0, 0
+    for m in re.finditer(r"[{}]|\s+and\s+", s):
+        tok = m.group()
+        if tok == "{":
+            depth += 1
+        elif tok == "}":
+            depth -= 1
+        elif depth == 0:
+            names.append(s[start:m.start()])
+            start = m.end()
+    names.append(s[start:])
+    return [n for n in (x.strip() for x in names) if n]
+
+def _bib_name(name: str) -> str:
+    if name.startswith("{") and name.endswith("}"):
+        return latex_to_text(name)
+    parts = [p.strip() for p in name.split(",")]
+    if len(parts) == 2:
+        name = f"{parts[1]} {parts[0]}"
+    elif len(parts) == 3:
+        # "von Last, Jr, First"
+        name = f"{parts[2]} {parts[0]}, {parts[1]}"
+    return latex_to_text(name)
+
+def from_bibtex(e: dict[str, str]) -> dict[str, Any]:
+    venue = e.get("journal") or e.get("booktitle") or e.get("school") or e.get("institution") \
+        or e.get("publisher") or e.get("howpublished") or ""
+    return {
+        "title": latex_to_text(e.get("title", "")),
+        "authors": [_bib_name(a) for a in _split_authors(e.get("author", ""))],
+        "venue": latex_to_text(venue),
+        "year": latex_to_text(e.get("year", "")),
+        "volume": latex_to_text(e.get("volume", "")),
+        "pages": latex_to_text(e.get("pages", "")),
+        "doi": _clean_doi(latex_to_text(e.get("doi", ""))),
+    }
+
+# ---------------------------------------------------------------------------
+# CSL-JSON
+# ---------------------------------------------------------------------------
+
+def iter_json_items(f: TextIO) -> Iterator[Any]:
+    """
+    Yield the items of a top-level JSON array (or a single object) one at a
+    time, decoding from a sliding buffer instead of loading the whole file.
+    """
+    dec = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+    while True:
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == "," or (buf[pos] == "[" and not started)):
+            started = started or buf[pos] == "["
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                item, end = dec.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # At EOF the item is complete; otherwise make sure a number wasn't cut short
+                if eof or end < len(buf):
+                    yield item
+                    pos = end
+                    continue
+        if eof:
+            return
+        chunk = f.read(READ_CHUNK)
+        buf = buf[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+def _csl_name(a: dict) -> str:
+    if "literal" in a:
+        return str(a["literal"])
+    parts = [a.get("given", ""), a.get("non-dropping-particle", ""), a.get("family", "")]
+    name = " ".join(str(p) for p in parts if p)
+    return f"{name}, {a['suffix']}" if a.get("suffix") else name
+
+def _csl_year(v: Any) -> str:
+    if isinstance(v, dict):
+        parts = v.get("date-parts") or [[]]
+        if parts and parts[0]:
+            return str(parts[0][0])
+        return str(v.get("literal") or v.get("raw") or "")[:4]
+    return str(v or "")
+
+def from_csl(item: dict) -> dict[str, Any]:
+    venue = item.get("container-title") or item.get("event-title") or item.get("publisher") or ""
+    if isinstance(venue, list):
+        venue = venue[0] if venue else ""
+    return {
+        "title": " ".join(str(item.get("title", "")).split()),
+        "authors": [_csl_name(a) for a in item.get("author") or [] if isinstance(a, dict)],
+        "venue": str(venue),
+        "year": _csl_year(item.get("issued")),
+        "volume": str(item.get("volume", "")),
+        "pages": str(item.get("page", "")).replace("--", "–").replace("-", "–"),
+        "doi": _clean_doi(str(item.get("DOI", ""))),
+    }
+
+# ---------------------------------------------------------------------------
+# Deduplication
+# ---------------------------------------------------------------------------
+
+def _clean_doi(doi: str) -> str:
+    doi = doi.strip()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:"):
+        if doi.lower().startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+def title_key(title: str) -> str:
+    """
+    Title reduced to lowercase letters and digits, accents removed.
+    """
+    s = unicodedata.normalize("NFKD", title.casefold())
+    return "".join(c for c in s if c.isalnum() and not unicodedata.combining(c))
+
+class PublicationIndex:
+    def __init__(self) -> None:
+        self.dois: dict[str, int] = {}
+        self.titles: dict[str, int] = {}
+        self.size = 0
+
+    def find(self, pub: dict[str, Any]) -> int | None:
+        doi = str(pub.get("doi") or "").lower()
+        if doi and doi in self.dois:
+            return self.dois[doi]
+        key = title_key(str(pub.get("title") or ""))
+        return self.titles.get(key) if key else None
+
+    def add(self, pub: dict[str, Any]) -> None:
+        doi = str(pub.get("doi") or "").lower()
+        if doi:
+            self.dois.setdefault(doi, self.size)
+        key = title_key(str(pub.get("title") or ""))
+        if key:
+            self.titles.setdefault(key, self.size)
+        self.size += 1
+
+def read_entries(path: Path, fmt: str = "auto") -> Iterator[dict[str, Any]]:
+    if fmt == "auto":
+        fmt = "bibtex" if path.suffix.lower() in (".bib", ".bibtex") else "csl"
+    with open(path, encoding="utf-8") as f:
+        if fmt == "bibtex":
+            for e in iter_bibtex(f):
+                yield from_bibtex(e)
+        else:
+            for item in iter_json_items(f):
+                if isinstance(item, dict):
+                    yield from_csl(item)
+
+def merge(existing: Iterable[dict[str, Any]], incoming: Iterable[dict[str, Any]]) -> tuple[list[dict[str, Any]], int]:
+    """
+    Entries of `incoming` that match neither `existing` nor an earlier
+    incoming entry, plus the number of duplicates dropped.
+    """
+    index = PublicationIndex()
+    for p in existing:
+        index.add(p)
+    new, dups = [], 0
+    for pub in incoming:
+        if not pub["title"]:
+            dups += 1
+            continue
+        if index.find(pub) is not None:
+            dups += 1
+            continue
+        index.add(pub)
+        new.append(pub)
+    return new, dups
+
+# ---------------------------------------------------------------------------
+# YAML output
+# ---------------------------------------------------------------------------
+
+_PLAIN_RE = re.compile(r"[A-Za-z\u00c0-\u024f][\w .'\-\u00c0-\u024f]*")
+# Plain scalars YAML would read as booleans or null
+_YAML_WORDS = {"y", "n", "yes", "no", "on", "off", "true", "false", "null"}
+
+def _scalar(v: str, quote: bool = True) -> str:
+    if not quote and _PLAIN_RE.fullmatch(v) and not v.endswith(" ") and v.lower() not in _YAML_WORDS:
+        return v
+    # A JSON string is a valid double-quoted YAML scalar
+    return json.dumps(v, ensure_ascii=False)
+
+def to_yaml(pubs: list[dict[str, Any]], indent: str = "  ") -> str:
+    """
+    Entries in the layout content.yml uses, one blank line between them.
+    """
+    blocks = []
+    for p in pubs:
+        lines = []
+        for k in FIELDS:
+            v = p.get(k)
+            if not v:
+                continue
+            lead = f"{indent}- " if not lines else f"{indent}  "
+            if k == "authors":
+                lines.append(f"{lead}authors:")
+                lines.extend(f"{indent}    - {_scalar(a, quote=False)}" for a in v)
+            elif k == "year" and str(v).isdigit():
+                lines.append(f"{lead}year: {v}")
+            else:
+                lines.append(f"{lead}{k}: {_scalar(str(v))}")
+        blocks.append("\n".join(lines) + "\n")
+    return "\n".join(blocks)
+
+def append_to_content(text: str, addition: str) -> str:
+    """
+    Insert `addition` at the end of the top-level `publications:` block.
+    """
+    lines = text.splitlines(keepends=True)
+    start = next((i for i, l in enumerate(lines) if re.match(r"publications\s*:", l)), None)
+    if start is None:
+        sep = "" if not text or text.endswith("\n") else "\n"
+        return f"{text}{sep}\npublications:\n{addition}"
+    end = start + 1
+    last = start
+    while end < len(lines):
+        l = lines[end]
+        if l.strip() and not l[0].isspace() and not l.startswith("#"):
+            break
+        if l.strip() and not l.lstrip().startswith("#"):
+            last = end
+        end += 1
+    if lines[start].split(":", 1)[1].strip() in ("[]", "null", "~"):
+        lines[start] = "publications:\n"
+    tail = lines[last]
+    if not tail.endswith("\n"):
+        lines[last] = tail + "\n"
+    return "".join(lines[:last + 1]) + "\n" + addition + "".join(lines[last + 1:])
+
+def write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp, path.stat().st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Import publications from BibTeX / CSL-JSON into content.yml.")
+    ap.add_argument("sources", nargs="+", type=Path, help=".bib or CSL-JSON files")
+    ap.add_argument("--content", type=Path, default=CONTENT, help="content YAML to merge into (default: content.yml)")
+    ap.add_argument("--format", choices=("auto", "bibtex", "csl"), default="auto",
+                    help="input format (default: by file suffix, .bib is BibTeX, anything else CSL-JSON)")
+    ap.add_argument("--in-place", action="store_true",
+                    help="append the new entries to the publications block of the content file")
+    args = ap.parse_args(argv)
+
+    text = args.content.read_text(encoding="utf-8")
+    data = parse_yaml(text)
+    existing = (data.get("publications") if isinstance(data, dict) else None) or []
+
+    def incoming() -> Iterator[dict[str, Any]]:
+        for src in args.sources:
+            yield from read_entries(src, args.format)
+
+    try:
+        new, dups = merge((p for p in existing if isinstance(p, dict)), incoming())
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        sys.exit(2)
+    print(f"{len(new)} new publications, {dups} duplicates or untitled entries skipped", file=sys.stderr)
+    if not new:
+        return
+
+    addition = to_yaml(new)
+    if not args.in_place:
+        sys.stdout.write(addition)
+        return
+
+    updated = append_to_content(text, addition)
+    try:
+        normalize(parse_yaml(updated))
+    except (yaml.YAMLError, ContentError) as e:
+        print(f"Refusing to write {args.content}: the result does not load ({e})", file=sys.stderr)
+        sys.exit(1)
+    write_atomic(args.content, updated)
+    print(f"Appended {len(new)} publications to {args.content}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
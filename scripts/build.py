@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build both outputs from a single parse of content.yml.
+
+The content is loaded and normalized once; the .tex is written first so
+xelatex can start in a background thread while the HTML is rendered.
+
+With --watch the process stays up: every save of content.yml rebuilds
+site/index.html straight away (unchanged sections come from an in-memory
+fragment cache), while PDF rebuilds are debounced and a running xelatex is
+killed when a newer save arrives. Content errors are reported and the last
+good outputs kept until the next save.
+
+With --assets the site is prepared for a CDN: the built-in CSS and
+assets/style.css are minified into a content-hashed
+site/assets/style.<hash>.css that the page links to, the HTML is minified,
+and every file in site/ gets precompressed .gz/.br siblings.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import sys
+import threading
+import time
+
+import assets
+import build_pdf
+import build_web
+import reproducible
+from fragments import FRAGMENT_DIR, FragmentCache, MemoryFragmentCache
+from loader import CONTENT_CACHE_DIR
+from model import ContentError, Document, load_document
+from pdf_cache import CACHE_DIR, DEFAULT_MAX_BYTES, PdfCache
+from publish import file_hash
+from scheduler import DEFAULT_MEM_MB, DEFAULT_TIMEOUT, JobKilled, Limits
+from templates import Template, TemplateError
+from ttf import FontError
+from tex_format import ensure_format, split_preamble
+import timing
+from watch import Debouncer, watch
+
+ROOT = Path(__file__).resolve().parents[1]
+CONTENT = ROOT / "content.yml"
+STYLE_CSS = ROOT / "assets" / "style.css"
+PDF_DELAY = 0.5
+
+def write_site_html(doc: Document, fragments: FragmentCache | None = None,
+                    layout: Template = build_web.HTML_LAYOUT) -> Path:
+    build_web.OUT_HTML.parent.mkdir(parents=True, exist_ok=True)
+    with open(build_web.OUT_HTML, "w", encoding="utf-8", buffering=build_web.WRITE_BUFFER) as f:
+        build_web.write_html(doc, f, fragments, layout)
+    return build_web.OUT_HTML
+
+def write_site_assets(doc: Document, fragments: FragmentCache | None = None,
+                      layout: Template = build_web.HTML_LAYOUT, css_files: list[Path] | None = None) -> Path:
+    """
+    Bundle the built-in CSS, assets/style.css and `css_files` into a
+    fingerprinted stylesheet and write the page minified, linking to it.
+    """
+    sheets = [STYLE_CSS] if STYLE_CSS.exists() else []
+    sheets += css_files or []
+    with timing.span("css", "assets"):
+        css = assets.bundle_css([build_web.DEFAULT_CSS, *(p.read_text(encoding="utf-8") for p in sheets)])
+        bundle = assets.write_bundle(css.encode("utf-8"), build_web.OUT_DIR / "assets")
+    href = bundle.relative_to(build_web.OUT_DIR).as_posix()
+    page = build_web.render_html(doc, fragments, layout, css, f'<link rel="stylesheet" href="{href}"/>')
+    with timing.span("html", "assets"):
+        assets.write_if_changed(build_web.OUT_HTML, assets.minify_html(page).encode("utf-8"))
+    print(f"Wrote {bundle}")
+    return build_web.OUT_HTML
+
+def watch_mode(content: Path, engine: str, cache: PdfCache | None, fmt_dir: Path | None,
+               pdf: bool, pdf_delay: float, html_layout: Template = build_web.HTML_LAYOUT,
+               tex_layout: Template = build_pdf.TEX_LAYOUT, direct: bool = False,
+               limits: Limits | None = None, fonts: tuple[Path, Path] | None = None) -> None:
+    web_fragments = MemoryFragmentCache("web", build_web.RENDERER_VERSION)
+    tex_fragments = MemoryFragmentCache("tex", build_pdf.RENDERER_VERSION)
+
+    def compile_latest(doc: Document, cancel: threading.Event) -> None:
+        t0 = time.perf_counter()
+        try:
+            if direct:
+                out = build_pdf.write_direct(doc, build_pdf.OUT_PDF, fonts, limits)
+            else:
+                tex = build_pdf.write_tex_doc(doc, build_pdf.BUILD_DIR, tex_fragments, tex_layout)
+                out = build_pdf.compile_pdf(tex, build_pdf.OUT_PDF, False, engine, cache, fmt_dir, cancel, limits)
+        except build_pdf.CompileCancelled:
+            print("[pdf] superseded by a newer save")
+            return
+        except JobKilled as e:
+            print(f"[pdf] xelatex {e}", file=sys.stderr)
+            return
+        except Exception as e:
+            print(f"[pdf] failed: {e}", file=sys.stderr)
+            return
+        print(f"[pdf] wrote {out} in {time.perf_counter() - t0:.2f}s")
+
+    debouncer = Debouncer(pdf_delay, compile_latest)
+
+    def rebuild() -> None:
+        t0 = time.perf_counter()
+        try:
+            doc = load_document(content)
+        except ContentError as e:
+            # Keep the last good outputs and wait for the next save
+            print(f"[web] {e}", file=sys.stderr)
+            return
+        out = write_site_html(doc, web_fragments, html_layout)
+        print(f"[web] wrote {out} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+        if pdf:
+            debouncer.schedule(doc)
+
+    try:
+        rebuild()
+    except Exception as e:
+        print(f"Build failed: {type(e).__name__}: {e}", file=sys.stderr)
+    print(f"Watching {content} (Ctrl-C to stop)")
+    try:
+        watch([content], rebuild)
+    except KeyboardInterrupt:
+        debouncer.cancel()
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Build site/index.html and site/cv.pdf from one parse of the content.")
+    ap.add_argument("content", nargs="?", type=Path, default=CONTENT, help="content YAML (default: content.yml)")
+    ap.add_argument("--no-pdf", action="store_true", help="only build the HTML")
+    ap.add_argument("--content-cache", nargs="?", type=Path, const=CONTENT_CACHE_DIR, default=None, metavar="DIR",
+                    help=f"reuse parsed YAML for unchanged files (default dir: {CONTENT_CACHE_DIR.relative_to(ROOT)})")
+    ap.add_argument("--fragment-cache", nargs="?", type=Path, const=FRAGMENT_DIR, default=None, metavar="DIR",
+                    help=f"reuse rendered sections whose input is unchanged (default dir: {FRAGMENT_DIR.relative_to(ROOT)})")
+    ap.add_argument("--no-cache", action="store_true", help="always run xelatex, ignoring the compiled-PDF cache")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                    help="evict least recently used PDF cache entries beyond this size (default: %(default)g)")
+    ap.add_argument("--fmt", action="store_true", help="use a precompiled preamble format for xelatex")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                    help="kill xelatex after this many seconds, all passes included (0 = never, default: %(default)g)")
+    ap.add_argument("--mem-limit-mb", type=int, default=DEFAULT_MEM_MB,
+                    help="address-space limit for xelatex, Linux only (0 = none, default: %(default)d)")
+    ap.add_argument("--engine", choices=("xelatex", "python"), default="xelatex",
+                    help="PDF engine; python writes the PDF in-process with no TeX install (default: %(default)s)")
+    ap.add_argument("--font", type=Path, default=None, metavar="TTF",
+                    help="with --engine python, embed this TrueType font (default: a serif found on the system)")
+    ap.add_argument("--bold-font", type=Path, default=None, metavar="TTF",
+                    help="the bold TrueType font to go with --font")
+    ap.add_argument("--html-template", type=Path, default=None, metavar="FILE",
+                    help="HTML layout with __TITLE__, __NAME__, __CSS__ and __BODY__ slots (default: built-in)")
+    ap.add_argument("--tex-template", type=Path, default=None, metavar="FILE",
+                    help="LaTeX layout with __NAME__, __HEADER__ and __BODY__ slots (default: built-in)")
+    ap.add_argument("--assets", action="store_true",
+                    help="minify and fingerprint the CSS, minify the HTML and precompress site/ for CDN upload")
+    ap.add_argument("--css", type=Path, action="append", default=[], metavar="FILE",
+                    help="with --assets, append this stylesheet to the bundle (repeatable)")
+    ap.add_argument("--reproducible", action="store_true",
+                    help="pin the PDF dates and /ID (SOURCE_DATE_EPOCH, default: last commit time) "
+                         "and write site/SHA256SUMS")
+    ap.add_argument("--check-reproducible", action="store_true",
+                    help="implies --reproducible; rebuild the PDF once from scratch and fail if it differs")
+    ap.add_argument("--watch", action="store_true", help="rebuild on every save of the content file")
+    ap.add_argument("--pdf-delay", type=float, default=PDF_DELAY,
+                    help="in --watch mode, seconds of quiet before the PDF is rebuilt (default: %(default)g)")
+    ap.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE.json",
+                    help="print a per-stage timing breakdown; with a path, also write a Chrome trace")
+    args = ap.parse_args(argv)
+    if args.assets and args.watch:
+        ap.error("--assets is for deploy builds and cannot be combined with --watch")
+    if args.css and not args.assets:
+        ap.error("--css requires --assets")
+    if args.check_reproducible and (args.watch or args.no_pdf):
+        ap.error("--check-reproducible needs a PDF build and cannot be combined with --watch or --no-pdf")
+    args.reproducible = args.reproducible or args.check_reproducible
+    direct = args.engine == "python"
+    if direct and (args.fmt or args.tex_template):
+        ap.error("--fmt and --tex-template need --engine xelatex")
+    if (args.font is None) != (args.bold_font is None):
+        ap.error("--font and --bold-font go together")
+    if args.font and not direct:
+        ap.error("--font needs --engine python")
+    fonts = (args.font, args.bold_font) if args.font else None
+    if args.profile is not None:
+        timing.enable(Path(args.profile) if args.profile else None)
+    if args.reproducible:
+        try:
+            print(f"Reproducible build: {reproducible.ENV}={reproducible.enable()}")
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+
+    try:
+        html_layout = build_web.load_layout(args.html_template)
+        tex_layout = build_pdf.load_layout(args.tex_template)
+        if args.fmt and not args.no_pdf:
+            split_preamble(tex_layout.source)
+    except TemplateError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+    t0 = time.perf_counter()
+    if not args.watch:
+        # Content problems abort here, before xelatex is ever started
+        try:
+            doc = load_document(args.content, args.content_cache)
+        except ContentError as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+    engine = "" if args.no_pdf or direct else build_pdf.check_xelatex()
+    cache = None if args.no_cache else PdfCache(CACHE_DIR, int(args.cache_max_mb * 2**20))
+    limits = Limits(args.timeout or None, args.mem_limit_mb * 2**20 or None)
+    fmt_dir = ensure_format(tex_layout.source, engine) if args.fmt and not args.no_pdf else None
+
+    if args.watch:
+        watch_mode(args.content, engine, cache, fmt_dir, not args.no_pdf, args.pdf_delay, html_layout, tex_layout,
+                   direct, limits, fonts)
+        return
+
+    web_fragments = build_web.fragment_cache(args.fragment_cache) if args.fragment_cache else None
+    tex_fragments = build_pdf.fragment_cache(args.fragment_cache) if args.fragment_cache else None
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pdf_job = None
+        if not args.no_pdf and not direct:
+            tex = build_pdf.write_tex_doc(doc, build_pdf.BUILD_DIR, tex_fragments, tex_layout)
+            print(f"Wrote {tex}")
+            # xelatex runs as a subprocess, so this thread mostly waits and the HTML renders meanwhile
+            pdf_job = pool.submit(build_pdf.compile_pdf, tex, build_pdf.OUT_PDF, False, engine, cache, fmt_dir,
+                                  limits=limits)
+
+        if args.assets:
+            print(f"Wrote {write_site_assets(doc, web_fragments, html_layout, args.css)}")
+        else:
+            print(f"Wrote {write_site_html(doc, web_fragments, html_layout)}")
+
+        if not args.no_pdf and direct:
+            try:
+                print(f"Wrote {build_pdf.write_direct(doc, build_pdf.OUT_PDF, fonts, limits)}")
+            except (ContentError, FontError) as e:
+                print(e, file=sys.stderr)
+                sys.exit(2)
+            except FileNotFoundError as e:
+                print(e, file=sys.stderr)
+                sys.exit(3)
+            except JobKilled as e:
+                print(f"xelatex {e}", file=sys.stderr)
+                sys.exit(4)
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+        if pdf_job is not None:
+            try:
+                print(f"Wrote {pdf_job.result()}")
+            except FileNotFoundError as e:
+                print(e, file=sys.stderr)
+                sys.exit(3)
+            except JobKilled as e:
+                print(f"xelatex {e}", file=sys.stderr)
+                sys.exit(4)
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+
+    if args.check_reproducible:
+        # Compare site/cv.pdf with one more build, far enough apart for a clock-derived date to show
+        time.sleep(build_pdf.CLOCK_GAP)
+        try:
+            with timing.span("check_reproducible", "pdf"):
+                fresh = build_pdf.fresh_digest(args.content, engine, fmt_dir, args.content_cache, limits,
+                                               tex_layout, direct, fonts)
+        except (ContentError, FontError, FileNotFoundError, RuntimeError) as e:
+            print(e, file=sys.stderr)
+            sys.exit(3)
+        built = file_hash(build_pdf.OUT_PDF)
+        if fresh != built:
+            print(f"PDF output is not reproducible: sha256 {built} then {fresh}", file=sys.stderr)
+            sys.exit(1)
+        print(f"PDF output is reproducible (sha256 {built})")
+
+    if args.assets:
+        with timing.span("precompress", "assets"):
+            print(assets.summary(assets.precompress(build_web.OUT_DIR)))
+    if args.reproducible:
+        print(f"Wrote {reproducible.write_manifest(build_web.OUT_DIR)}")
+    for fragments in (web_fragments, tex_fragments):
+        if fragments is not None and fragments.stats():
+            print(fragments.summary())
+    print(f"Built in {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,38 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Callable, TextIO
+import argparse
+import asyncio
+import io
+import json
+import socketserver
 import subprocess
 import sys
 import re
-
-try:
-    import yaml  # type: ignore
-except Exception:
-    print("Missing dependency: PyYAML. Install with: pip install pyyaml", file=sys.stderr)
-    raise
+import tempfile
+import threading
+import time
+
+from batch import JobResult, check_unique, collect_inputs, default_workers, output_path, report, run_jobs
+import direct_pdf
+from loader import CONTENT_CACHE_DIR
+from fragments import FRAGMENT_DIR, SHARED_SOURCES, FragmentCache, source_hash
+from model import ContentError, Document, Education, Experience, FundedProject, Publication, Reference, load_document
+from names import NameMatcher, name_matcher
+from pdfwriter import UnsupportedText
+from pdf_cache import CACHE_DIR, DEFAULT_MAX_BYTES, PdfCache, cache_key
+from publish import file_hash, publish
+import reproducible
+from schema import file_problems
+from scheduler import DEFAULT_MEM_MB, DEFAULT_TIMEOUT, JobKilled, Limits, bounded, kill_group, run_limited
+from templates import Template, TemplateError, compile_template, load_template
+from tex_format import FMT_NAME, ensure_format, format_env, split_preamble
+from timing import span
+import timing
+from ttf import FontError
 
 ROOT = Path(__file__).resolve().parents[1]
 CONTENT = ROOT / "content.yml"
@@ -20,31 +42,109 @@ BUILD_DIR = ROOT / "build_pdf"
 TEX = BUILD_DIR / "cv.tex"
 PDF = BUILD_DIR / "cv.pdf"
 OUT_PDF = OUT_DIR / "cv.pdf"
+LOG_DIR = BUILD_DIR / "logs"
+# PDF dates have one-second resolution
+CLOCK_GAP = 1.1
+RENDERER_VERSION = source_hash(__file__, *SHARED_SOURCES)
+
+# Another xelatex pass is only needed when LaTeX asks for it or the .aux changed
+MAX_PASSES = 3
+RERUN_RE = re.compile(r"Rerun to get|Label\(s\) may have changed|Please rerun LaTeX")
+AUX_REFS = (rb"\newlabel", rb"\bibcite", rb"\@writefile")
+# How often a cancellable xelatex run checks whether it was cancelled
+CANCEL_POLL = 0.05
+
+# ===== IMPORTANT: NOT an f-string =====
+TEX_TEMPLATE = r"""
+\documentclass[10pt,letterpaper]{article}
+\usepackage[margin=0.75in]{geometry}
+\usepackage[hidelinks]{hyperref}
+
+\setlength{\parindent}{0pt}
+\setlength{\parskip}{3pt}
+
+\makeatletter
+\renewcommand\thesection{}
+\renewcommand\section{\@startsection{section}{1}{0pt}%
+  {-0.8ex}{0.6ex}{\normalfont\bfseries\MakeUppercase}}
+\makeatother
+
+% Compact lists
+\usepackage{enumitem}
+\setlist[itemize]{leftmargin=*, itemsep=1pt, topsep=2pt}
+\setlist[enumerate]{leftmargin=*, itemsep=2pt, topsep=2pt}
+
+% Everything above can be precompiled into a format (see tex_format.py)
+\csname endofdump\endcsname
+
+% ===== Font: Times New Roman (XeLaTeX) =====
+\usepackage{fontspec}
+\IfFontExistsTF{Times New Roman}{
+  \setmainfont{Times New Roman}
+}{
+  \setmainfont{TeX Gyre Termes}
+}
+
+\begin{document}
+
+\begin{center}
+{\LARGE\bfseries __NAME__}\par
+\vspace{4pt}
+__HEADER__
+\end{center}
+
+\vspace{10pt}
+
+__BODY__
+
+\end{document}
+""".strip() + "\n"
+TEX_LAYOUT = compile_template(TEX_TEMPLATE, "cv.tex")
+# Slots a user template may use; __BODY__ is the rendered sections
+TEX_SLOTS = ("NAME", "HEADER", "BODY")
+
+LATEX_SPECIALS = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+_LATEX_TABLE = str.maketrans(LATEX_SPECIALS)
+_LATEX_SPECIAL_RE = re.compile("[" + re.escape("".join(LATEX_SPECIALS)) + "]")
+
+@lru_cache(maxsize=1 << 14)
+def _latex_escape_str(s: str) -> str:
+    # Most fields (names, venues, years) contain nothing to escape
+    if _LATEX_SPECIAL_RE.search(s) is None:
+        return s
+    return s.translate(_LATEX_TABLE)
 
 def latex_escape(s: str) -> str:
     """
     Escape LaTeX special chars for normal text.
+    Results are memoized: author names and venues repeat across publications.
     """
     if s is None:
         return ""
-    s = str(s)
-    repl = {
-        "\\": r"\textbackslash{}",
-        "&": r"\&",
-        "%": r"\%",
-        "$": r"\$",
-        "#": r"\#",
-        "_": r"\_",
-        "{": r"\{",
-        "}": r"\}",
-        "~": r"\textasciitilde{}",
-        "^": r"\textasciicircum{}",
-    }
-    return "".join(repl.get(ch, ch) for ch in s)
-
-def bold_my_name(author: str, my_name: str = "Bin Hu") -> str:
+    if s.__class__ is not str:
+        s = str(s)
+    return _latex_escape_str(s)
+
+def _escape_counts() -> dict[str, int]:
+    ci = _latex_escape_str.cache_info()
+    return {"latex_escape() calls": ci.hits + ci.misses, "latex_escape() distinct strings": ci.misses}
+
+timing.collect(_escape_counts)
+
+def bold_my_name(author: str, me: NameMatcher) -> str:
     a = latex_escape(author)
-    if author.strip() == my_name:
+    if me(author):
         return r"\textbf{" + a + "}"
     return a
 
@@ -60,24 +160,19 @@ def itemize(lines: list[str]) -> str:
     out.append(r"\end{itemize}")
     return "\n".join(out) + "\n"
 
-def latex_doc(data: dict) -> str:
-    name = latex_escape(data.get("name", ""))
-    location = latex_escape(data.get("location", ""))
+def href(url: str, text: str) -> str:
+    if not url:
+        return latex_escape(text)
+    return r"\href{" + latex_escape(url) + "}{" + latex_escape(text) + "}"
 
-    emails = data.get("email", []) or []
-    phones = data.get("phone", []) or []
-    links = data.get("links", {}) or {}
+def tex_header(doc: Document) -> str:
+    location = latex_escape(doc.location)
 
-    website = links.get("website", "")
-    pdf_link = links.get("pdf", "")
+    website = doc.website
+    pdf_link = doc.pdf
 
-    def href(url: str, text: str) -> str:
-        if not url:
-            return latex_escape(text)
-        return r"\href{" + latex_escape(url) + "}{" + latex_escape(text) + "}"
-
-    email_line = " / ".join([latex_escape(e) for e in emails if e])
-    phone_line = " / ".join([latex_escape(p) for p in phones if p])
+    email_line = " / ".join([latex_escape(e) for e in doc.email if e])
+    phone_line = " / ".join([latex_escape(p) for p in doc.phone if p])
 
     link_parts = []
     if website:
@@ -97,250 +192,752 @@ def latex_doc(data: dict) -> str:
     if link_line:
         header_lines.append(link_line)
 
-    header = "\n".join([r"\centerline{" + x + r"}" for x in header_lines])
-
-    # ---- build body (same as before) ----
-    edu = data.get("education", []) or []
-    pubs = data.get("publications", []) or []
-    exp = data.get("experience", []) or []
-    funded = data.get("funded_projects", []) or []
-    industry = data.get("industry_experience", []) or []
-    honors = data.get("honors_awards", []) or []
-    skills = data.get("skills", {}) or {}
-    refs = data.get("references", []) or []
-
-    parts: list[str] = []
-
-    if edu:
-        parts.append(section("Education"))
-        for e in edu:
-            inst = latex_escape(e.get("institution", ""))
-            period = latex_escape(e.get("period", ""))
-            degree = latex_escape(e.get("degree", ""))
-            dept = latex_escape(e.get("department", ""))
-            loc = latex_escape(e.get("location", ""))
-            gpa = latex_escape(e.get("gpa", ""))
-            area = latex_escape(e.get("Research Area", ""))
-            advisor = latex_escape(e.get("Advisor", ""))
-
-            # 第一行：学校 + 右侧时间
-            parts.append(r"\textbf{" + inst + r"}" + (r"\hfill " + period if period else "") + r"\\[-0.5pt]")
-
-            # 下面几行：用 \\[-2pt] 把行距压紧一点
-            if degree:
-                parts.append(r"\textbf{" + degree + r"}\\[-0.5pt]")
-            if dept:
-                parts.append(dept + r"\\[-0.5pt]")
-            if loc:
-                parts.append(loc + r"\\[-0.5pt]")
-            #if gpa:
-            #    parts.append(r"GPA: " + gpa + r"\\[-2pt]")
-            if area:
-                parts.append(r"\textbf{Research Area:} " + area + r"\\[-0.5pt]")
-            if advisor:
-                parts.append(r"\textbf{Advisor:} " + advisor + r"\\[+10pt]")
-
-            # 原来是 \vspace{4pt}，这里改小（或者直接删掉这一行）
-            #parts.append(r"\vspace{12pt}")
-
-    if pubs:
-        parts.append(section("Publications"))
-        parts.append(r"\begin{enumerate}")
-        for p in pubs:
-            title = latex_escape(p.get("title", ""))
-            authors = p.get("authors", []) or []
-            venue = latex_escape(p.get("venue", ""))
-            year = p.get("year", "")
-            note = latex_escape(p.get("note", "")) if p.get("note", "") else ""
-            volume = latex_escape(p.get("volume", "")) if p.get("volume", "") else ""
-            pages = latex_escape(p.get("pages", "")) if p.get("pages", "") else ""
-            doi = latex_escape(p.get("doi", "")) if p.get("doi", "") else ""
-
-            author_str = ", ".join([bold_my_name(a, "Bin Hu") for a in authors])
-
-            meta_bits = []
-            if venue:
-                meta_bits.append(venue)
-            if year:
-                meta_bits.append(str(year))
-            if volume:
-                meta_bits.append("Volume " + volume)
-            if pages:
-                meta_bits.append(pages)
-            if note:
-                meta_bits.append(note)
-
-            meta = ", ".join(meta_bits)
-
-            parts.append(r"\item " + r"\textbf{" + title + r"}\\")
-            if author_str:
-                parts.append(author_str + r"\\")
-            if meta:
-                parts.append(r"\textbf{" + meta + r"}\\")
-            if doi:
-                parts.append(r"DOI: " + href("https://doi.org/" + doi, doi) + r"\\")
-            parts.append(r"\vspace{2pt}")
-        parts.append(r"\end{enumerate}")
-
-    if exp:
-        parts.append(section("Research & Experience"))
-        for e in exp:
-            org = latex_escape(e.get("organization", ""))
-            role = latex_escape(e.get("role", ""))
-            period = latex_escape(e.get("period", ""))
-            details = e.get("details", []) or []
-            parts.append(r"\textbf{" + org + r"}" + (r"\hfill " + period if period else "") + r"\\")
-            if role:
-                parts.append(r"\textbf{" + role + r"}\\")
-            if details:
-                parts.append(itemize(details))
-            parts.append(r"\vspace{4pt}")
-
-    if funded:
-        parts.append(section("Funded Projects"))
-        items = []
-        for fp in funded:
-            sponsor = fp.get("sponsor", "")
-            title = fp.get("title", "")
-            projects = fp.get("projects", []) or []
-            if title:
-                items.append(f"{sponsor} — {title}")
-            else:
-                if sponsor and projects:
-                    items.append(f"{sponsor}: " + "; ".join(projects))
-                elif sponsor:
-                    items.append(str(sponsor))
-        parts.append(itemize(items))
-
-    if industry:
-        parts.append(section("Industry Experience"))
-        for e in industry:
-            org = latex_escape(e.get("organization", ""))
-            role = latex_escape(e.get("role", ""))
-            period = latex_escape(e.get("period", ""))
-            details = e.get("details", []) or []
-            parts.append(r"\textbf{" + org + r"}" + (r"\hfill " + period if period else "") + r"\\")
-            if role:
-                parts.append(r"\textbf{" + role + r"}\\")
-            if details:
-                parts.append(itemize(details))
-            parts.append(r"\vspace{4pt}")
-
-    if honors:
-        parts.append(section("Honors & Awards"))
-        parts.append(itemize([str(x) for x in honors]))
-
-    # if skills:
-    #     parts.append(section("Skills"))
-    #     for k, arr in skills.items():
-    #         title = latex_escape(k.replace("_", " ").title())
-    #         vals = arr or []
-    #         if not vals:
-    #             continue
-    #         parts.append(r"\textbf{" + title + r"}\\")
-    #         parts.append(itemize([str(v) for v in vals]))
-    #         parts.append(r"\vspace{2pt}")
-
-    if refs:
-        parts.append(section("References"))
-        for r in refs:
-            nm = latex_escape(r.get("name", ""))
-            tt = latex_escape(r.get("title", ""))
-            aff = latex_escape(r.get("affiliation", ""))
-            em = latex_escape(r.get("email", ""))
-            parts.append(r"\textbf{" + nm + r"}\\")
-            line = " — ".join([x for x in [tt, aff] if x])
-            if line:
-                parts.append(line + r"\\")
-            if em:
-                parts.append(r"E-mail: " + href("mailto:" + em, em) + r"\\")
-            parts.append(r"\vspace{6pt}")
-
-    body = "\n".join(parts)
-
-    # ===== IMPORTANT: NOT an f-string =====
-    tex_template = r"""
-\documentclass[10pt,letterpaper]{article}
-\usepackage[margin=0.75in]{geometry}
-\usepackage[hidelinks]{hyperref}
-
-% ===== Font: Times New Roman (XeLaTeX) =====
-\usepackage{fontspec}
-\IfFontExistsTF{Times New Roman}{
-  \setmainfont{Times New Roman}
-}{
-  \setmainfont{TeX Gyre Termes}
-}
-
-\setlength{\parindent}{0pt}
-\setlength{\parskip}{3pt}
-
-\makeatletter
-\renewcommand\thesection{}
-\renewcommand\section{\@startsection{section}{1}{0pt}%
-  {-0.8ex}{0.6ex}{\normalfont\bfseries\MakeUppercase}}
-\makeatother
+    return "\n".join([r"\centerline{" + x + r"}" for x in header_lines])
+
+def tex_education(edu: list[Education]) -> list[str]:
+    if not edu:
+        return []
+    parts = [section("Education")]
+    for e in edu:
+        inst = latex_escape(e.institution)
+        period = latex_escape(e.period)
+        degree = latex_escape(e.degree)
+        dept = latex_escape(e.department)
+        loc = latex_escape(e.location)
+        gpa = latex_escape(e.gpa)
+        area = latex_escape(e.research_area)
+        advisor = latex_escape(e.advisor)
+
+        # 第一行：学校 + 右侧时间
+        parts.append(r"\textbf{" + inst + r"}" + (r"\hfill " + period if period else "") + r"\\[-0.5pt]")
+
+        # 下面几行：用 \\[-2pt] 把行距压紧一点
+        if degree:
+            parts.append(r"\textbf{" + degree + r"}\\[-0.5pt]")
+        if dept:
+            parts.append(dept + r"\\[-0.5pt]")
+        if loc:
+            parts.append(loc + r"\\[-0.5pt]")
+        #if gpa:
+        #    parts.append(r"GPA: " + gpa + r"\\[-2pt]")
+        if area:
+            parts.append(r"\textbf{Research Area:} " + area + r"\\[-0.5pt]")
+        if advisor:
+            parts.append(r"\textbf{Advisor:} " + advisor + r"\\[+10pt]")
+
+        # 原来是 \vspace{4pt}，这里改小（或者直接删掉这一行）
+        #parts.append(r"\vspace{12pt}")
+    return parts
+
+def tex_publications(pubs: list[Publication], me: NameMatcher) -> list[str]:
+    if not pubs:
+        return []
+    parts = [section("Publications"), r"\begin{enumerate}"]
+    for p in pubs:
+        title = latex_escape(p.title)
+        venue = latex_escape(p.venue)
+        year = p.year
+        note = latex_escape(p.note) if p.note else ""
+        volume = latex_escape(p.volume) if p.volume else ""
+        pages = latex_escape(p.pages) if p.pages else ""
+        doi = latex_escape(p.doi) if p.doi else ""
+
+        author_str = ", ".join([bold_my_name(a, me) for a in p.authors])
+
+        meta_bits = []
+        if venue:
+            meta_bits.append(venue)
+        if year:
+            meta_bits.append(year)
+        if volume:
+            meta_bits.append("Volume " + volume)
+        if pages:
+            meta_bits.append(pages)
+        if note:
+            meta_bits.append(note)
+
+        meta = ", ".join(meta_bits)
+
+        parts.append(r"\item " + r"\textbf{" + title + r"}\\")
+        if author_str:
+            parts.append(author_str + r"\\")
+        if meta:
+            parts.append(r"\textbf{" + meta + r"}\\")
+        if doi:
+            parts.append(r"DOI: " + href("https://doi.org/" + doi, doi) + r"\\")
+        parts.append(r"\vspace{2pt}")
+    parts.append(r"\end{enumerate}")
+    return parts
+
+def tex_jobs(title: str, jobs: list[Experience]) -> list[str]:
+    if not jobs:
+        return []
+    parts = [section(title)]
+    for e in jobs:
+        org = latex_escape(e.organization)
+        role = latex_escape(e.role)
+        period = latex_escape(e.period)
+        details = e.details
+        parts.append(r"\textbf{" + org + r"}" + (r"\hfill " + period if period else "") + r"\\")
+        if role:
+            parts.append(r"\textbf{" + role + r"}\\")
+        if details:
+            parts.append(itemize(details))
+        parts.append(r"\vspace{4pt}")
+    return parts
+
+def tex_funded_projects(funded: list[FundedProject]) -> list[str]:
+    if not funded:
+        return []
+    items = []
+    for fp in funded:
+        sponsor = fp.sponsor
+        title = fp.title
+        projects = fp.projects
+        if title:
+            items.append(f"{sponsor} — {title}")
+        else:
+            if sponsor and projects:
+                items.append(f"{sponsor}: " + "; ".join(projects))
+            elif sponsor:
+                items.append(sponsor)
+    return [section("Funded Projects"), itemize(items)]
+
+def tex_list_section(title: str, items: list[str]) -> list[str]:
+    if not items:
+        return []
+    return [section(title), itemize(items)]
+
+def tex_skills(skills: dict[str, list[str]]) -> list[str]:
+    if not skills:
+        return []
+    parts = [section("Skills")]
+    for k, vals in skills.items():
+        title = latex_escape(k.replace("_", " ").title())
+        if not vals:
+            continue
+        parts.append(r"\textbf{" + title + r"}\\")
+        parts.append(itemize(vals))
+        parts.append(r"\vspace{2pt}")
+    return parts
+
+def tex_references(refs: list[Reference]) -> list[str]:
+    if not refs:
+        return []
+    parts = [section("References")]
+    for r in refs:
+        nm = latex_escape(r.name)
+        tt = latex_escape(r.title)
+        aff = latex_escape(r.affiliation)
+        em = latex_escape(r.email)
+        parts.append(r"\textbf{" + nm + r"}\\")
+        line = " — ".join([x for x in [tt, aff] if x])
+        if line:
+            parts.append(line + r"\\")
+        if em:
+            parts.append(r"E-mail: " + href("mailto:" + em, em) + r"\\")
+        parts.append(r"\vspace{6pt}")
+    return parts
+
+def tex_section_specs(doc: Document) -> list[tuple[str, Any, Callable[[], list[str]]]]:
+    """
+    (name, input data, renderer) for the body sections listed in doc.sections.
+    The input data is what the fragment cache hashes.
+    """
+    specs = {spec[0]: spec for spec in [
+        ("education", doc.education, lambda: tex_education(doc.education)),
+        ("publications", (doc.publications, doc.highlight_names, doc.name),
+         lambda: tex_publications(doc.publications, name_matcher(doc))),
+        ("experience", doc.experience, lambda: tex_jobs("Research & Experience", doc.experience)),
+        ("funded_projects", doc.funded_projects, lambda: tex_funded_projects(doc.funded_projects)),
+        ("industry_experience", doc.industry_experience,
+         lambda: tex_jobs("Industry Experience", doc.industry_experience)),
+        ("honors_awards", doc.honors_awards, lambda: tex_list_section("Honors & Awards", doc.honors_awards)),
+        ("skills", doc.skills, lambda: tex_skills(doc.skills)),
+        ("references", doc.references, lambda: tex_references(doc.references)),
+    ]}
+    return [specs[name] for name in doc.sections]
+
+def latex_doc(doc: Document, fragments: FragmentCache | None = None, layout: Template = TEX_LAYOUT) -> str:
+    """
+    With `fragments`, unchanged body sections come from the fragment cache.
+    """
+    sections = []
+    for name, value, render in tex_section_specs(doc):
+        with span(name, "tex"):
+            sections.append("\n".join(render()) if fragments is None else fragments.get(name, value, render))
+    body = "\n".join([x for x in sections if x])
 
-% Compact lists
-\usepackage{enumitem}
-\setlist[itemize]{leftmargin=*, itemsep=1pt, topsep=2pt}
-\setlist[enumerate]{leftmargin=*, itemsep=2pt, topsep=2pt}
+    with span("header", "tex"):
+        header = tex_header(doc)
+    return layout.fill(NAME=latex_escape(doc.name), HEADER=header, BODY=body)
 
-\begin{document}
+def load_layout(path: Path | None) -> Template:
+    """
+    The built-in layout, or a user template file using the TEX_SLOTS.
+    """
+    if path is None:
+        return TEX_LAYOUT
+    return load_template(path, TEX_SLOTS, required=("BODY",))
 
-\begin{center}
-{\LARGE\bfseries __NAME__}\par
-\vspace{4pt}
-__HEADER__
-\end{center}
 
-\vspace{10pt}
+class CompileCancelled(RuntimeError):
+    pass
 
-__BODY__
+def run(cmd: list[str], cwd: Path, verbose: bool = True, env: dict[str, str] | None = None,
+        cancel: threading.Event | None = None, limits: Limits | None = None) -> None:
+    """
+    Run cmd and fail with its output on a non-zero exit. If `cancel` gets set
+    while it runs, the process is killed and CompileCancelled is raised; if it
+    outlives limits.timeout, it is killed and JobKilled is raised.
+    """
+    limits = limits or Limits(timeout=None, mem_bytes=None)
+    deadline = None if limits.timeout is None else time.monotonic() + limits.timeout
+    # Called from worker threads, so no preexec_fn: the command gets its own session
+    # (a kill reaches everything it spawned) and the memory limit is set right after start
+    with subprocess.Popen(cmd, cwd=str(cwd), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, text=True, env=env, start_new_session=True) as p:
+        limits.apply(p.pid)
+        while True:
+            wait = None if cancel is None else CANCEL_POLL
+            if deadline is not None:
+                wait = min(wait or limits.timeout, max(0.0, deadline - time.monotonic()))
+            try:
+                stdout, _ = p.communicate(timeout=wait)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    kill_group(p)
+                    p.communicate()
+                    raise CompileCancelled(f"Cancelled: {' '.join(cmd)}")
+                if deadline is not None and time.monotonic() >= deadline:
+                    kill_group(p)
+                    p.communicate()
+                    raise JobKilled(f"killed after {limits.timeout:g}s wall clock: {' '.join(cmd)}")
+    if verbose:
+        print(stdout)
+    if p.returncode != 0:
+        tail = "" if verbose else "\n" + "\n".join(stdout.splitlines()[-20:])
+        raise RuntimeError(f"Command failed: {' '.join(cmd)}{tail}")
 
-\end{document}
-""".strip() + "\n"
+def xelatex_version() -> str | None:
+    """
+    The xelatex version banner (part of the PDF cache key), or None if xelatex is missing.
+    """
+    try:
+        p = subprocess.run(["xelatex", "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+    except Exception:
+        return None
+    return p.stdout.splitlines()[0] if p.stdout else "xelatex"
 
-    return (
-        tex_template
-        .replace("__NAME__", name)
-        .replace("__HEADER__", header)
-        .replace("__BODY__", body)
-    )
+def check_xelatex() -> str:
+    """
+    Exit if xelatex is missing; otherwise return xelatex_version().
+    """
+    version = xelatex_version()
+    if version is None:
+        print("xelatex not found. Install TeX Live XeLaTeX, e.g.: sudo apt-get install texlive-xetex", file=sys.stderr)
+        sys.exit(2)
+    return version
 
+def _aux_state(aux: Path) -> bytes | None:
+    try:
+        return aux.read_bytes()
+    except FileNotFoundError:
+        return None
 
-def run(cmd: list[str], cwd: Path) -> None:
-    p = subprocess.run(cmd, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    print(p.stdout)
-    if p.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)}")
+def needs_rerun(tex: Path, aux_before: bytes | None) -> bool:
+    """
+    Decide from the previous pass' .log/.aux whether another xelatex pass is needed.
+    """
+    log = tex.with_suffix(".log")
+    try:
+        text = log.read_text(encoding="utf-8", errors="replace")
+    except FileNotFoundError:
+        text = ""
+    if RERUN_RE.search(text):
+        return True
+
+    aux_after = _aux_state(tex.with_suffix(".aux"))
+    if aux_after is None or aux_after == aux_before:
+        return False
+    if aux_before is None:
+        # First pass in a clean directory: only rerun if the aux carries something to resolve
+        return any(m in aux_after for m in AUX_REFS)
+    return True
+
+def latex_cmd(tex: Path, fmt_dir: Path | None = None) -> tuple[list[str], dict[str, str] | None]:
+    """
+    The xelatex command line (and environment) for compiling `tex` in its directory.
+    With fmt_dir, the precompiled preamble format in that directory is used.
+    """
+    cmd = ["xelatex", "-interaction=nonstopmode", "-halt-on-error", tex.name]
+    if fmt_dir is None:
+        return cmd, None
+    cmd.insert(1, f"-fmt={FMT_NAME}")
+    return cmd, format_env(fmt_dir)
+
+def run_latex(tex: Path, verbose: bool = True, max_passes: int = MAX_PASSES,
+              fmt_dir: Path | None = None, cancel: threading.Event | None = None,
+              limits: Limits | None = None) -> list[float]:
+    """
+    Run xelatex until references are stable (usually a single pass).
+    limits.timeout bounds all passes together. Returns the wall time of every pass.
+    """
+    cmd, env = latex_cmd(tex, fmt_dir)
+    limits = limits or Limits(timeout=None, mem_bytes=None)
+    deadline = None if limits.timeout is None else time.monotonic() + limits.timeout
+    aux = tex.with_suffix(".aux")
+    times: list[float] = []
+    while True:
+        before = _aux_state(aux)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        t0 = time.perf_counter()
+        try:
+            with span(f"pass {len(times) + 1}", "xelatex"):
+                run(cmd, cwd=tex.parent, verbose=verbose, env=env, cancel=cancel,
+                    limits=Limits(remaining, limits.mem_bytes))
+        except JobKilled:
+            raise JobKilled(f"killed after {limits.timeout:g}s wall clock (pass {len(times) + 1})") from None
+        times.append(time.perf_counter() - t0)
+        if len(times) >= max_passes or not needs_rerun(tex, before):
+            return times
+
+async def run_latex_async(tex: Path, limits: Limits, fmt_dir: Path | None = None,
+                          log: TextIO | None = None, echo: TextIO | None = None, prefix: str = "",
+                          max_passes: int = MAX_PASSES) -> list[float]:
+    """
+    run_latex() for the batch scheduler: output is streamed to `log`/`echo`
+    as it arrives and the job is killed when it exceeds `limits`.
+    """
+    cmd, env = latex_cmd(tex, fmt_dir)
+    deadline = None if limits.timeout is None else time.monotonic() + limits.timeout
+    aux = tex.with_suffix(".aux")
+    times: list[float] = []
+    while True:
+        before = _aux_state(aux)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        t0 = time.perf_counter()
+        try:
+            with span(f"pass {len(times) + 1}", "xelatex"):
+                await run_limited(cmd, tex.parent, Limits(remaining, limits.mem_bytes), env, log, echo, prefix)
+        except JobKilled:
+            raise JobKilled(f"killed after {limits.timeout:g}s wall clock (pass {len(times) + 1})") from None
+        times.append(time.perf_counter() - t0)
+        if len(times) >= max_passes or not needs_rerun(tex, before):
+            return times
+
+def fragment_cache(root: Path) -> FragmentCache:
+    return FragmentCache(root, kind="tex", salt=RENDERER_VERSION)
+
+def write_tex_doc(doc: Document, build_dir: Path, fragments: FragmentCache | Path | None = None,
+                  layout: Template = TEX_LAYOUT) -> Path:
+    if isinstance(fragments, Path):
+        fragments = fragment_cache(fragments)
+    build_dir.mkdir(parents=True, exist_ok=True)
+    tex = build_dir / TEX.name
+    source = latex_doc(doc, fragments, layout)
+    with span("write_tex", "io"):
+        tex.write_text(source, encoding="utf-8")
+    return tex
+
+def write_tex(content: Path, build_dir: Path, content_cache: Path | None = None,
+              fragments: FragmentCache | Path | None = None, layout: Template = TEX_LAYOUT) -> Path:
+    return write_tex_doc(load_document(content, content_cache), build_dir, fragments, layout)
+
+def _from_cache(tex: Path, out_pdf: Path, engine: str, cache: PdfCache | None, verbose: bool) -> tuple[str, bool]:
+    """
+    (cache key, hit). On a hit the cached PDF has already been copied to out_pdf.
+    """
+    out_pdf.parent.mkdir(parents=True, exist_ok=True)
+    if cache is None:
+        return "", False
+    with span("pdf_cache.get", "cache"):
+        key = cache_key(tex.read_text(encoding="utf-8"), TEX_TEMPLATE, engine, reproducible.epoch())
+        hit = cache.get(key)
+    timing.count("pdf cache hits" if hit else "pdf cache misses")
+    if hit is None:
+        return key, False
+    try:
+        _publish_file(hit, out_pdf, link=True)
+    except FileNotFoundError:
+        # Evicted by a concurrent job between get() and publishing: compile instead
+        return key, False
+    if verbose:
+        print(f"Reused cached PDF {hit.name}")
+    return key, True
+
+def _publish_file(src: Path, out_pdf: Path, link: bool) -> None:
+    with span("publish", "io"):
+        how = publish(src, out_pdf, link)
+    timing.count(f"publish {how}")
+
+def _publish(tex: Path, out_pdf: Path, key: str, cache: PdfCache | None) -> Path:
+    pdf = tex.with_suffix(".pdf")
+    if not pdf.exists():
+        raise FileNotFoundError(f"Expected PDF not found: {pdf}")
+    if reproducible.epoch() is not None:
+        with span("pin_id", "io"):
+            reproducible.pin_file(pdf)
+    if cache is None:
+        # xelatex rewrites the build PDF in place on the next run, so never hardlink it
+        _publish_file(pdf, out_pdf, link=False)
+    else:
+        entry = cache.put(key, pdf)
+        try:
+            _publish_file(entry, out_pdf, link=True)
+        except FileNotFoundError:
+            # Another job's eviction removed the entry; the build PDF is still here
+            _publish_file(pdf, out_pdf, link=False)
+    return out_pdf
+
+def _passes(times: list[float]) -> str:
+    per_pass = ", ".join(f"{t:.2f}s" for t in times)
+    return f"xelatex: {len(times)} pass{'es' if len(times) > 1 else ''} ({per_pass})"
+
+def compile_pdf(tex: Path, out_pdf: Path, verbose: bool = True,
+                engine: str = "", cache: PdfCache | None = None, fmt_dir: Path | None = None,
+                cancel: threading.Event | None = None, limits: Limits | None = None) -> Path:
+    key, hit = _from_cache(tex, out_pdf, engine, cache, verbose)
+    if hit:
+        return out_pdf
+
+    times = run_latex(tex, verbose=verbose, fmt_dir=fmt_dir, cancel=cancel, limits=limits)
+    if verbose:
+        print(_passes(times))
+    return _publish(tex, out_pdf, key, cache)
+
+async def compile_job(content: Path, out_pdf: Path, limits: Limits, verbose: bool = False,
+                      engine: str = "", cache: PdfCache | None = None, fmt_dir: Path | None = None,
+                      content_cache: Path | None = None, fragments: Path | None = None,
+                      layout: Template = TEX_LAYOUT, log_dir: Path = LOG_DIR) -> Path:
+    """
+    One batch job: render the .tex into a private temp directory and compile it
+    there under `limits`. xelatex output is streamed to log_dir/<stem>.log (and
+    to stderr, prefixed with the stem, when verbose); the log is kept either way.
+    """
+    with tempfile.TemporaryDirectory(prefix=f"cv-{content.stem}-") as tmp:
+        tex = await asyncio.to_thread(write_tex, content, Path(tmp), content_cache, fragments, layout)
+        return await compile_tex_job(tex, out_pdf, limits, content.stem, verbose, engine, cache, fmt_dir, log_dir)
 
-def main() -> None:
-    data = yaml.safe_load(CONTENT.read_text(encoding="utf-8"))
+async def compile_tex_job(tex: Path, out_pdf: Path, limits: Limits, label: str, verbose: bool = False,
+                          engine: str = "", cache: PdfCache | None = None, fmt_dir: Path | None = None,
+                          log_dir: Path = LOG_DIR) -> Path:
+    """
+    Compile an already written .tex (alone in its directory) under `limits`,
+    logging to log_dir/<label>.log.
+    """
+    key, hit = _from_cache(tex, out_pdf, engine, cache, verbose=False)
+    if hit:
+        return out_pdf
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_path = log_dir / f"{label}.log"
+    with open(log_path, "w", encoding="utf-8") as log:
+        try:
+            times = await run_latex_async(tex, limits, fmt_dir, log,
+                                          sys.stderr if verbose else None, f"[{label}] ")
+        except JobKilled as e:
+            raise JobKilled(f"{e} (log: {log_path})") from None
+    if verbose:
+        print(f"[{label}] {_passes(times)}")
+    return _publish(tex, out_pdf, key, cache)
+
+async def compile_all(files: list[Path], outs: list[Path], concurrency: int, limits: Limits,
+                      **kwargs: Any) -> list[JobResult]:
+    """
+    Compile every file with at most `concurrency` xelatex jobs alive at once.
+    Failures (including killed jobs) are reported per file, in input order.
+    """
+    jobs = [lambda f=f, out=out: compile_job(f, out, limits, **kwargs) for f, out in zip(files, outs)]
+    results = await bounded(jobs, concurrency)
+    return [
+        JobResult(f, error=f"{type(r).__name__}: {r}") if isinstance(r, Exception) else JobResult(f, r)
+        for f, r in zip(files, results)
+    ]
+
+def build(content: Path, out_pdf: Path, build_dir: Path, verbose: bool = True,
+          engine: str = "", cache: PdfCache | None = None, fmt_dir: Path | None = None,
+          content_cache: Path | None = None, fragments: Path | None = None, limits: Limits | None = None,
+          layout: Template = TEX_LAYOUT) -> Path:
+    return compile_pdf(write_tex(content, build_dir, content_cache, fragments, layout), out_pdf, verbose=verbose,
+                       engine=engine, cache=cache, fmt_dir=fmt_dir, limits=limits)
+
+def write_direct(doc: Document, out_pdf: Path, fonts: tuple[Path, Path] | None = None,
+                 limits: Limits | None = None) -> Path:
+    """
+    The python engine, or xelatex for a document its fonts cannot show
+    (e.g. non-Latin names with only the built-in Times fonts).
+    """
+    try:
+        return direct_pdf.write_pdf(doc, out_pdf, fonts)
+    except UnsupportedText as e:
+        engine = xelatex_version()
+        if engine is None:
+            raise ContentError(f"{e}; pass --font with a TrueType font that has these characters, or install xelatex") from None
+        print(f"python engine: {e}; falling back to xelatex", file=sys.stderr)
+    # A private build directory, as batch workers may fall back at the same time
+    with tempfile.TemporaryDirectory(prefix="cv-fallback-") as tmp:
+        return compile_pdf(write_tex_doc(doc, Path(tmp)), out_pdf, verbose=False, engine=engine, limits=limits)
+
+def build_direct(content: Path, out_pdf: Path, content_cache: Path | None = None,
+                 fonts: tuple[Path, Path] | None = None, limits: Limits | None = None) -> Path:
+    return write_direct(load_document(content, content_cache), out_pdf, fonts, limits)
+
+def fresh_digest(content: Path, engine: str = "", fmt_dir: Path | None = None,
+                 content_cache: Path | None = None, limits: Limits | None = None,
+                 layout: Template = TEX_LAYOUT, direct: bool = False,
+                 fonts: tuple[Path, Path] | None = None) -> str:
+    """
+    SHA-256 of the PDF for `content`, built from scratch in a temp directory
+    without the PDF cache.
+    """
+    with tempfile.TemporaryDirectory(prefix="cv-repro-") as tmp:
+        out = Path(tmp) / OUT_PDF.name
+        if direct:
+            build_direct(content, out, content_cache, fonts, limits)
+        else:
+            build(content, out, Path(tmp) / "build", verbose=False, engine=engine, fmt_dir=fmt_dir,
+                  content_cache=content_cache, limits=limits, layout=layout)
+        return file_hash(out)
+
+def check_reproducible(content: Path, *args: Any, **kwargs: Any) -> list[str]:
+    """
+    fresh_digest() twice, CLOCK_GAP seconds apart, so anything taken from
+    the clock shows up as a difference.
+    """
+    first = fresh_digest(content, *args, **kwargs)
+    time.sleep(CLOCK_GAP)
+    return [first, fresh_digest(content, *args, **kwargs)]
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+def serve(rfile: TextIO, wfile: TextIO, engine: str, cache: PdfCache | None, fmt_dir: Path | None,
+          content_cache: Path | None = None, limits: Limits | None = None, layout: Template = TEX_LAYOUT) -> None:
+    """
+    Compile-server loop. Reads one JSON job per line and answers with one JSON line:
 
-    TEX.write_text(latex_doc(data), encoding="utf-8")
-    print(f"Wrote {TEX}")
+      {"id": 1, "content": "people/alice.yml", "out": "site/alice/cv.pdf"}
+      {"id": 2, "tex": "\\documentclass...", "out": "/tmp/x.pdf"}
+      -> {"id": 1, "ok": true, "out": "...", "seconds": 0.41}
 
-    # Ensure xelatex exists
+    The interpreter, engine check, PDF cache and preamble format stay warm between jobs.
+    """
+    build_dir = BUILD_DIR / "serve"
+    build_dir.mkdir(parents=True, exist_ok=True)
+    for line in rfile:
+        if not line.strip():
+            continue
+        t0 = time.perf_counter()
+        reply: dict = {}
+        try:
+            job = json.loads(line)
+            reply["id"] = job.get("id")
+            if "tex" in job:
+                tex = build_dir / TEX.name
+                tex.write_text(job["tex"], encoding="utf-8")
+            else:
+                tex = write_tex(Path(job["content"]), build_dir, content_cache, layout=layout)
+            out = Path(job.get("out") or OUT_PDF)
+            compile_pdf(tex, out, verbose=False, engine=engine, cache=cache, fmt_dir=fmt_dir, limits=limits)
+            reply.update(ok=True, out=str(out))
+        except Exception as e:
+            reply.update(ok=False, error=f"{type(e).__name__}: {e}")
+        reply["seconds"] = round(time.perf_counter() - t0, 4)
+        wfile.write(json.dumps(reply) + "\n")
+        wfile.flush()
+
+def serve_socket(path: Path, engine: str, cache: PdfCache | None, fmt_dir: Path | None,
+                 content_cache: Path | None = None, limits: Limits | None = None,
+                 layout: Template = TEX_LAYOUT) -> None:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            rfile = io.TextIOWrapper(self.rfile, encoding="utf-8")
+            wfile = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+            serve(rfile, wfile, engine, cache, fmt_dir, content_cache, limits, layout)
+
+    path.unlink(missing_ok=True)
+    # Jobs share BUILD_DIR/serve, so connections are handled one at a time
+    with socketserver.UnixStreamServer(str(path), Handler) as srv:
+        print(f"Compile server listening on {path}", file=sys.stderr)
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Render content YAML into a LaTeX/PDF resume.")
+    ap.add_argument("inputs", nargs="*",
+                    help="content files, directories or glob patterns (default: content.yml)")
+    ap.add_argument("-o", "--out", default=None,
+                    help="output path pattern, e.g. 'site/{stem}/cv.pdf' "
+                         "(default: site/cv.pdf, or site/{stem}/cv.pdf in batch mode)")
+    ap.add_argument("-j", "--workers", type=int, default=1,
+                    help="concurrent xelatex jobs for batch mode (0 = all cores, default: 1)")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                    help="kill an xelatex job after this many seconds, all passes included (0 = never, default: %(default)g)")
+    ap.add_argument("--mem-limit-mb", type=int, default=DEFAULT_MEM_MB,
+                    help="address-space limit per xelatex process, POSIX only (0 = none, default: %(default)d)")
+    ap.add_argument("--fragment-cache", nargs="?", type=Path, const=FRAGMENT_DIR, default=None, metavar="DIR",
+                    help=f"reuse rendered sections whose input is unchanged (default dir: {FRAGMENT_DIR.relative_to(ROOT)})")
+    ap.add_argument("--content-cache", nargs="?", type=Path, const=CONTENT_CACHE_DIR, default=None, metavar="DIR",
+                    help=f"reuse parsed YAML for unchanged files (default dir: {CONTENT_CACHE_DIR.relative_to(ROOT)})")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="always run xelatex, ignoring the compiled-PDF cache")
+    ap.add_argument("--cache-dir", type=Path, default=CACHE_DIR,
+                    help=f"compiled-PDF cache directory (default: {CACHE_DIR.relative_to(ROOT)})")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                    help="evict least recently used cache entries beyond this size (default: %(default)g)")
+    ap.add_argument("--fmt", action="store_true",
+                    help="precompile the fixed preamble into an xelatex format and reuse it")
+    ap.add_argument("--template", type=Path, default=None, metavar="FILE",
+                    help="LaTeX layout with __NAME__, __HEADER__ and __BODY__ slots (default: built-in)")
+    ap.add_argument("--engine", choices=("xelatex", "python"), default="xelatex",
+                    help="xelatex, or python: write the PDF in-process, no TeX needed; text its fonts cannot show "
+                         "falls back to xelatex (default: %(default)s)")
+    ap.add_argument("--font", type=Path, default=None, metavar="TTF",
+                    help="with --engine python, embed this TrueType font (default: a serif found on the system, "
+                         "else the built-in Times)")
+    ap.add_argument("--bold-font", type=Path, default=None, metavar="TTF",
+                    help="the bold TrueType font to go with --font")
+    ap.add_argument("--reproducible", action="store_true",
+                    help="pin the PDF dates and /ID (SOURCE_DATE_EPOCH, default: last commit time)")
+    ap.add_argument("--check-reproducible", action="store_true",
+                    help="build content.yml twice reproducibly and fail if the PDFs differ")
+    ap.add_argument("--serve", nargs="?", const="-", default=None, metavar="SOCKET",
+                    help="run as a compile server reading JSON jobs from stdin, or from a Unix socket path")
+    ap.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE.json",
+                    help="print a per-stage timing breakdown; with a path, also write a Chrome trace")
+    args = ap.parse_args(argv)
+    if args.engine == "python" and (args.serve or args.fmt or args.template):
+        ap.error("--serve, --fmt and --template need --engine xelatex")
+    if (args.font is None) != (args.bold_font is None):
+        ap.error("--font and --bold-font go together")
+    if args.font and args.engine != "python":
+        ap.error("--font needs --engine python")
+    fonts = (args.font, args.bold_font) if args.font else None
+    if args.check_reproducible and (args.inputs or args.serve):
+        ap.error("--check-reproducible builds content.yml only")
+    if args.reproducible or args.check_reproducible:
+        try:
+            epoch = reproducible.enable()
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+        print(f"Reproducible build: {reproducible.ENV}={epoch}")
+    if args.profile is not None:
+        timing.enable(Path(args.profile) if args.profile else None)
+
+    cache = None if args.no_cache else PdfCache(args.cache_dir, int(args.cache_max_mb * 2**20))
+    limits = Limits(args.timeout or None, args.mem_limit_mb * 2**20 or None)
     try:
-        subprocess.run(["xelatex", "--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-    except Exception:
-        print("xelatex not found. Install TeX Live XeLaTeX, e.g.: sudo apt-get install texlive-xetex", file=sys.stderr)
+        layout = load_layout(args.template)
+        if args.fmt:
+            split_preamble(layout.source)
+    except TemplateError as e:
+        print(e, file=sys.stderr)
         sys.exit(2)
 
-    # Compile twice for stable references
-    run(["xelatex", "-interaction=nonstopmode", "-halt-on-error", TEX.name], cwd=BUILD_DIR)
-    run(["xelatex", "-interaction=nonstopmode", "-halt-on-error", TEX.name], cwd=BUILD_DIR)
-
-    if not PDF.exists():
-        print(f"Expected PDF not found: {PDF}", file=sys.stderr)
-        sys.exit(3)
+    if args.serve:
+        engine = check_xelatex()
+        fmt_dir = ensure_format(layout.source, engine, verbose=False) if args.fmt else None
+        if args.serve == "-":
+            serve(sys.stdin, sys.stdout, engine, cache, fmt_dir, args.content_cache, limits, layout)
+        else:
+            serve_socket(Path(args.serve), engine, cache, fmt_dir, args.content_cache, limits, layout)
+        return
+
+    if args.check_reproducible:
+        engine = "" if args.engine == "python" else check_xelatex()
+        fmt_dir = ensure_format(layout.source, engine) if args.fmt else None
+        try:
+            digests = check_reproducible(CONTENT, engine, fmt_dir, args.content_cache, limits, layout,
+                                         direct=args.engine == "python", fonts=fonts)
+        except (ContentError, FontError) as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+        except (FileNotFoundError, JobKilled) as e:
+            print(e, file=sys.stderr)
+            sys.exit(3)
+        for i, digest in enumerate(digests, 1):
+            print(f"build {i}: sha256 {digest}")
+        if len(set(digests)) > 1:
+            print("PDF output is not reproducible", file=sys.stderr)
+            sys.exit(1)
+        print("PDF output is reproducible")
+        return
+
+    if not args.inputs:
+        out = output_path(CONTENT, args.out) if args.out else OUT_PDF
+        if args.engine == "python":
+            try:
+                build_direct(CONTENT, out, args.content_cache, fonts, limits)
+            except (ContentError, FontError) as e:
+                print(e, file=sys.stderr)
+                sys.exit(2)
+            except JobKilled as e:
+                print(f"xelatex {e}", file=sys.stderr)
+                sys.exit(4)
+            except FileNotFoundError as e:
+                print(e, file=sys.stderr)
+                sys.exit(3)
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+            print(f"Wrote {out}")
+            return
+        fragments = fragment_cache(args.fragment_cache) if args.fragment_cache else None
+        try:
+            tex = write_tex(CONTENT, BUILD_DIR, args.content_cache, fragments, layout)
+        except ContentError as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+        print(f"Wrote {tex}")
+        if fragments is not None:
+            print(fragments.summary())
+        engine = check_xelatex()
+        fmt_dir = ensure_format(layout.source, engine) if args.fmt else None
+        try:
+            compile_pdf(tex, out, engine=engine, cache=cache, fmt_dir=fmt_dir, limits=limits)
+        except FileNotFoundError as e:
+            print(e, file=sys.stderr)
+            sys.exit(3)
+        except JobKilled as e:
+            print(f"xelatex {e}", file=sys.stderr)
+            sys.exit(4)
+        print(f"Wrote {out}")
+        return
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No content files to render.", file=sys.stderr)
+        sys.exit(2)
 
-    OUT_PDF.write_bytes(PDF.read_bytes())
-    print(f"Wrote {OUT_PDF}")
+    pattern = args.out or str(OUT_DIR / "{stem}" / "cv.pdf")
+    outs = [output_path(f, pattern) for f in files]
+    check_unique(outs, pattern)
+    # Invalid files fail on their own, before any xelatex starts; the rest still build
+    t0 = time.perf_counter()
+    invalid = file_problems(files, args.content_cache)
+    rejected = {f: JobResult(f, error=f"{len(lines)} problem(s)\n" + "\n".join(lines)) for f, lines in invalid.items()}
+    valid = [(f, out) for f, out in zip(files, outs) if f not in invalid]
+    workers = args.workers or default_workers()
+    verb = "Rendered" if args.engine == "python" else "Compiled"
+    if not valid:
+        results = []
+    elif args.engine == "python":
+        results = run_jobs(build_direct, [(f, (out, args.content_cache, fonts, limits)) for f, out in valid], workers)
+    else:
+        engine = check_xelatex()
+        fmt_dir = ensure_format(layout.source, engine) if args.fmt else None
+        results = asyncio.run(compile_all([f for f, _ in valid], [out for _, out in valid], workers, limits,
+                                          engine=engine, cache=cache, fmt_dir=fmt_dir,
+                                          content_cache=args.content_cache, fragments=args.fragment_cache,
+                                          layout=layout))
+    built = {r.source: r for r in results}
+    results = [rejected.get(f) or built[f] for f in files]
+    if report(results, time.perf_counter() - t0, verb=verb):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -2,20 +2,31 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Callable, Iterator, TextIO
+import argparse
 import html
+import io
+import re
 import sys
+import time
 
-try:
-    import yaml  # type: ignore
-except Exception:
-    print("Missing dependency: PyYAML. Install with: pip install pyyaml", file=sys.stderr)
-    raise
+from batch import check_unique, collect_inputs, default_workers, output_path, report, run_jobs
+from loader import CONTENT_CACHE_DIR
+from fragments import FRAGMENT_DIR, SHARED_SOURCES, FragmentCache, source_hash
+from model import ContentError, Document, Experience, load_document
+from names import name_matcher
+from templates import Template, TemplateError, compile_template, load_template
+from timing import span
+import timing
 
 ROOT = Path(__file__).resolve().parents[1]
 CONTENT = ROOT / "content.yml"
 OUT_DIR = ROOT / "site"
 OUT_HTML = OUT_DIR / "index.html"
+WRITE_BUFFER = 1 << 16
+RENDERER_VERSION = source_hash(__file__, *SHARED_SOURCES)
 
 DEFAULT_CSS = """
 :root { --maxw: 900px; }
@@ -56,26 +67,53 @@ hr { border: 0; border-top: 1px solid #ddd; margin: 18px 0 22px; }
 .small { font-size: 13px; color: #333; }
 """
 
+HTML_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8"/>
+  <meta name="viewport" content="width=device-width, initial-scale=1"/>
+  <title>__TITLE__ | Resume</title>
+  __STYLES__
+</head>
+<body>
+  <div class="container">
+    __BODY__
+  </div>
+</body>
+</html>
+"""
+HTML_LAYOUT = compile_template(HTML_TEMPLATE, "index.html")
+# Slots a user template may use; __BODY__ is the rendered sections, __STYLES__
+# the <style> element (or the <link> to the bundled stylesheet) and __CSS__ the bare CSS
+HTML_SLOTS = ("TITLE", "NAME", "CSS", "STYLES", "BODY")
+
+_HTML_SPECIAL_RE = re.compile(r"[&<>\"']")
+
+@lru_cache(maxsize=1 << 14)
 def h(s: str) -> str:
+    if _HTML_SPECIAL_RE.search(s) is None:
+        return s
     return html.escape(s, quote=True)
 
+def _escape_counts() -> dict[str, int]:
+    ci = h.cache_info()
+    return {"h() calls": ci.hits + ci.misses, "h() distinct strings": ci.misses}
+
+timing.collect(_escape_counts)
+
 def join_with_sep(items: list[str], sep: str = " | ") -> str:
     items = [x for x in items if x]
     return sep.join(items)
 
-def render_header(data: dict) -> str:
-    name = h(data.get("name", ""))
-    location = h(data.get("location", ""))
-
-    emails = data.get("email", []) or []
-    phones = data.get("phone", []) or []
-    links = data.get("links", {}) or {}
+def render_header(doc: Document) -> Iterator[str]:
+    name = h(doc.name)
+    location = h(doc.location)
 
-    email_html = join_with_sep([f'<a href="mailto:{h(e)}">{h(e)}</a>' for e in emails])
-    phone_html = join_with_sep([h(p) for p in phones])
+    email_html = join_with_sep([f'<a href="mailto:{h(e)}">{h(e)}</a>' for e in doc.email])
+    phone_html = join_with_sep([h(p) for p in doc.phone])
 
-    website = links.get("website", "")
-    pdf = links.get("pdf", "")
+    website = doc.website
+    pdf = doc.pdf
 
     link_html_parts = []
     if website:
@@ -96,31 +134,30 @@ def render_header(data: dict) -> str:
 
     meta = "<br/>".join(lines)
 
-    return f"""
+    yield f"""
     <div class="header">
       <h1 class="name">{name}</h1>
       <div class="meta">{meta}</div>
     </div>
     """
 
-def render_education(data: dict) -> str:
-    items = data.get("education", []) or []
-    if not items:
-        return ""
-
-    out = ['<div class="section"><h2>Education</h2>']
-    for ed in items:
-        inst = h(ed.get("institution", ""))
-        loc = h(ed.get("location", ""))
-        degree = h(ed.get("degree", ""))
-        dept = h(ed.get("department", ""))
-        period = h(ed.get("period", ""))
-        #gpa = h(ed.get("gpa", ""))
-        area = h(ed.get("Research Area", ""))
-        advisor = h(ed.get("Advisor", ""))
-
-        out.append('<div class="item">')
-        out.append(f'<div class="row"><div class="title">{inst}</div><div class="period">{period}</div></div>')
+def render_education(doc: Document) -> Iterator[str]:
+    if not doc.education:
+        return
+
+    yield '<div class="section"><h2>Education</h2>'
+    for ed in doc.education:
+        inst = h(ed.institution)
+        loc = h(ed.location)
+        degree = h(ed.degree)
+        dept = h(ed.department)
+        period = h(ed.period)
+        #gpa = h(ed.gpa)
+        area = h(ed.research_area)
+        advisor = h(ed.advisor)
+
+        yield '<div class="item">'
+        yield f'<div class="row"><div class="title">{inst}</div><div class="period">{period}</div></div>'
         subparts = []
         if degree:
             subparts.append(f"<div><b>{degree}</b></div>")
@@ -134,44 +171,42 @@ def render_education(data: dict) -> str:
         #     subparts.append(f"<div><b>Advisor:</b> {advisor}</div>")
 
         if subparts:
-            out.append(f'<div class="sub">{"".join(subparts)}</div>')
+            yield f'<div class="sub">{"".join(subparts)}</div>'
 
         if area:
-            out.append(f"<div><b>Research Area:</b> {area}</div>")
+            yield f"<div><b>Research Area:</b> {area}</div>"
         if advisor:
-            out.append(f"<div><b>Advisor:</b> {advisor}</div>")
+            yield f"<div><b>Advisor:</b> {advisor}</div>"
 
         # if project_title:
-        #     out.append("<div class='sub'><b>Project:</b> " + project_title + "</div>")
-
-        out.append("</div>")
-    out.append("</div>")
-    return "\n".join(out)
-
-def render_publications(data: dict) -> str:
-    pubs = data.get("publications", []) or []
-    if not pubs:
-        return ""
-
-    out = ['<div class="section"><h2>Publications</h2>']
-    out.append("<ol>")
-    for p in pubs:
-        title = h(p.get("title", ""))
-        authors = p.get("authors", []) or []
-        authors_html = ", ".join(h(a) for a in authors)
-
-        venue = h(p.get("venue", ""))
-        year = p.get("year", "")
-        note = h(p.get("note", "")) if p.get("note", "") else ""
-        vol = h(p.get("volume", "")) if p.get("volume", "") else ""
-        pages = h(p.get("pages", "")) if p.get("pages", "") else ""
-        doi = h(p.get("doi", "")) if p.get("doi", "") else ""
+        #     yield "<div class='sub'><b>Project:</b> " + project_title + "</div>"
+
+        yield "</div>"
+    yield "</div>"
+
+def render_publications(doc: Document) -> Iterator[str]:
+    if not doc.publications:
+        return
+
+    me = name_matcher(doc)
+    yield '<div class="section"><h2>Publications</h2>'
+    yield "<ol>"
+    for p in doc.publications:
+        title = h(p.title)
+        authors_html = ", ".join(f"<b>{h(a)}</b>" if me(a) else h(a) for a in p.authors)
+
+        venue = h(p.venue)
+        year = p.year
+        note = h(p.note) if p.note else ""
+        vol = h(p.volume) if p.volume else ""
+        pages = h(p.pages) if p.pages else ""
+        doi = h(p.doi) if p.doi else ""
 
         tail = []
         if venue:
             tail.append(venue)
         if year:
-            tail.append(str(year))
+            tail.append(year)
         if vol:
             tail.append(f"Vol. {vol}")
         if pages:
@@ -184,176 +219,257 @@ def render_publications(data: dict) -> str:
         if doi:
             extra.append(f'DOI: <a href="https://doi.org/{doi}">{doi}</a>')
 
-        out.append("<li>")
-        out.append(f"<div><b>{title}</b></div>")
-        out.append(f"<div class='small'>{authors_html}</div>")
+        yield "<li>"
+        yield f"<div><b>{title}</b></div>"
+        yield f"<div class='small'>{authors_html}</div>"
         if meta:
-            out.append(f"<div class='small'><b>{meta}</b></div>")
+            yield f"<div class='small'><b>{meta}</b></div>"
         if extra:
-            out.append(f"<div class='small'>{' '.join(extra)}</div>")
-        out.append("</li>")
-    out.append("</ol></div>")
-    return "\n".join(out)
-
-def render_experience(data: dict) -> str:
-    exp = data.get("experience", []) or []
-    if not exp:
-        return ""
-
-    out = ['<div class="section"><h2>Research &amp; Experience</h2>']
-    for e in exp:
-        org = h(e.get("organization", ""))
-        role = h(e.get("role", ""))
-        period = h(e.get("period", ""))
-        details = e.get("details", []) or []
-
-        out.append('<div class="item">')
-        out.append(f'<div class="row"><div class="title">{org}</div><div class="period">{period}</div></div>')
+            yield f"<div class='small'>{' '.join(extra)}</div>"
+        yield "</li>"
+    yield "</ol></div>"
+
+def render_jobs(title: str, jobs: list[Experience]) -> Iterator[str]:
+    if not jobs:
+        return
+
+    yield f'<div class="section"><h2>{h(title)}</h2>'
+    for e in jobs:
+        org = h(e.organization)
+        role = h(e.role)
+        period = h(e.period)
+
+        yield '<div class="item">'
+        yield f'<div class="row"><div class="title">{org}</div><div class="period">{period}</div></div>'
         if role:
-            out.append(f'<div class="sub"><b>{role}</b></div>')
-        if details:
-            out.append("<ul>")
-            for d in details:
-                out.append(f"<li>{h(d)}</li>")
-            out.append("</ul>")
-        out.append("</div>")
-    out.append("</div>")
-    return "\n".join(out)
-
-def render_list_section(title: str, items: list[str]) -> str:
+            yield f'<div class="sub"><b>{role}</b></div>'
+        if e.details:
+            yield "<ul>"
+            for d in e.details:
+                yield f"<li>{h(d)}</li>"
+            yield "</ul>"
+        yield "</div>"
+    yield "</div>"
+
+def render_experience(doc: Document) -> Iterator[str]:
+    return render_jobs("Research & Experience", doc.experience)
+
+def render_list_section(title: str, items: list[str]) -> Iterator[str]:
     if not items:
-        return ""
-    out = [f'<div class="section"><h2>{h(title)}</h2><ul>']
+        return
+    yield f'<div class="section"><h2>{h(title)}</h2><ul>'
     for it in items:
-        out.append(f"<li>{h(it)}</li>")
-    out.append("</ul></div>")
-    return "\n".join(out)
-
-def render_industry(data: dict) -> str:
-    inds = data.get("industry_experience", []) or []
-    if not inds:
-        return ""
-
-    out = ['<div class="section"><h2>Industry Experience</h2>']
-    for e in inds:
-        org = h(e.get("organization", ""))
-        role = h(e.get("role", ""))
-        period = h(e.get("period", ""))
-        details = e.get("details", []) or []
-        out.append('<div class="item">')
-        out.append(f'<div class="row"><div class="title">{org}</div><div class="period">{period}</div></div>')
-        if role:
-            out.append(f'<div class="sub"><b>{role}</b></div>')
-        if details:
-            out.append("<ul>")
-            for d in details:
-                out.append(f"<li>{h(d)}</li>")
-            out.append("</ul>")
-        out.append("</div>")
-    out.append("</div>")
-    return "\n".join(out)
-
-def render_funded_projects(data: dict) -> str:
-    fps = data.get("funded_projects", []) or []
-    if not fps:
-        return ""
-
-    out = ['<div class="section"><h2>Funded Projects</h2><ul>']
-    for fp in fps:
-        sponsor = h(fp.get("sponsor", ""))
-        title = h(fp.get("title", ""))
-        projects = fp.get("projects", []) or []
+        yield f"<li>{h(it)}</li>"
+    yield "</ul></div>"
+
+def render_industry(doc: Document) -> Iterator[str]:
+    return render_jobs("Industry Experience", doc.industry_experience)
+
+def render_funded_projects(doc: Document) -> Iterator[str]:
+    if not doc.funded_projects:
+        return
+
+    yield '<div class="section"><h2>Funded Projects</h2><ul>'
+    for fp in doc.funded_projects:
+        sponsor = h(fp.sponsor)
+        title = h(fp.title)
         if title:
-            out.append(f"<li><b>{sponsor}</b> — {title}</li>")
+            yield f"<li><b>{sponsor}</b> — {title}</li>"
         else:
             # sponsor with sub-project list
-            out.append(f"<li><b>{sponsor}</b>")
-            if projects:
-                out.append("<ul>")
-                for p in projects:
-                    out.append(f"<li>{h(p)}</li>")
-                out.append("</ul>")
-            out.append("</li>")
-    out.append("</ul></div>")
-    return "\n".join(out)
-
-def render_skills(data: dict) -> str:
-    skills = data.get("skills", {}) or {}
-    if not skills:
-        return ""
-
-    out = ['<div class="section"><h2>Skills</h2>']
-    for k, arr in skills.items():
+            yield f"<li><b>{sponsor}</b>"
+            if fp.projects:
+                yield "<ul>"
+                for p in fp.projects:
+                    yield f"<li>{h(p)}</li>"
+                yield "</ul>"
+            yield "</li>"
+    yield "</ul></div>"
+
+def render_skills(doc: Document) -> Iterator[str]:
+    if not doc.skills:
+        return
+
+    yield '<div class="section"><h2>Skills</h2>'
+    for k, vals in doc.skills.items():
         title = k.replace("_", " ").title()
-        vals = arr or []
         if not vals:
             continue
-        out.append(f"<div class='item'><div class='title'>{h(title)}</div>")
-        out.append("<ul>")
+        yield f"<div class='item'><div class='title'>{h(title)}</div>"
+        yield "<ul>"
         for v in vals:
-            out.append(f"<li>{h(v)}</li>")
-        out.append("</ul></div>")
-    out.append("</div>")
-    return "\n".join(out)
-
-def render_references(data: dict) -> str:
-    refs = data.get("references", []) or []
-    if not refs:
-        return ""
-
-    out = ['<div class="section"><h2>References</h2>']
-    for r in refs:
-        name = h(r.get("name", ""))
-        title = h(r.get("title", ""))
-        aff = h(r.get("affiliation", ""))
-        email = h(r.get("email", ""))
-        out.append("<div class='item'>")
-        out.append(f"<div class='title'>{name}</div>")
+            yield f"<li>{h(v)}</li>"
+        yield "</ul></div>"
+    yield "</div>"
+
+def render_references(doc: Document) -> Iterator[str]:
+    if not doc.references:
+        return
+
+    yield '<div class="section"><h2>References</h2>'
+    for r in doc.references:
+        name = h(r.name)
+        title = h(r.title)
+        aff = h(r.affiliation)
+        email = h(r.email)
+        yield "<div class='item'>"
+        yield f"<div class='title'>{name}</div>"
         sub = " — ".join([x for x in [title, aff] if x])
         if sub:
-            out.append(f"<div class='small'>{sub}</div>")
+            yield f"<div class='small'>{sub}</div>"
         if email:
-            out.append(f"<div class='small'>Email: <a href='mailto:{email}'>{email}</a></div>")
-        out.append("</div>")
-    out.append("</div>")
-    return "\n".join(out)
-
-def main() -> None:
-    data = yaml.safe_load(CONTENT.read_text(encoding="utf-8"))
-
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    body_parts = [
-        render_header(data),
-        "<hr/>",
-        render_education(data),
-        render_publications(data),
-        render_experience(data),
-        render_funded_projects(data),
-        render_industry(data),
-        render_list_section("Honors & Awards", data.get("honors_awards", []) or []),
-        #render_skills(data),
-        render_references(data),
+            yield f"<div class='small'>Email: <a href='mailto:{email}'>{email}</a></div>"
+        yield "</div>"
+    yield "</div>"
+
+def section_specs(doc: Document) -> list[tuple[str, Any, Callable[[], Iterator[str]]]]:
+    """
+    (name, input data, renderer) for every section in page order: the header,
+    then the body sections listed in doc.sections.
+    The input data is what the fragment cache hashes.
+    """
+    header = (doc.name, doc.location, doc.email, doc.phone, doc.website, doc.pdf)
+    specs = {spec[0]: spec for spec in [
+        ("education", doc.education, lambda: render_education(doc)),
+        ("publications", (doc.publications, doc.highlight_names, doc.name), lambda: render_publications(doc)),
+        ("experience", doc.experience, lambda: render_experience(doc)),
+        ("funded_projects", doc.funded_projects, lambda: render_funded_projects(doc)),
+        ("industry_experience", doc.industry_experience, lambda: render_industry(doc)),
+        ("honors_awards", doc.honors_awards, lambda: render_list_section("Honors & Awards", doc.honors_awards)),
+        ("skills", doc.skills, lambda: render_skills(doc)),
+        ("references", doc.references, lambda: render_references(doc)),
+    ]}
+    return [
+        ("header", header, lambda: render_header(doc)),
+        ("rule", None, lambda: iter(["<hr/>"])),
+        *(specs[name] for name in doc.sections),
     ]
-    body = "\n".join([p for p in body_parts if p])
 
-    html_doc = f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8"/>
-  <meta name="viewport" content="width=device-width, initial-scale=1"/>
-  <title>{h(data.get("name","Resume"))} | Resume</title>
-  <style>{DEFAULT_CSS}</style>
-</head>
-<body>
-  <div class="container">
-    {body}
-  </div>
-</body>
-</html>
-"""
-    OUT_HTML.write_text(html_doc, encoding="utf-8")
-    print(f"Wrote {OUT_HTML}")
+def sections(doc: Document, fragments: FragmentCache | None = None) -> list[tuple[str, Iterator[str]]]:
+    """
+    (name, lines) per section; the lines are rendered lazily while iterating.
+    """
+    specs = section_specs(doc)
+    if fragments is None:
+        return [(name, render()) for name, _, render in specs]
+    out = []
+    for name, value, render in specs:
+        if value is None:
+            # Static markup, nothing worth caching
+            out.append((name, render()))
+            continue
+        with span(name, "web fragments"):
+            text = fragments.get(name, value, render)
+        out.append((name, iter([text] if text else [])))
+    return out
+
+def body(doc: Document, fragments: FragmentCache | None = None) -> Iterator[str]:
+    sep = ""
+    for name, section in sections(doc, fragments):
+        with span(name, "web"):
+            for frag in section:
+                yield sep
+                yield frag
+                sep = "\n"
+
+def write_html(doc: Document, out: TextIO, fragments: FragmentCache | None = None,
+               layout: Template = HTML_LAYOUT, css: str = DEFAULT_CSS, styles: str | None = None) -> None:
+    """
+    Stream the page into `out` (a file, stdout, socket file, ...) fragment by
+    fragment, without building the document in memory. Each render_* yields
+    the lines of one section, nothing if the section is empty; lines are
+    separated by newlines. With `fragments`, unchanged sections come from the
+    fragment cache instead of being re-rendered. `styles` replaces the
+    inline <style> element, e.g. with a <link> to an external stylesheet.
+    """
+    if styles is None:
+        styles = f"<style>{css}</style>"
+    layout.write(out, TITLE=h(doc.name or "Resume"), NAME=h(doc.name), CSS=css, STYLES=styles,
+                 BODY=body(doc, fragments))
+
+def render_html(doc: Document, fragments: FragmentCache | None = None, layout: Template = HTML_LAYOUT,
+                css: str = DEFAULT_CSS, styles: str | None = None) -> str:
+    buf = io.StringIO()
+    write_html(doc, buf, fragments, layout, css, styles)
+    return buf.getvalue()
+
+def fragment_cache(root: Path) -> FragmentCache:
+    return FragmentCache(root, kind="web", salt=RENDERER_VERSION)
+
+def load_layout(path: Path | None) -> Template:
+    """
+    The built-in layout, or a user template file using the HTML_SLOTS.
+    """
+    if path is None:
+        return HTML_LAYOUT
+    return load_template(path, HTML_SLOTS, required=("BODY",))
+
+def build(content: Path, out_html: Path, content_cache: Path | None = None,
+          fragments: FragmentCache | Path | None = None, layout: Template = HTML_LAYOUT) -> Path:
+    doc = load_document(content, content_cache)
+    if isinstance(fragments, Path):
+        fragments = fragment_cache(fragments)
+    out_html.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_html, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        write_html(doc, f, fragments, layout)
+    return out_html
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Render content YAML into a static HTML resume.")
+    ap.add_argument("inputs", nargs="*",
+                    help="content files, directories or glob patterns (default: content.yml)")
+    ap.add_argument("-o", "--out", default=None,
+                    help="output path pattern, e.g. 'site/{stem}/index.html', or '-' for stdout "
+                         "(default: site/index.html, or site/{stem}/index.html in batch mode)")
+    ap.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes for batch mode (0 = all cores, default: 1)")
+    ap.add_argument("--fragment-cache", nargs="?", type=Path, const=FRAGMENT_DIR, default=None, metavar="DIR",
+                    help=f"reuse rendered sections whose input is unchanged (default dir: {FRAGMENT_DIR.relative_to(ROOT)})")
+    ap.add_argument("--content-cache", nargs="?", type=Path, const=CONTENT_CACHE_DIR, default=None, metavar="DIR",
+                    help=f"reuse parsed YAML for unchanged files (default dir: {CONTENT_CACHE_DIR.relative_to(ROOT)})")
+    ap.add_argument("--template", type=Path, default=None, metavar="FILE",
+                    help="HTML layout with __TITLE__, __NAME__, __CSS__, __STYLES__ and __BODY__ slots (default: built-in)")
+    ap.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE.json",
+                    help="print a per-stage timing breakdown; with a path, also write a Chrome trace")
+    args = ap.parse_args(argv)
+    if args.profile is not None:
+        timing.enable(Path(args.profile) if args.profile else None)
+    try:
+        layout = load_layout(args.template)
+    except TemplateError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+    if not args.inputs:
+        fragments = fragment_cache(args.fragment_cache) if args.fragment_cache else None
+        try:
+            if args.out == "-":
+                write_html(load_document(CONTENT, args.content_cache), sys.stdout, fragments, layout)
+                return
+            out = output_path(CONTENT, args.out) if args.out else OUT_HTML
+            print(f"Wrote {build(CONTENT, out, args.content_cache, fragments, layout)}")
+        except ContentError as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+        if fragments is not None:
+            print(fragments.summary())
+        return
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No content files to render.", file=sys.stderr)
+        sys.exit(2)
+
+    pattern = args.out or str(OUT_DIR / "{stem}" / "index.html")
+    outs = [output_path(f, pattern) for f in files]
+    check_unique(outs, pattern)
+
+    workers = args.workers or default_workers()
+    t0 = time.perf_counter()
+    results = run_jobs(build, [(f, (out, args.content_cache, args.fragment_cache, layout))
+                                    for f, out in zip(files, outs)], workers)
+    if report(results, time.perf_counter() - t0):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
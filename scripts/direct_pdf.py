@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TeX-free PDF engine: sets the latex_doc() layout straight into a PDF.
+
+The page follows cv.tex: letter paper with 0.75in margins, 10pt serif, the
+centered name and contact lines, upper-case section titles over a rule,
+bold institution/organization rows with the period pushed right (\\hfill),
+bullet and numbered lists, bold self-names in author lists and clickable
+links. Lines are broken greedily and justified like TeX's paragraphs,
+without hyphenation; everything runs in-process in a few milliseconds.
+
+Text is set in an embedded subset of a TrueType serif: the --font/--bold-font
+files, else the first of FONT_FILES found in FONT_DIRS. Without one, the
+built-in Times fonts are used, which only cover WinAnsi; text a font cannot
+show raises UnsupportedText (build_pdf.write_direct() then uses xelatex).
+
+Select it with --engine python in build_pdf.py or build.py.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable
+import os
+import re
+
+from model import Document, Experience, load_document
+from names import NameMatcher, name_matcher
+from pdfwriter import LETTER, EmbeddedFont, Font, Page, PdfWriter, StandardFont, UnsupportedText
+from publish import publish_bytes
+import reproducible
+from timing import span
+import timing
+import ttf
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MARGIN = 54.0               # 0.75in
+SIZE = 10.0
+LEADING = 12.0
+PARSKIP = 3.0
+NAME_SIZE = 17.28           # \LARGE at 10pt
+NAME_LEADING = 22.0
+LABEL_SEP = 5.0
+RULE = 0.4
+ASCENT = 0.78               # of the font size, above the baseline
+
+# (regular, bold) TrueType serifs to embed, in order of preference. Liberation
+# Serif and Tinos have the metrics of Times, so lines break as with cv.tex.
+FONT_FILES = [
+    ("LiberationSerif-Regular.ttf", "LiberationSerif-Bold.ttf"),
+    ("Tinos-Regular.ttf", "Tinos-Bold.ttf"),
+    ("DejaVuSerif.ttf", "DejaVuSerif-Bold.ttf"),
+    ("NotoSerif-Regular.ttf", "NotoSerif-Bold.ttf"),
+    ("FreeSerif.ttf", "FreeSerifBold.ttf"),
+]
+FONT_DIRS = [
+    ROOT / "assets" / "fonts",
+    Path.home() / ".local" / "share" / "fonts",
+    Path.home() / ".fonts",
+    Path("/usr/local/share/fonts"),
+    Path("/usr/share/fonts"),
+    Path("/Library/Fonts"),
+    Path(os.environ.get("WINDIR", r"C:\Windows")) / "Fonts",
+]
+
+@dataclass(slots=True)
+class Fonts:
+    roman: Font
+    bold: Font
+
+    def of(self, bold: bool) -> Font:
+        return self.bold if bold else self.roman
+
+    def space(self, size: float) -> float:
+        # Inter-word space, taken from the regular face for both
+        return self.roman.width(" ", size)
+
+@lru_cache(maxsize=1)
+def find_fonts() -> tuple[Path, Path] | None:
+    """
+    The first FONT_FILES pair installed in FONT_DIRS, or None.
+    """
+    found: dict[str, Path] = {}
+    for d in FONT_DIRS:
+        if d.is_dir():
+            for p in d.rglob("*.ttf"):
+                found.setdefault(p.name, p)
+    for regular, bold in FONT_FILES:
+        if regular in found and bold in found:
+            return found[regular], found[bold]
+    return None
+
+def load_fonts(paths: tuple[Path, Path] | None = None) -> Fonts:
+    """
+    Fonts for one document (embedded fonts record the glyphs it uses): the
+    TrueType files `paths`, else find_fonts(), else the built-in Times.
+    """
+    paths = paths or find_fonts()
+    if paths is None:
+        return Fonts(StandardFont("Times-Roman"), StandardFont("Times-Bold"))
+    return Fonts(EmbeddedFont(ttf.load(paths[0])), EmbeddedFont(ttf.load(paths[1])))
+
+@dataclass(slots=True)
+class Run:
+    text: str
+    bold: bool = False
+    uri: str = ""
+
+def b(text: str) -> Run:
+    return Run(text, bold=True)
+
+def link(uri: str, text: str) -> Run:
+    return Run(text, uri=uri)
+
+Word = list[Run]   # pieces of one word, possibly in different styles
+
+def _words(runs: Iterable[Run], fonts: Fonts) -> list[Word]:
+    words: list[Word] = [[]]
+    for r in runs:
+        for i, piece in enumerate(fonts.of(r.bold).prepare(r.text).split(" ")):
+            if i:
+                words.append([])
+            if piece:
+                words[-1].append(Run(piece, r.bold, r.uri))
+    return [w for w in words if w]
+
+def _width(word: Word, size: float, fonts: Fonts) -> float:
+    return sum(fonts.of(r.bold).width(r.text, size) for r in word)
+
+def _split_long(word: Word, width: float, size: float, fonts: Fonts) -> list[Word]:
+    """
+    Break a word wider than the line (a long URL) at character boundaries.
+    """
+    out: list[Word] = [[]]
+    used = 0.0
+    for r in word:
+        font = fonts.of(r.bold)
+        chunk = ""
+        for c in r.text:
+            w = font.width(c, size)
+            if used + w > width and (chunk or out[-1]):
+                if chunk:
+                    out[-1].append(Run(chunk, r.bold, r.uri))
+                out.append([])
+                chunk, used = "", 0.0
+            chunk += c
+            used += w
+        if chunk:
+            out[-1].append(Run(chunk, r.bold, r.uri))
+    return out
+
+def break_lines(runs: Iterable[Run], width: float, fonts: Fonts, size: float = SIZE) -> list[list[Word]]:
+    lines: list[list[Word]] = [[]]
+    used = 0.0
+    space = fonts.space(size)
+    for word in _words(runs, fonts):
+        w = _width(word, size, fonts)
+        pieces = _split_long(word, width, size, fonts) if w > width else [word]
+        for piece in pieces:
+            pw = _width(piece, size, fonts) if len(pieces) > 1 else w
+            need = pw if not lines[-1] else used + space + pw
+            if lines[-1] and need > width:
+                lines.append([piece])
+                used = pw
+            else:
+                lines[-1].append(piece)
+                used = need
+    return lines if lines[0] else []
+
+class Flow:
+    """
+    Fills pages top to bottom; starts a new page when a line does not fit.
+    """
+    def __init__(self, pdf: PdfWriter, fonts: Fonts):
+        self.pdf = pdf
+        self.fonts = fonts
+        self.width = pdf.size[0] - 2 * MARGIN
+        self.top = pdf.size[1] - MARGIN
+        self.page: Page = pdf.add_page()
+        self.y = self.top
+
+    def space(self, pt: float) -> None:
+        self.y -= pt
+
+    def need(self, height: float) -> None:
+        if self.y - height < MARGIN and self.y < self.top:
+            self.page = self.pdf.add_page()
+            self.y = self.top
+
+    def _line(self, words: list[Word], x: float, size: float, leading: float, stretch: float = 0.0) -> None:
+        self.need(leading)
+        self.y -= leading
+        baseline = self.y + leading - size * ASCENT
+        gaps = len(words) - 1
+        tw = stretch / gaps if gaps and stretch > 0 else 0.0
+        space = self.fonts.space(size) + tw
+        runs: list[tuple[str, Font, float]] = []
+        cursor = x
+        for i, word in enumerate(words):
+            if i:
+                # The space takes the style of the text before it
+                runs[-1] = (runs[-1][0] + " ", runs[-1][1], size)
+                cursor += space
+            for r in word:
+                font = self.fonts.of(r.bold)
+                w = font.width(r.text, size)
+                if r.uri:
+                    self.page.link(cursor, baseline - size * 0.22, cursor + w, baseline + size * 0.78, r.uri)
+                if runs and runs[-1][1] == font:
+                    runs[-1] = (runs[-1][0] + r.text, font, size)
+                else:
+                    runs.append((r.text, font, size))
+                cursor += w
+        self.page.text(x, baseline, runs, tw)
+
+    def para(self, runs: Iterable[Run], indent: float = 0.0, size: float = SIZE, leading: float = LEADING,
+             center: bool = False, right: list[Run] | None = None, label: str = "") -> None:
+        """
+        One \\\\-terminated line of cv.tex: wrapped and justified, the last
+        line ragged. `right` is set flush right on the first line (\\hfill),
+        `label` right-aligned in the indent (a list item's bullet or number).
+        """
+        fonts = self.fonts
+        width = self.width - indent
+        right_words = _words(right or [], fonts)
+        right_w = sum(_width(w, size, fonts) for w in right_words) + fonts.space(SIZE) * max(len(right_words) - 1, 0)
+        lines = break_lines(runs, width - (right_w + 2 * SIZE if right_words else 0), fonts, size)
+        if not lines and not right_words and not label:
+            return
+        lines = lines or [[]]
+        for i, words in enumerate(lines):
+            natural = sum(_width(w, size, fonts) for w in words) + fonts.space(size) * max(len(words) - 1, 0)
+            if center:
+                self._line(words, MARGIN + (self.width - natural) / 2, size, leading)
+            else:
+                last = i == len(lines) - 1
+                avail = width - (right_w + 2 * SIZE if i == 0 and right_words else 0)
+                self._line(words, MARGIN + indent, size, leading, 0.0 if last else avail - natural)
+            if i == 0:
+                baseline = self.y + leading - size * ASCENT
+                if right_words:
+                    self.page_text_at(right_words, MARGIN + self.width - right_w, baseline, size)
+                if label:
+                    text = fonts.roman.prepare(label)
+                    lw = fonts.roman.width(text, size)
+                    self.page.text(MARGIN + indent - LABEL_SEP - lw, baseline, [(text, fonts.roman, size)])
+
+    def page_text_at(self, words: list[Word], x: float, baseline: float, size: float) -> None:
+        runs: list[tuple[str, Font, float]] = []
+        for i, word in enumerate(words):
+            for j, r in enumerate(word):
+                text = (" " if i and not j else "") + r.text
+                font = self.fonts.of(r.bold)
+                if runs and runs[-1][1] == font:
+                    runs[-1] = (runs[-1][0] + text, font, size)
+                else:
+                    runs.append((text, font, size))
+        self.page.text(x, baseline, runs)
+
+    def rule(self) -> None:
+        self.page.rule(MARGIN, self.y - RULE, self.width, RULE)
+        self.y -= RULE
+
+# ---- sections, mirroring the tex_* functions in build_pdf.py ----
+
+def section(flow: Flow, title: str) -> None:
+    # Keep the title with the first lines under it
+    flow.need(4 * LEADING)
+    flow.space(PARSKIP + 3.5)
+    flow.para([b(title.upper())])
+    flow.space(2.6 - 2.0)
+    flow.rule()
+    flow.space(8.0)
+
+def itemize(flow: Flow, items: list[str], indent: float = 0.0) -> None:
+    if not items:
+        return
+    bullet_w = flow.fonts.roman.width(flow.fonts.roman.prepare("•"), SIZE)
+    left = indent + bullet_w + LABEL_SEP
+    flow.space(2.0)
+    for i, x in enumerate(items):
+        if i:
+            flow.space(1.0)
+        flow.para([Run(x)], indent=left, label="•")
+    flow.space(2.0)
+
+def pdf_header(flow: Flow, doc: Document) -> None:
+    flow.para([b(doc.name)], size=NAME_SIZE, leading=NAME_LEADING, center=True)
+    flow.space(4.0)
+    lines: list[list[Run]] = []
+    if doc.location:
+        lines.append([Run(doc.location)])
+    email = " / ".join(e for e in doc.email if e)
+    if email:
+        lines.append([Run("E-mail: " + email)])
+    phone = " / ".join(p for p in doc.phone if p)
+    if phone:
+        lines.append([Run("Tel: " + phone)])
+    links: list[Run] = []
+    if doc.website:
+        links += [Run("Website: "), link(doc.website, re.sub(r"^https?://", "", doc.website))]
+    if doc.pdf:
+        if links:
+            links.append(Run(" \u00a0\u00a0 "))  # \quad: 1em, as two spaces and two no-break spaces
+        links += [Run("PDF: "), link(doc.pdf, "Download CV (PDF)")]
+    if links:
+        lines.append(links)
+    for runs in lines:
+        flow.para(runs, center=True)
+    flow.space(10.0)
+
+def pdf_education(flow: Flow, doc: Document) -> None:
+    if not doc.education:
+        return
+    section(flow, "Education")
+    for e in doc.education:
+        flow.para([b(e.institution)], right=[Run(e.period)] if e.period else None, leading=LEADING - 0.5)
+        if e.degree:
+            flow.para([b(e.degree)], leading=LEADING - 0.5)
+        if e.department:
+            flow.para([Run(e.department)], leading=LEADING - 0.5)
+        if e.location:
+            flow.para([Run(e.location)], leading=LEADING - 0.5)
+        if e.research_area:
+            flow.para([b("Research Area:"), Run(" " + e.research_area)], leading=LEADING - 0.5)
+        if e.advisor:
+            flow.para([b("Advisor:"), Run(" " + e.advisor)])
+            flow.space(10.0)
+
+def pdf_publications(flow: Flow, doc: Document, me: NameMatcher) -> None:
+    if not doc.publications:
+        return
+    section(flow, "Publications")
+    label_w = flow.fonts.roman.width(f"{len(doc.publications)}.", SIZE)
+    left = label_w + LABEL_SEP
+    flow.space(2.0)
+    for n, p in enumerate(doc.publications, 1):
+        if n > 1:
+            flow.space(2.0)
+        meta = ", ".join(x for x in [p.venue, p.year, "Volume " + p.volume if p.volume else "", p.pages, p.note] if x)
+        flow.para([b(p.title)], indent=left, label=f"{n}.")
+        if p.authors:
+            runs: list[Run] = []
+            for i, a in enumerate(p.authors):
+                if i:
+                    runs.append(Run(", "))
+                runs.append(Run(a, bold=me(a)))
+            flow.para(runs, indent=left)
+        if meta:
+            flow.para([b(meta)], indent=left)
+        if p.doi:
+            flow.para([Run("DOI: "), link("https://doi.org/" + p.doi, p.doi)], indent=left)
+        flow.space(2.0)
+    flow.space(2.0)
+
+def pdf_jobs(flow: Flow, title: str, jobs: list[Experience]) -> None:
+    if not jobs:
+        return
+    section(flow, title)
+    for e in jobs:
+        flow.para([b(e.organization)], right=[Run(e.period)] if e.period else None)
+        if e.role:
+            flow.para([b(e.role)])
+        itemize(flow, e.details)
+        flow.space(4.0)
+
+def pdf_funded_projects(flow: Flow, doc: Document) -> None:
+    items = []
+    for fp in doc.funded_projects:
+        if fp.title:
+            items.append(f"{fp.sponsor} — {fp.title}")
+        elif fp.sponsor and fp.projects:
+            items.append(f"{fp.sponsor}: " + "; ".join(fp.projects))
+        elif fp.sponsor:
+            items.append(fp.sponsor)
+    if doc.funded_projects:
+        section(flow, "Funded Projects")
+        itemize(flow, items)
+
+def pdf_list_section(flow: Flow, title: str, items: list[str]) -> None:
+    if items:
+        section(flow, title)
+        itemize(flow, items)
+
+def pdf_skills(flow: Flow, doc: Document) -> None:
+    if not doc.skills:
+        return
+    section(flow, "Skills")
+    for k, vals in doc.skills.items():
+        if not vals:
+            continue
+        flow.para([b(k.replace("_", " ").title())])
+        itemize(flow, vals)
+        flow.space(2.0)
+
+def pdf_references(flow: Flow, doc: Document) -> None:
+    if not doc.references:
+        return
+    section(flow, "References")
+    for r in doc.references:
+        flow.para([b(r.name)])
+        line = " — ".join(x for x in [r.title, r.affiliation] if x)
+        if line:
+            flow.para([Run(line)])
+        if r.email:
+            flow.para([Run("E-mail: "), link("mailto:" + r.email, r.email)])
+        flow.space(6.0)
+
+def pdf_section_writers(doc: Document) -> dict[str, Callable[[Flow], None]]:
+    return {
+        "education": lambda f: pdf_education(f, doc),
+        "publications": lambda f: pdf_publications(f, doc, name_matcher(doc)),
+        "experience": lambda f: pdf_jobs(f, "Research & Experience", doc.experience),
+        "funded_projects": lambda f: pdf_funded_projects(f, doc),
+        "industry_experience": lambda f: pdf_jobs(f, "Industry Experience", doc.industry_experience),
+        "honors_awards": lambda f: pdf_list_section(f, "Honors & Awards", doc.honors_awards),
+        "skills": lambda f: pdf_skills(f, doc),
+        "references": lambda f: pdf_references(f, doc),
+    }
+
+def render_pdf(doc: Document, created: float | None = None, fonts: tuple[Path, Path] | None = None) -> bytes:
+    """
+    The PDF for `doc`, set in `fonts` (see load_fonts()). Raises
+    UnsupportedText, naming the section, for text the fonts cannot show.
+    """
+    faces = load_fonts(fonts)
+    pdf = PdfWriter(LETTER, title=f"{doc.name} | Resume" if doc.name else "Resume", author=doc.name,
+                    fonts=(faces.roman, faces.bold))
+    flow = Flow(pdf, faces)
+    writers = {"header": lambda f: pdf_header(f, doc), **pdf_section_writers(doc)}
+    for name in ("header", *doc.sections):
+        with span(name, "direct_pdf"):
+            try:
+                writers[name](flow)
+            except UnsupportedText as e:
+                raise UnsupportedText(f"{name}: {e}") from None
+    with span("serialize", "direct_pdf"):
+        return pdf.to_bytes(created)
+
+def write_pdf(doc: Document, out_pdf: Path, fonts: tuple[Path, Path] | None = None) -> Path:
+    data = render_pdf(doc, reproducible.epoch(), fonts)
+    with span("publish", "io"):
+        how = publish_bytes(data, out_pdf)
+    timing.count(f"publish {how}")
+    return out_pdf
+
+def build(content: Path, out_pdf: Path, content_cache: Path | None = None,
+          fonts: tuple[Path, Path] | None = None) -> Path:
+    return write_pdf(load_document(content, content_cache), out_pdf, fonts)
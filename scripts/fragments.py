@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Section-level fragment cache.
+
+Each rendered section (HTML or LaTeX) is stored on disk under a key made of
+the output kind, the section name, a hash of the renderer source and a hash
+of the section's input data. When one publication is added, only the
+publications fragment misses; every other section is reused as-is.
+
+Every edit leaves the fragment it replaced behind, so the store is capped
+like the PDF cache: hits bump a fragment's mtime and, once the directory
+grows past max_bytes, the least recently used fragments are deleted.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Iterable
+import hashlib
+import os
+import tempfile
+
+ROOT = Path(__file__).resolve().parents[1]
+FRAGMENT_DIR = ROOT / ".cache" / "fragments"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Modules whose behaviour ends up in every fragment: model normalization and
+# self-name matching (which authors are bolded)
+SHARED_SOURCES = tuple(Path(__file__).with_name(name) for name in ("model.py", "names.py"))
+
+def source_hash(*paths: str | Path) -> str:
+    """
+    Hash of a renderer's sources, so editing the renderer (or anything in
+    SHARED_SOURCES it is given) invalidates its fragments.
+    """
+    hsh = hashlib.sha256()
+    for path in paths:
+        hsh.update(Path(path).read_bytes())
+    return hsh.hexdigest()[:16]
+
+def input_hash(value: Any) -> str:
+    # The model is plain dataclasses/lists/strings, whose repr is complete and deterministic
+    return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()
+
+class FragmentCache:
+    def __init__(self, root: Path = FRAGMENT_DIR, kind: str = "", salt: str = "",
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.kind = kind
+        self.salt = salt
+        self.max_bytes = max_bytes
+        # Bytes in the store: scanned on the first write, then kept up to date
+        # (approximately, if other processes write too; evict() rescans)
+        self._total: int | None = None
+        # section -> [hits, misses], in the order sections were first looked up
+        self.counts: dict[str, list[int]] = {}
+
+    def path_for(self, section: str, key: str) -> Path:
+        return self.root / self.kind / section / f"{self.salt}-{key}.frag"
+
+    def get(self, section: str, value: Any, render: Callable[[], Iterable[str]], sep: str = "\n") -> str:
+        """
+        Return the section's text, rendering it with render() only on a miss.
+        render() yields the section's lines; they are joined with `sep`.
+        """
+        p = self.path_for(section, input_hash(value))
+        counts = self.counts.setdefault(section, [0, 0])
+        text = self._load(p)
+        if text is not None:
+            counts[0] += 1
+            return text
+
+        counts[1] += 1
+        text = sep.join(render())
+        self._store(p, text)
+        return text
+
+    def _load(self, p: Path) -> str | None:
+        try:
+            text = p.read_text(encoding="utf-8")
+            # Bump mtime so eviction treats this fragment as recently used
+            os.utime(p)
+        except FileNotFoundError:
+            return None
+        return text
+
+    def _store(self, p: Path, text: str) -> None:
+        data = text.encode("utf-8")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, p)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        if self._total is None:
+            self._total = sum(size for _, size, _ in self._entries())
+        else:
+            self._total += len(data)
+        if self._total > self.max_bytes:
+            self.evict(keep=p)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for p in self.root.glob("*/*/*.frag"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        Delete least recently used fragments (other than `keep`) until the
+        store fits max_bytes. Returns the number of fragments removed.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._total = total
+        return removed
+
+    def stats(self) -> dict[str, tuple[int, int]]:
+        """
+        (hits, misses) per section.
+        """
+        return {n: (h, m) for n, (h, m) in self.counts.items()}
+
+    def summary(self) -> str:
+        parts = [f"{n} {h}/{m}" for n, (h, m) in self.stats().items()]
+        return f"{self.kind} fragments (hit/miss): " + ", ".join(parts)
+
+class MemoryFragmentCache(FragmentCache):
+    """
+    Same keys, kept in a dict: for long-running processes such as --watch.
+    Only the latest `keep` fragments per section are kept (0 = all, e.g. when
+    several variants of one document share the cache).
+    """
+    def __init__(self, kind: str = "", salt: str = "", keep: int = 1):
+        super().__init__(Path("<memory>"), kind, salt)
+        self.keep = keep
+        self.store: dict[Path, str] = {}
+
+    def _load(self, p: Path) -> str | None:
+        return self.store.get(p)
+
+    def _store(self, p: Path, text: str) -> None:
+        if self.keep:
+            old = [k for k in self.store if k.parent == p.parent]
+            for k in old[:len(old) - self.keep + 1]:
+                del self.store[k]
+        self.store[p] = text
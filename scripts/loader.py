@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content loading shared by the builders.
+
+YAML is parsed with libyaml's CSafeLoader when PyYAML was built with it, and
+with the pure-Python SafeLoader otherwise. With a cache directory, the parsed
+document is also pickled next to the file's SHA-256, so an unchanged
+content.yml is never parsed twice. The file is always read and hashed:
+mtime and size alone miss same-size edits saved within one timestamp tick.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+try:
+    import yaml  # type: ignore
+except Exception:
+    print("Missing dependency: PyYAML. Install with: pip install pyyaml", file=sys.stderr)
+    raise
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # type: ignore
+except ImportError:
+    from yaml import SafeLoader  # type: ignore
+
+from timing import span
+
+ROOT = Path(__file__).resolve().parents[1]
+CONTENT_CACHE_DIR = ROOT / ".cache" / "content"
+# Bump when the cached payload layout changes
+CACHE_FORMAT = 2
+
+def parse_yaml(text: str) -> Any:
+    with span("parse_yaml", "load"):
+        return yaml.load(text, Loader=SafeLoader)
+
+def _cache_file(path: Path, cache_dir: Path) -> Path:
+    key = hashlib.sha256(str(path).encode("utf-8")).hexdigest()[:24]
+    return cache_dir / f"{key}.pickle"
+
+def _read_cache(cache_file: Path) -> dict | None:
+    try:
+        with open(cache_file, "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get("format") != (CACHE_FORMAT, yaml.__version__):
+        return None
+    return entry
+
+def _write_cache(cache_file: Path, entry: dict) -> None:
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+def load_content(path: Path, cache_dir: Path | None = None) -> Any:
+    """
+    Load a content YAML file. With cache_dir, reuse the parsed document when the
+    file's content hash is unchanged.
+    """
+    if cache_dir is None:
+        return parse_yaml(path.read_text(encoding="utf-8"))
+
+    path = path.resolve()
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_file = _cache_file(path, cache_dir)
+    entry = _read_cache(cache_file)
+    if entry is not None and entry["sha256"] == digest:
+        return entry["data"]
+
+    data = parse_yaml(raw.decode("utf-8"))
+    _write_cache(cache_file, {
+        "format": (CACHE_FORMAT, yaml.__version__),
+        "sha256": digest,
+        "data": data,
+    })
+    return data
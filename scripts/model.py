@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Typed document model shared by the HTML and LaTeX renderers.
+
+normalize() turns the raw YAML into slotted dataclasses once per load: every
+section the renderers read is present, every scalar field is a string (""
+when missing or null), and author/detail lists are lists of strings. Shape
+errors (a section that is not a list, an entry that is not a mapping) are
+raised here as ContentError instead of surfacing mid-render.
+
+load_document() first runs the schema check (schema.py) on the parsed data,
+so every misspelled key or wrong type in a file is reported at once, with
+line numbers, before any renderer or subprocess runs.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from loader import load_content
+from schema import validate
+from timing import span
+
+# Body sections both renderers know, in page order. Skills is off unless a
+# variant asks for it (see variants.py)
+SECTIONS = ("education", "publications", "experience", "funded_projects",
+            "industry_experience", "honors_awards", "skills", "references")
+DEFAULT_SECTIONS = tuple(s for s in SECTIONS if s != "skills")
+
+class ContentError(ValueError):
+    pass
+
+@dataclass(slots=True)
+class Education:
+    institution: str = ""
+    location: str = ""
+    degree: str = ""
+    department: str = ""
+    period: str = ""
+    gpa: str = ""
+    research_area: str = ""
+    advisor: str = ""
+
+@dataclass(slots=True)
+class Publication:
+    title: str = ""
+    authors: list[str] = field(default_factory=list)
+    venue: str = ""
+    year: str = ""
+    note: str = ""
+    volume: str = ""
+    pages: str = ""
+    doi: str = ""
+
+@dataclass(slots=True)
+class Experience:
+    organization: str = ""
+    role: str = ""
+    period: str = ""
+    details: list[str] = field(default_factory=list)
+
+@dataclass(slots=True)
+class FundedProject:
+    sponsor: str = ""
+    title: str = ""
+    projects: list[str] = field(default_factory=list)
+
+@dataclass(slots=True)
+class Reference:
+    name: str = ""
+    title: str = ""
+    affiliation: str = ""
+    email: str = ""
+
+@dataclass(slots=True)
+class Document:
+    name: str = ""
+    location: str = ""
+    email: list[str] = field(default_factory=list)
+    phone: list[str] = field(default_factory=list)
+    website: str = ""
+    pdf: str = ""
+    education: list[Education] = field(default_factory=list)
+    publications: list[Publication] = field(default_factory=list)
+    experience: list[Experience] = field(default_factory=list)
+    funded_projects: list[FundedProject] = field(default_factory=list)
+    industry_experience: list[Experience] = field(default_factory=list)
+    honors_awards: list[str] = field(default_factory=list)
+    skills: dict[str, list[str]] = field(default_factory=dict)
+    references: list[Reference] = field(default_factory=list)
+    # Author names to highlight in publications; empty means `name`
+    highlight_names: list[str] = field(default_factory=list)
+    # Body sections to render, in order; variants override it
+    sections: list[str] = field(default_factory=lambda: list(DEFAULT_SECTIONS))
+
+def text(v: Any) -> str:
+    return "" if v is None else str(v)
+
+def texts(v: Any, where: str = "") -> list[str]:
+    if not v:
+        return []
+    if not isinstance(v, list):
+        raise ContentError(f"{where}: expected a list, got {type(v).__name__}")
+    return [text(x) for x in v]
+
+def _entries(data: dict, key: str) -> list[tuple[str, dict]]:
+    items = data.get(key) or []
+    if not isinstance(items, list):
+        raise ContentError(f"{key}: expected a list, got {type(items).__name__}")
+    out = []
+    for i, e in enumerate(items):
+        where = f"{key}[{i}]"
+        if not isinstance(e, dict):
+            raise ContentError(f"{where}: expected a mapping, got {type(e).__name__}")
+        out.append((where, e))
+    return out
+
+def _mapping(data: dict, key: str) -> dict:
+    v = data.get(key) or {}
+    if not isinstance(v, dict):
+        raise ContentError(f"{key}: expected a mapping, got {type(v).__name__}")
+    return v
+
+def _experience(data: dict, key: str) -> list[Experience]:
+    return [
+        Experience(text(e.get("organization")), text(e.get("role")), text(e.get("period")),
+                   texts(e.get("details"), f"{where}.details"))
+        for where, e in _entries(data, key)
+    ]
+
+def normalize(data: dict | None) -> Document:
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ContentError(f"content: expected a mapping at the top level, got {type(data).__name__}")
+    links = _mapping(data, "links")
+    highlight = data.get("highlight_names")
+
+    return Document(
+        name=text(data.get("name")),
+        location=text(data.get("location")),
+        email=texts(data.get("email"), "email"),
+        phone=texts(data.get("phone"), "phone"),
+        website=text(links.get("website")),
+        pdf=text(links.get("pdf")),
+        education=[
+            Education(text(e.get("institution")), text(e.get("location")), text(e.get("degree")),
+                      text(e.get("department")), text(e.get("period")), text(e.get("gpa")),
+                      text(e.get("Research Area")), text(e.get("Advisor")))
+            for _, e in _entries(data, "education")
+        ],
+        publications=[
+            Publication(text(p.get("title")), texts(p.get("authors"), f"{where}.authors"),
+                        text(p.get("venue")), text(p.get("year")), text(p.get("note")),
+                        text(p.get("volume")), text(p.get("pages")), text(p.get("doi")))
+            for where, p in _entries(data, "publications")
+        ],
+        experience=_experience(data, "experience"),
+        funded_projects=[
+            FundedProject(text(fp.get("sponsor")), text(fp.get("title")),
+                          texts(fp.get("projects"), f"{where}.projects"))
+            for where, fp in _entries(data, "funded_projects")
+        ],
+        industry_experience=_experience(data, "industry_experience"),
+        honors_awards=texts(data.get("honors_awards"), "honors_awards"),
+        skills={text(k): texts(v, f"skills.{k}") for k, v in _mapping(data, "skills").items()},
+        references=[
+            Reference(text(r.get("name")), text(r.get("title")), text(r.get("affiliation")), text(r.get("email")))
+            for _, r in _entries(data, "references")
+        ],
+        highlight_names=texts([highlight] if isinstance(highlight, str) else highlight, "highlight_names"),
+    )
+
+def load_document(path: Path, content_cache: Path | None = None) -> Document:
+    with span("load_content", "load"):
+        data = load_content(path, content_cache)
+    with span("validate", "load"):
+        problems = validate(path, data)
+    if problems:
+        raise ContentError(f"{path}: {len(problems)} problem(s)\n" + "\n".join(problems))
+    with span("normalize", "load"):
+        return normalize(data)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Self-name highlighting in author lists.
+
+NameMatcher is built once per document from the names to highlight
+(`highlight_names` in the content, or `name`). Every alias is expanded up
+front into the keys its common spellings reduce to, so matching an author is
+one key computation and a set lookup, memoized per author string:
+
+  "Zhi-Li Zhang"  ->  Zhi-Li Zhang, Zhili Zhang, Zhi Li Zhang, Zhang, Zhi-Li,
+                      Z. Zhang, Z.-L. Zhang, Z. L. Zhang, ZL Zhang, ...
+
+Case, accents, dots and hyphens never matter. The examples below run with
+
+  python -m doctest scripts/names.py
+"""
+
+from __future__ import annotations
+from typing import Iterable
+import re
+import unicodedata
+
+from model import Document
+
+_SPLIT_RE = re.compile(r"[^\w]+")
+
+def _fold(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s.casefold())
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+def _tokens(s: str) -> list[str]:
+    return [t for t in _SPLIT_RE.split(s) if t]
+
+def _first_last(name: str) -> str:
+    """
+    Folded `name`, with "Last, First" turned around into "First Last".
+    """
+    s = _fold(name)
+    if s.count(",") == 1:
+        last, first = s.split(",")
+        s = f"{first} {last}"
+    return s
+
+def name_key(name: str) -> str:
+    """
+    Canonical form an author name is compared by: "Last, First" is turned
+    around, then case, accents and punctuation are dropped.
+    """
+    return " ".join(_tokens(_first_last(name)))
+
+def name_variants(name: str) -> set[str]:
+    """
+    Keys of the spellings of `name` that should count as the same person.
+    Aliases may be written "Last, First" too:
+
+    >>> sorted(name_variants("Hu, Bin")) == sorted(name_variants("Bin Hu"))
+    True
+    >>> m = NameMatcher(["Hu, Bin"])
+    >>> m("B. Hu"), m("Bin Hu"), m("Hu, B."), m("Bin Hue")
+    (True, True, True, False)
+    """
+    words = _first_last(name).replace(",", " ").split()
+    if not words:
+        return set()
+    given, family = words[:-1], words[-1]
+    fam = " ".join(_tokens(family))
+    fam_joined = "".join(_tokens(family))
+
+    keys = {name_key(name)}
+    # Hyphenated parts written separately or run together: Zhi-Li / Zhi Li / Zhili
+    split_given = [t for w in given for t in _tokens(w)]
+    joined_given = ["".join(_tokens(w)) for w in given]
+    for g in (split_given, joined_given):
+        for f in (fam, fam_joined):
+            keys.add(" ".join([*g, f]))
+
+    # Initials: Z. Zhang, Z.-L. Zhang, ZL Zhang
+    if split_given:
+        initials = [t[0] for t in split_given]
+        for f in (fam, fam_joined):
+            keys.add(f"{initials[0]} {f}")
+            keys.add(" ".join([*initials, f]))
+            keys.add(f"{''.join(initials)} {f}")
+    keys.discard("")
+    return keys
+
+class NameMatcher(dict):
+    """
+    matcher(author) -> True when the author is one of the highlighted names.
+    Results are memoized in the dict itself, so a repeated author costs one
+    C-level lookup.
+    """
+    __slots__ = ("_variants",)
+
+    def __init__(self, names: Iterable[str]):
+        super().__init__()
+        self._variants: frozenset[str] = frozenset(k for n in names if n.strip() for k in name_variants(n))
+
+    def __missing__(self, author: str) -> bool:
+        hit = self[author] = name_key(author) in self._variants
+        return hit
+
+    __call__ = dict.__getitem__
+
+def name_matcher(doc: Document) -> NameMatcher:
+    return NameMatcher(doc.highlight_names or [doc.name])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed on-disk cache of compiled PDFs.
+
+Entries are keyed on the generated LaTeX source, the TeX template, the
+engine version and, for reproducible builds, SOURCE_DATE_EPOCH, so an
+unchanged CV never reaches xelatex. Recency is tracked through file mtimes
+(bumped on every hit) and the oldest entries are evicted once the cache
+grows past its size limit.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import os
+
+from publish import publish
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / ".cache" / "pdf"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def cache_key(tex_source: str, template: str, engine: str, epoch: int | None = None) -> str:
+    hsh = hashlib.sha256()
+    # A pinned date is part of the output; unpinned keys stay as they were
+    parts = (engine, template, tex_source) if epoch is None else (engine, template, tex_source, str(epoch))
+    for part in parts:
+        data = part.encode("utf-8")
+        # Length-prefix each part so the concatenation is unambiguous
+        hsh.update(len(data).to_bytes(8, "big"))
+        hsh.update(data)
+    return hsh.hexdigest()
+
+class PdfCache:
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def get(self, key: str) -> Path | None:
+        p = self.path_for(key)
+        try:
+            # Bump mtime so eviction treats this entry as recently used
+            os.utime(p)
+        except FileNotFoundError:
+            return None
+        return p
+
+    def put(self, key: str, pdf: Path) -> Path:
+        dest = self.path_for(key)
+        # Written to a temp name and renamed, so concurrent readers never see a
+        # partial file and entries are never modified in place (safe to hardlink)
+        publish(pdf, dest)
+        # Never evict the entry being added, even if it alone exceeds max_bytes
+        self.evict(keep=dest)
+        return dest
+
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        Delete least recently used entries (other than `keep`) until the cache
+        fits max_bytes. Returns the number of entries removed.
+        """
+        entries = []
+        total = 0
+        for p in self.root.glob("*/*.pdf"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Small in-process PDF writer for the TeX-free engine (direct_pdf.py).
+
+Text is set in one of two kinds of font:
+
+  StandardFont  Times-Roman or Times-Bold, two of the standard 14 fonts every
+                viewer has built in. Nothing is embedded; widths come from the
+                Adobe font metrics below and strings are WinAnsi (cp1252)
+  EmbeddedFont  a TrueType font (ttf.py), embedded as a subset of the glyphs
+                the document uses (Type0/CIDFontType2, Identity-H), with a
+                ToUnicode map so the text can still be searched and copied
+
+Text a font cannot show (even after NFKC, which turns e.g. ligatures into
+their letters) raises UnsupportedText rather than being set wrong.
+
+Pages are lists of content-stream operators plus URI link annotations;
+write() lays out the objects, compresses the streams and emits the xref.
+The trailer /ID is a digest of everything before it, so the same pages and
+creation time always give the same bytes.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import BinaryIO, Callable
+from urllib.parse import quote
+import hashlib
+import time
+import unicodedata
+import zlib
+
+from ttf import TrueType
+
+LETTER = (612.0, 792.0)
+PRODUCER = "resume direct_pdf"
+
+# Advance widths (1/1000 em) of the printable ASCII range 32..126, from the
+# Adobe AFM files for Times-Roman and Times-Bold
+_ASCII_WIDTHS = {
+    "Times-Roman": [
+        250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+        500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+        921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+        556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+        333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+        500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+    ],
+    "Times-Bold": [
+        250, 333, 555, 500, 500, 1000, 833, 278, 333, 333, 500, 570, 250, 333, 250, 278,
+        500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 333, 333, 570, 570, 570, 500,
+        930, 722, 667, 722, 722, 667, 611, 778, 778, 389, 500, 778, 667, 944, 722, 778,
+        611, 778, 722, 556, 667, 722, 722, 1000, 722, 722, 667, 333, 278, 333, 581, 500,
+        333, 500, 556, 444, 556, 444, 333, 500, 556, 278, 333, 556, 278, 833, 556, 500,
+        556, 556, 444, 389, 333, 556, 500, 722, 500, 500, 444, 394, 220, 394, 520,
+    ],
+}
+# WinAnsi characters outside ASCII that are not an accented ASCII letter: (roman, bold)
+_EXTRA_WIDTHS = {
+    "\u00a0": (250, 250), "¡": (333, 333), "¢": (500, 500), "£": (500, 500), "¤": (500, 500),
+    "¥": (500, 500), "¦": (200, 220), "§": (500, 500), "¨": (333, 333), "©": (760, 747),
+    "ª": (276, 300), "«": (500, 500), "¬": (564, 570), "\u00ad": (333, 333), "®": (760, 747),
+    "¯": (333, 333), "°": (400, 400), "±": (564, 570), "²": (300, 300), "³": (300, 300),
+    "´": (333, 333), "µ": (500, 556), "¶": (453, 540), "·": (250, 250), "¸": (333, 333),
+    "¹": (300, 300), "º": (310, 330), "»": (500, 500), "¼": (750, 750), "½": (750, 750),
+    "¾": (750, 750), "¿": (444, 500), "Æ": (889, 1000), "Ð": (722, 722), "×": (564, 570),
+    "Ø": (722, 778), "Þ": (556, 611), "ß": (500, 556), "æ": (667, 722), "ð": (500, 500),
+    "÷": (564, 570), "ø": (500, 500), "þ": (500, 556), "Œ": (889, 1000), "œ": (722, 722),
+    "ƒ": (500, 500), "ˆ": (333, 333), "˜": (333, 333), "–": (500, 500), "—": (1000, 1000),
+    "‘": (333, 333), "’": (333, 333), "‚": (333, 333), "“": (444, 500), "”": (444, 500),
+    "„": (444, 500), "†": (500, 500), "‡": (500, 500), "•": (350, 350), "…": (1000, 1000),
+    "‰": (1000, 1000), "‹": (333, 333), "›": (333, 333), "€": (500, 500), "™": (980, 1000),
+}
+
+def _width_table(font: str, col: int) -> dict[str, int]:
+    table = {chr(32 + i): w for i, w in enumerate(_ASCII_WIDTHS[font])}
+    for ch, ws in _EXTRA_WIDTHS.items():
+        table[ch] = ws[col]
+    # Accented letters (é, Ü, Š, ...) are as wide as their base letter
+    for code in range(0xA0, 0x100):
+        ch = chr(code)
+        base = unicodedata.normalize("NFD", ch)[0]
+        if ch not in table and base in table:
+            table[ch] = table[base]
+    for ch in "ŠšŽžŸ":
+        table[ch] = table[unicodedata.normalize("NFD", ch)[0]]
+    return table
+
+WIDTHS = {"Times-Roman": _width_table("Times-Roman", 0), "Times-Bold": _width_table("Times-Bold", 1)}
+
+# Reserved and already percent-encoded characters stay as they are in URIs
+URI_SAFE = ":/?#[]@!$&'()*+,;=%"
+
+class UnsupportedText(ValueError):
+    pass
+
+@lru_cache(maxsize=1 << 14)
+def winansi(text: str) -> str:
+    """
+    `text` in characters the WinAnsi fonts can show. Raises UnsupportedText
+    when that would change what it says.
+    """
+    table = WIDTHS["Times-Roman"]
+    if all(c in table for c in text):
+        return text
+    text = unicodedata.normalize("NFKC", text.replace("\t", " ").replace("\n", " ").replace("\r", " "))
+    missing = sorted({c for c in text if c not in table})
+    if missing:
+        raise _unsupported(text, missing, "the built-in Times fonts only cover WinAnsi")
+    return text
+
+def ascii_uri(uri: str) -> str:
+    """
+    `uri` with non-ASCII characters percent-encoded as UTF-8 (RFC 3987 to 3986).
+    """
+    return uri if uri.isascii() else quote(uri, safe=URI_SAFE)
+
+@lru_cache(maxsize=1 << 14)
+def _units(text: str, font: str) -> int:
+    table = WIDTHS[font]
+    return sum(table.get(c, 500) for c in text)
+
+def text_width(text: str, font: str, size: float) -> float:
+    """
+    Width in points of already WinAnsi-safe `text`.
+    """
+    return _units(text, font) * size / 1000.0
+
+def _unsupported(text: str, missing: list[str], why: str) -> UnsupportedText:
+    chars = ", ".join(f"{c!r} (U+{ord(c):04X})" for c in missing)
+    return UnsupportedText(f"cannot set {chars} in {text!r}: {why}")
+
+def _literal(data: bytes) -> bytes:
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"\\r") + b")"
+
+def pdf_string(text: str) -> bytes:
+    """
+    A text string for the document info: PDFDocEncoding-safe ASCII as is, otherwise UTF-16BE.
+    """
+    if text.isascii():
+        return _literal(text.encode("ascii"))
+    return b"<FEFF" + text.encode("utf-16-be").hex().upper().encode("ascii") + b">"
+
+def _num(x: float) -> str:
+    s = f"{x:.2f}".rstrip("0").rstrip(".")
+    return s if s != "-0" else "0"
+
+def pdf_date(t: float) -> str:
+    return time.strftime("D:%Y%m%d%H%M%SZ", time.gmtime(t))
+
+def _stream(data: bytes, extra: str = "") -> bytes:
+    packed = zlib.compress(data)
+    return (b"<< /Length %d /Filter /FlateDecode%s >>\nstream\n" % (len(packed), extra.encode("ascii"))
+            + packed + b"\nendstream")
+
+class StandardFont:
+    """
+    A standard 14 font: nothing embedded, text WinAnsi-encoded.
+    """
+    def __init__(self, base: str):
+        self.base = base
+        self.resource = ""
+
+    def prepare(self, text: str) -> str:
+        return winansi(text)
+
+    def width(self, text: str, size: float) -> float:
+        return text_width(text, self.base, size)
+
+    def show(self, text: str, size: float, word_spacing: float = 0.0) -> str:
+        # Tw adds word_spacing to each single-byte space
+        return _literal(text.encode("cp1252")).decode("latin-1") + " Tj"
+
+    def write(self, add: Callable[[bytes], int]) -> int:
+        return add(b"<< /Type /Font /Subtype /Type1 /BaseFont /" + self.base.encode("ascii")
+                   + b" /Encoding /WinAnsiEncoding >>")
+
+_TO_UNICODE = """/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def
+/CMapName /Adobe-Identity-UCS def
+/CMapType 2 def
+1 begincodespacerange
+<0000> <FFFF>
+endcodespacerange
+{}
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end"""
+
+class EmbeddedFont:
+    """
+    A TrueType font, embedded as a subset when the file is written. Codes
+    are glyph ids, two bytes each (Identity-H).
+    """
+    def __init__(self, font: TrueType):
+        self.font = font
+        self.resource = ""
+        self.used: dict[int, str] = {}   # glyph id -> the character it shows
+        self._units: dict[str, int] = {}
+
+    def prepare(self, text: str) -> str:
+        cmap = self.font.cmap
+        if all(ord(c) in cmap for c in text):
+            return text
+        text = unicodedata.normalize("NFKC", text.replace("\t", " ").replace("\n", " ").replace("\r", " "))
+        missing = sorted({c for c in text if ord(c) not in cmap})
+        if missing:
+            raise _unsupported(text, missing, f"no glyph in {self.font.name}")
+        return text
+
+    def width(self, text: str, size: float) -> float:
+        units = self._units.get(text)
+        if units is None:
+            cmap, advances = self.font.cmap, self.font.advances
+            units = self._units[text] = sum(advances[cmap.get(ord(c), 0)] for c in text)
+        return units * size / self.font.units_per_em
+
+    def _hex(self, text: str) -> str:
+        cmap = self.font.cmap
+        gids = []
+        for c in text:
+            gid = cmap.get(ord(c), 0)
+            self.used.setdefault(gid, c)
+            gids.append(gid)
+        return "<" + "".join(f"{g:04X}" for g in gids) + ">"
+
+    def show(self, text: str, size: float, word_spacing: float = 0.0) -> str:
+        # Tw only applies to the single-byte code 32, never to two-byte codes,
+        # so justification moves each word by hand
+        if not word_spacing or " " not in text:
+            return self._hex(text) + " Tj"
+        shift = _num(-word_spacing * 1000.0 / size)
+        words = text.split(" ")
+        parts = []
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            piece = word if last else word + " "
+            if piece:
+                parts.append(self._hex(piece))
+            if not last:
+                parts.append(shift)
+        return "[" + " ".join(parts) + "] TJ"
+
+    def write(self, add: Callable[[bytes], int]) -> int:
+        f = self.font
+        gids = sorted(self.used)
+        # The subset tag (six capitals) only depends on the glyphs, so output stays reproducible
+        digest = hashlib.sha256(repr(gids).encode("ascii")).digest()
+        name = "".join(chr(65 + x % 26) for x in digest[:6]) + "+" + f.postscript_name
+        scale = 1000.0 / f.units_per_em
+        program = f.subset(set(gids))
+        font_file = add(_stream(program, f" /Length1 {len(program)}"))
+        flags = 4 | (64 if f.italic_angle else 0)   # symbolic, italic
+        stem_v = 10 + 220 * (f.weight - 50) / 900
+        descriptor = add((
+            f"<< /Type /FontDescriptor /FontName /{name} /Flags {flags} "
+            f"/FontBBox [{' '.join(_num(v * scale) for v in f.bbox)}] /ItalicAngle {_num(f.italic_angle)} "
+            f"/Ascent {_num(f.ascent * scale)} /Descent {_num(f.descent * scale)} "
+            f"/CapHeight {_num(f.cap_height * scale)} /StemV {_num(stem_v)} /FontFile2 {font_file} 0 R >>"
+        ).encode("ascii"))
+        # /W as runs of consecutive glyph ids: first [w1 w2 ...]
+        runs: list[tuple[int, list[str]]] = []
+        for g in gids:
+            w = _num(f.advances[g] * scale)
+            if runs and runs[-1][0] + len(runs[-1][1]) == g:
+                runs[-1][1].append(w)
+            else:
+                runs.append((g, [w]))
+        widths = " ".join(f"{g} [{' '.join(ws)}]" for g, ws in runs)
+        cid_font = add((
+            f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{name} "
+            f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+            f"/FontDescriptor {descriptor} 0 R /W [{widths}] /CIDToGIDMap /Identity >>"
+        ).encode("ascii"))
+        chars = [(g, self.used[g]) for g in gids]
+        blocks = []
+        for i in range(0, len(chars), 100):
+            chunk = chars[i:i + 100]
+            blocks.append(f"{len(chunk)} beginbfchar\n"
+                          + "\n".join(f"<{g:04X}> <{c.encode('utf-16-be').hex().upper()}>" for g, c in chunk)
+                          + "\nendbfchar")
+        to_unicode = add(_stream(_TO_UNICODE.format("\n".join(blocks)).encode("ascii")))
+        return add((
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /{name} /Encoding /Identity-H "
+            f"/DescendantFonts [{cid_font} 0 R] /ToUnicode {to_unicode} 0 R >>"
+        ).encode("ascii"))
+
+Font = StandardFont | EmbeddedFont
+
+@dataclass(slots=True)
+class Page:
+    ops: list[str] = field(default_factory=list)
+    links: list[tuple[tuple[float, float, float, float], str]] = field(default_factory=list)
+
+    def text(self, x: float, y: float, runs: list[tuple[str, Font, float]], word_spacing: float = 0.0) -> None:
+        """
+        Show (text, font, size) runs one after the other from (x, y).
+        word_spacing is added to every space, as when justifying a line.
+        """
+        out = ["BT", f"1 0 0 1 {_num(x)} {_num(y)} Tm"]
+        if word_spacing:
+            out.append(f"{_num(word_spacing)} Tw")
+        current = None
+        for text, font, size in runs:
+            if (font, size) != current:
+                out.append(f"/{font.resource} {_num(size)} Tf")
+                current = (font, size)
+            out.append(font.show(text, size, word_spacing))
+        out.append("ET")
+        self.ops.append(" ".join(out))
+
+    def rule(self, x: float, y: float, width: float, thickness: float = 0.4) -> None:
+        self.ops.append(f"{_num(x)} {_num(y)} {_num(width)} {_num(thickness)} re f")
+
+    def link(self, x0: float, y0: float, x1: float, y1: float, uri: str) -> None:
+        self.links.append(((x0, y0, x1, y1), uri))
+
+class PdfWriter:
+    def __init__(self, size: tuple[float, float] = LETTER, title: str = "", author: str = "",
+                 fonts: tuple[Font, ...] | None = None):
+        self.size = size
+        self.title = title
+        self.author = author
+        self.fonts = fonts or (StandardFont("Times-Roman"), StandardFont("Times-Bold"))
+        for i, font in enumerate(self.fonts, 1):
+            font.resource = f"F{i}"
+        self.pages: list[Page] = []
+
+    def add_page(self) -> Page:
+        page = Page()
+        self.pages.append(page)
+        return page
+
+    def to_bytes(self, created: float | None = None) -> bytes:
+        """
+        The finished file. `created` is the creation time (default: now).
+        """
+        objs: list[bytes] = []
+
+        def add(body: bytes) -> int:
+            objs.append(body)
+            return len(objs)
+
+        def reserve() -> int:
+            objs.append(b"")
+            return len(objs)
+
+        catalog, pages_ref = reserve(), reserve()
+        fonts = {f.resource: f.write(add) for f in self.fonts}
+        font_dict = " ".join(f"/{name} {ref} 0 R" for name, ref in fonts.items())
+        w, h = self.size
+        kids = []
+        for page in self.pages:
+            contents = add(_stream("\n".join(page.ops).encode("latin-1")))
+            annots = [
+                add(b"<< /Type /Annot /Subtype /Link /Rect [" + " ".join(_num(v) for v in rect).encode("ascii")
+                    + b"] /Border [0 0 0] /A << /S /URI /URI " + _literal(ascii_uri(uri).encode("ascii")) + b" >> >>")
+                for rect, uri in page.links
+            ]
+            annot_ref = (" /Annots [" + " ".join(f"{a} 0 R" for a in annots) + "]") if annots else ""
+            kids.append(add(f"<< /Type /Page /Parent {pages_ref} 0 R /MediaBox [0 0 {_num(w)} {_num(h)}] "
+                            f"/Resources << /Font << {font_dict} >> >> /Contents {contents} 0 R{annot_ref} >>"
+                            .encode("ascii")))
+        objs[catalog - 1] = f"<< /Type /Catalog /Pages {pages_ref} 0 R >>".encode("ascii")
+        objs[pages_ref - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] "
+                               f"/Count {len(kids)} >>").encode("ascii")
+        date = pdf_string(pdf_date(time.time() if created is None else created))
+        info = add(b"<< /Producer " + pdf_string(PRODUCER) + b" /Title " + pdf_string(self.title)
+                   + b" /Author " + pdf_string(self.author) + b" /CreationDate " + date
+                   + b" /ModDate " + date + b" >>")
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(objs, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+        file_id = hashlib.md5(out).hexdigest().upper().encode("ascii")
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+        out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+        out += (b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R /ID [<%s> <%s>] >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objs) + 1, catalog, info, file_id, file_id, xref))
+        return bytes(out)
+
+    def write(self, f: BinaryIO, created: float | None = None) -> None:
+        f.write(self.to_bytes(created))
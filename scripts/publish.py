@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publish a built file into site/ without reading it into memory.
+
+publish() leaves the destination alone when it already has the same size and
+SHA-256. Otherwise it writes a temp file next to the destination and renames
+it into place, filling it with the cheapest method that works:
+
+  reflink   FICLONE ioctl (btrfs, XFS, bcachefs): shares extents, copies nothing
+  hardlink  only for sources that are never modified in place, e.g. PDF cache
+            entries (written once via rename, only ever unlinked)
+  copy      os.copy_file_range in chunks (in-kernel, may reflink on its own),
+            then os.sendfile, then a plain buffered copy
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+CHUNK = 1 << 24
+# Errors meaning "this method is not available here", as opposed to real I/O failures
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS,
+                errno.EPERM, errno.EBADF, errno.EMLINK}
+
+def file_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def same_content(a: Path, b: Path) -> bool:
+    try:
+        sa, sb = a.stat(), b.stat()
+    except FileNotFoundError:
+        return False
+    if (sa.st_dev, sa.st_ino) == (sb.st_dev, sb.st_ino):
+        return True
+    return sa.st_size == sb.st_size and file_hash(a) == file_hash(b)
+
+def _short_copy(done: int, size: int) -> OSError:
+    return OSError(errno.EIO, f"short copy: {done} of {size} bytes (source changed while copying?)")
+
+def _reflink(src: int, dst: int) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst, FICLONE, src)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+    return True
+
+def _copy_range(src: int, dst: int, size: int) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    done = 0
+    while done < size:
+        try:
+            n = os.copy_file_range(src, dst, min(CHUNK, size - done))
+        except OSError as e:
+            if done == 0 and e.errno in _UNSUPPORTED:
+                return False
+            raise
+        if n == 0:
+            # Nothing copied yet: unsupported here, let the caller fall back
+            if done == 0:
+                return False
+            raise _short_copy(done, size)
+        done += n
+    return True
+
+def _sendfile(src: int, dst: int, size: int) -> bool:
+    done = 0
+    while done < size:
+        try:
+            n = os.sendfile(dst, src, done, min(CHUNK, size - done))
+        except OSError as e:
+            if done == 0 and e.errno in _UNSUPPORTED:
+                return False
+            raise
+        if n == 0:
+            # Nothing copied yet: unsupported here, let the caller fall back
+            if done == 0:
+                return False
+            raise _short_copy(done, size)
+        done += n
+    return True
+
+def _fill(src: Path, tmp: Path) -> str:
+    with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        if _reflink(fsrc.fileno(), fdst.fileno()):
+            return "reflink"
+        if _copy_range(fsrc.fileno(), fdst.fileno(), size):
+            return "copy_file_range"
+        if _sendfile(fsrc.fileno(), fdst.fileno(), size):
+            return "sendfile"
+        shutil.copyfileobj(fsrc, fdst, CHUNK)
+        return "copy"
+
+def publish_bytes(data: bytes, dst: Path) -> str:
+    """
+    Make dst contain `data`: "unchanged" when it already does, else "written"
+    (via a temp file and rename, so readers never see a partial file).
+    """
+    try:
+        if dst.stat().st_size == len(data) and dst.read_bytes() == data:
+            return "unchanged"
+    except FileNotFoundError:
+        pass
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(name, 0o644)
+        os.replace(name, dst)
+    except BaseException:
+        Path(name).unlink(missing_ok=True)
+        raise
+    return "written"
+
+def publish(src: Path, dst: Path, link: bool = False) -> str:
+    """
+    Make dst a copy of src and return how: "unchanged", "reflink", "hardlink",
+    "copy_file_range", "sendfile" or "copy". Pass link=True only when src is
+    never rewritten in place, since a hardlink shares the inode with it.
+    """
+    if same_content(src, dst):
+        return "unchanged"
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp = Path(name)
+    try:
+        how = ""
+        if link:
+            tmp.unlink()
+            try:
+                os.link(src, tmp)
+                how = "hardlink"
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+        if not how:
+            how = _fill(src, tmp)
+            # mkstemp creates the file 0600; give it the source's permissions instead
+            os.chmod(tmp, stat.S_IMODE(src.stat().st_mode))
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return how
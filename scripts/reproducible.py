@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reproducible PDF output: the same content gives a byte-identical cv.pdf.
+
+Two things change from one build to the next: the document dates and the
+trailer /ID. Both engines pin them whenever SOURCE_DATE_EPOCH is set, as in
+the reproducible-builds.org convention:
+
+  xelatex   xdvipdfmx takes the dates from SOURCE_DATE_EPOCH (FORCE_SOURCE_DATE=1
+            also pins \\today); the /ID is then rewritten in place from a digest
+            of the file itself, keeping its length so no offset moves
+  python    the epoch is the creation date and the /ID is a digest of the file
+
+enable() sets SOURCE_DATE_EPOCH from the last commit unless it is already
+set. Once output is reproducible, a changed hash means changed content, so
+uploads can compare SHA256SUMS and skip everything else.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import os
+import re
+import subprocess
+
+from publish import file_hash, publish_bytes
+
+ROOT = Path(__file__).resolve().parents[1]
+ENV = "SOURCE_DATE_EPOCH"
+MANIFEST = "SHA256SUMS"
+
+_ID_RE = re.compile(rb"/ID\s*\[\s*<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*\]")
+
+def epoch() -> int | None:
+    """
+    SOURCE_DATE_EPOCH as an int, or None when output is not meant to be reproducible.
+    """
+    value = os.environ.get(ENV, "").strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError(f"{ENV} must be a non-negative integer, got {value!r}")
+    return int(value)
+
+def commit_epoch(repo: Path = ROOT) -> int | None:
+    try:
+        p = subprocess.run(["git", "-C", str(repo), "log", "-1", "--format=%ct"],
+                           stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    value = p.stdout.strip()
+    return int(value) if value.isdigit() else None
+
+def enable(repo: Path = ROOT) -> int:
+    """
+    Make this process and every xelatex it starts reproducible. An existing
+    SOURCE_DATE_EPOCH wins; otherwise the last commit time is used (0 outside git).
+    """
+    value = epoch()
+    if value is None:
+        value = commit_epoch(repo) or 0
+        os.environ[ENV] = str(value)
+    os.environ["FORCE_SOURCE_DATE"] = "1"
+    return value
+
+def pin_id(data: bytes) -> bytes:
+    """
+    `data` with every /ID pair replaced by a digest of the file with the IDs
+    blanked. The hex strings keep their lengths, so the xref stays valid.
+    """
+    if _ID_RE.search(data) is None:
+        return data
+    blank = _ID_RE.sub(b"/ID[<><>]", data)
+    digest = hashlib.sha256(blank).hexdigest().upper().encode("ascii")
+
+    def fill(m: re.Match) -> bytes:
+        out = bytearray(m.group(0))
+        for g in (1, 2):
+            start, end = m.start(g) - m.start(), m.end(g) - m.start()
+            out[start:end] = (digest * (1 + (end - start) // len(digest)))[:end - start]
+        return bytes(out)
+    return _ID_RE.sub(fill, data)
+
+def pin_file(pdf: Path) -> bool:
+    """
+    pin_id() on a file, rewriting it only if it changes. True if it did.
+    """
+    data = pdf.read_bytes()
+    pinned = pin_id(data)
+    if pinned == data:
+        return False
+    pdf.write_bytes(pinned)
+    return True
+
+def write_manifest(root: Path) -> Path:
+    """
+    root/SHA256SUMS in `sha256sum` format, for every file below root.
+    """
+    lines = [
+        f"{file_hash(p)}  {p.relative_to(root).as_posix()}"
+        for p in sorted(root.rglob("*"))
+        if p.is_file() and p.name != MANIFEST and not p.name.startswith(".")
+    ]
+    out = root / MANIFEST
+    publish_bytes(("\n".join(lines) + "\n").encode("utf-8"), out)
+    return out
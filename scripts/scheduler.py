@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded-concurrency subprocess scheduling for the xelatex batch mode.
+
+Jobs are coroutines run under a semaphore, so at most N compilers are alive
+at once. Every command runs in its own session with a wall-clock limit and,
+on POSIX, an address-space limit (RLIMIT_AS); a job that overruns either is
+killed together with its children and reported as a failure. Output is read
+line by line and written to the job's log as it arrives instead of being
+buffered until the process exits.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TextIO
+import asyncio
+import os
+import signal
+import subprocess
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Generous for a CV; a healthy run takes a few seconds per pass
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MEM_MB = 2048
+# Output that means a process ran out of memory (as opposed to a LaTeX error)
+OOM_MARKERS = ("TeX capacity exceeded", "Cannot allocate memory", "out of memory", "MemoryError")
+
+class JobKilled(RuntimeError):
+    pass
+
+@dataclass
+class Limits:
+    timeout: float | None = DEFAULT_TIMEOUT
+    mem_bytes: int | None = DEFAULT_MEM_MB * 2**20
+
+    def preexec(self) -> Callable[[], None] | None:
+        if self.mem_bytes is None or resource is None:
+            return None
+        mem = self.mem_bytes
+
+        def limit() -> None:
+            resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+        return limit
+
+    def apply(self, pid: int) -> None:
+        """
+        Set the memory limit on an already started process. For callers off the
+        main thread, where preexec_fn is unsafe; needs Linux's prlimit(2).
+        """
+        if self.mem_bytes is None or resource is None or not hasattr(resource, "prlimit"):
+            return
+        try:
+            resource.prlimit(pid, resource.RLIMIT_AS, (self.mem_bytes, self.mem_bytes))
+        except (ProcessLookupError, PermissionError):
+            pass
+
+def kill_group(proc: asyncio.subprocess.Process | subprocess.Popen) -> None:
+    # The command runs in its own session, so this also reaches any children it spawned
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+async def _pump(stream: asyncio.StreamReader, log: TextIO | None, echo: TextIO | None, prefix: str) -> list[str]:
+    """
+    Copy the process output to `log` (and `echo`, prefixed) line by line.
+    Only the last lines are kept in memory, for the error message.
+    """
+    tail: list[str] = []
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            return tail
+        line = raw.decode("utf-8", errors="replace")
+        if log is not None:
+            log.write(line)
+        if echo is not None:
+            echo.write(prefix + line)
+        tail.append(line.rstrip("\n"))
+        if len(tail) > 20:
+            del tail[0]
+
+async def run_limited(cmd: list[str], cwd: Path, limits: Limits, env: dict[str, str] | None = None,
+                      log: TextIO | None = None, echo: TextIO | None = None, prefix: str = "") -> None:
+    """
+    Run cmd under `limits`, streaming its output. Raises JobKilled when the
+    wall-clock limit is hit and RuntimeError on a non-zero exit.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=str(cwd), env=env,
+        stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True, preexec_fn=limits.preexec())
+    pump = asyncio.create_task(_pump(proc.stdout, log, echo, prefix))
+    try:
+        await asyncio.wait_for(proc.wait(), limits.timeout)
+    except asyncio.TimeoutError:
+        kill_group(proc)
+        await proc.wait()
+        pump.cancel()
+        raise JobKilled(f"killed after {limits.timeout:g}s wall clock: {' '.join(cmd)}")
+    except BaseException:
+        kill_group(proc)
+        await proc.wait()
+        pump.cancel()
+        raise
+    tail = await pump
+
+    if proc.returncode != 0:
+        if proc.returncode < 0:
+            why = f"killed by signal {-proc.returncode}"
+        else:
+            why = f"exit code {proc.returncode}"
+        # Only blame the memory limit when the failure looks like hitting it
+        out_of_memory = proc.returncode < 0 or any(m in line for line in tail for m in OOM_MARKERS)
+        if out_of_memory and limits.mem_bytes is not None and resource is not None:
+            why += f", memory limit {limits.mem_bytes // 2**20} MiB"
+        raise RuntimeError(f"Command failed ({why}): {' '.join(cmd)}\n" + "\n".join(tail))
+
+async def bounded(jobs: list[Callable[[], Awaitable[Any]]], concurrency: int) -> list[Any]:
+    """
+    Await every job with at most `concurrency` running at a time.
+    Results (or the exception a job raised) come back in input order.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(job: Callable[[], Awaitable[Any]]) -> Any:
+        async with sem:
+            return await job()
+
+    return await asyncio.gather(*(one(j) for j in jobs), return_exceptions=True)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Schema check for content.yml, run on every load before anything is rendered.
+
+SCHEMA lists every key the renderers read. compile_schema() turns it once
+into nested check functions, so checking a document is a single walk over
+the parsed data that collects every problem instead of stopping at the
+first. Line numbers are only looked up when there is something to report:
+the text is then composed again (yaml.compose, no object construction) and
+each problem's path followed down the node tree.
+
+Run directly to lint content files:
+
+  python scripts/schema.py content.yml
+  content.yml:27:5: education[0]: unknown key 'Research Aera' (did you mean 'Research Area'?)
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import difflib
+import sys
+
+from loader import SafeLoader, load_content, yaml
+
+# A problem is (path, message); the path is a tuple of mapping keys and list indices
+Problem = tuple[tuple, str]
+Check = Callable[[Any, tuple, list], None]
+
+STR = "scalar"               # string, number, date, ... or null
+STRS = [STR]                 # list of scalars
+STR_OR_STRS = "scalar or list"
+# A dict spec lists the allowed keys; {str: spec} allows any key
+
+EDUCATION = {"institution": STR, "location": STR, "degree": STR, "department": STR, "period": STR,
+             "gpa": STR, "Research Area": STR, "Advisor": STR}
+PUBLICATION = {"title": STR, "authors": STRS, "venue": STR, "year": STR, "note": STR,
+               "volume": STR, "pages": STR, "doi": STR}
+EXPERIENCE = {"organization": STR, "role": STR, "period": STR, "details": STRS}
+FUNDED_PROJECT = {"sponsor": STR, "title": STR, "projects": STRS}
+REFERENCE = {"name": STR, "title": STR, "affiliation": STR, "email": STR}
+
+SCHEMA = {
+    "name": STR,
+    "location": STR,
+    "email": STRS,
+    "phone": STRS,
+    "links": {"website": STR, "pdf": STR},
+    "highlight_names": STR_OR_STRS,
+    "education": [EDUCATION],
+    "publications": [PUBLICATION],
+    "experience": [EXPERIENCE],
+    "funded_projects": [FUNDED_PROJECT],
+    "industry_experience": [EXPERIENCE],
+    "honors_awards": STRS,
+    "skills": {str: STRS},
+    "references": [REFERENCE],
+}
+
+_CONTAINERS = (dict, list)
+# Exact types for the fast paths: YAML only ever builds plain dicts and lists
+_CONTAINER_TYPES = frozenset(_CONTAINERS)
+
+# The model reads a null or empty-list mapping as empty (e.g. `skills: []`)
+_EMPTY_LIST: list = []
+
+def _kind(v: Any) -> str:
+    return "mapping" if isinstance(v, dict) else "list" if isinstance(v, list) else type(v).__name__
+
+def _unknown(key: Any, known: tuple[str, ...]) -> str:
+    msg = f"unknown key {key!r}"
+    folded = {k.casefold(): k for k in known}
+    close = difflib.get_close_matches(str(key).casefold(), list(folded), n=1, cutoff=0.6)
+    return msg + (f" (did you mean {folded[close[0]]!r}?)" if close else "")
+
+def _check_scalar(v: Any, path: tuple, errs: list) -> None:
+    if isinstance(v, _CONTAINERS):
+        errs.append((path, f"expected a single value, got a {_kind(v)}"))
+
+def _list_of(item: Check) -> Check:
+    def check(v: Any, path: tuple, errs: list) -> None:
+        if v is None:
+            return
+        if not isinstance(v, list):
+            errs.append((path, f"expected a list, got {_kind(v)}"))
+            return
+        for i, x in enumerate(v):
+            item(x, (*path, i), errs)
+    return check
+
+def _list_of_scalars(v: Any, path: tuple, errs: list) -> None:
+    if v is None:
+        return
+    if not isinstance(v, list):
+        errs.append((path, f"expected a list, got {_kind(v)}"))
+        return
+    if _CONTAINER_TYPES.isdisjoint(map(type, v)):
+        return
+    for i, x in enumerate(v):
+        if isinstance(x, _CONTAINERS):
+            errs.append(((*path, i), f"expected a single value, got a {_kind(x)}"))
+
+def _scalar_or_list(v: Any, path: tuple, errs: list) -> None:
+    (_list_of_scalars if isinstance(v, list) else _check_scalar)(v, path, errs)
+
+def _mapping(fields: dict[str, Any]) -> Check:
+    # Scalar fields are checked inline; only nested specs get a function call
+    scalars = frozenset(k for k, s in fields.items() if s == STR)
+    nested = {k: compile_schema(s) for k, s in fields.items() if s != STR}
+    known = tuple(fields)
+
+    def check(v: Any, path: tuple, errs: list) -> None:
+        if v is None or v == _EMPTY_LIST:
+            return
+        if not isinstance(v, dict):
+            errs.append((path, f"expected a mapping, got {_kind(v)}"))
+            return
+        for k, x in v.items():
+            f = nested.get(k)
+            if f is not None:
+                f(x, (*path, k), errs)
+            elif k not in scalars:
+                errs.append(((*path, k), _unknown(k, known)))
+            elif type(x) in _CONTAINER_TYPES:
+                errs.append(((*path, k), f"expected a single value, got a {_kind(x)}"))
+    return check
+
+def _open_mapping(value: Check) -> Check:
+    def check(v: Any, path: tuple, errs: list) -> None:
+        if v is None or v == _EMPTY_LIST:
+            return
+        if not isinstance(v, dict):
+            errs.append((path, f"expected a mapping, got {_kind(v)}"))
+            return
+        for k, x in v.items():
+            value(x, (*path, k), errs)
+    return check
+
+def compile_schema(spec: Any) -> Check:
+    if spec == STR:
+        return _check_scalar
+    if spec == STRS:
+        return _list_of_scalars
+    if spec == STR_OR_STRS:
+        return _scalar_or_list
+    if isinstance(spec, list):
+        return _list_of(compile_schema(spec[0]))
+    if isinstance(spec, dict):
+        if list(spec) == [str]:
+            return _open_mapping(compile_schema(spec[str]))
+        return _mapping(spec)
+    raise TypeError(f"bad schema spec: {spec!r}")
+
+_check_content = compile_schema(SCHEMA)
+
+def check(data: Any) -> list[Problem]:
+    """
+    Every problem in the parsed content, in document order.
+    """
+    if data is None:
+        return []
+    errs: list[Problem] = []
+    if not isinstance(data, dict):
+        return [((), f"expected a mapping at the top level, got {_kind(data)}")]
+    _check_content(data, (), errs)
+    return errs
+
+def format_path(path: tuple) -> str:
+    out = ""
+    for p in path:
+        out += f"[{p}]" if isinstance(p, int) else (f".{p}" if out else str(p))
+    return out or "content"
+
+def _find(node: yaml.Node, path: tuple) -> yaml.Node:
+    """
+    The value node at `path`, or the deepest node along it that exists.
+    """
+    for p in path:
+        if isinstance(node, yaml.MappingNode):
+            child = next((v for k, v in node.value if k.value == str(p)), None)
+            if child is None:
+                break
+            node = child
+        elif isinstance(node, yaml.SequenceNode) and isinstance(p, int) and p < len(node.value):
+            node = node.value[p]
+        else:
+            break
+    return node
+
+def _key_node(root: yaml.Node, path: tuple) -> yaml.Node | None:
+    parent = _find(root, path[:-1])
+    if isinstance(parent, yaml.MappingNode):
+        return next((k for k, _ in parent.value if k.value == str(path[-1])), None)
+    return None
+
+def locate(text: str, problems: list[Problem]) -> list[tuple[int, int] | None]:
+    """
+    1-based (line, column) of each problem, or None when it cannot be placed.
+    Unknown keys point at the key, everything else at the offending value.
+    """
+    try:
+        root = yaml.compose(text, Loader=SafeLoader)
+    except yaml.YAMLError:
+        root = None
+    if root is None:
+        return [None] * len(problems)
+    out = []
+    for path, msg in problems:
+        node = (_key_node(root, path) if path and msg.startswith("unknown key") else None) or _find(root, path)
+        out.append((node.start_mark.line + 1, node.start_mark.column + 1))
+    return out
+
+def report(path: Path, text: str, problems: list[Problem]) -> list[str]:
+    """
+    One "file:line:col: where: message" line per problem.
+    """
+    lines = []
+    for (where, msg), pos in zip(problems, locate(text, problems)):
+        loc = f"{path}:{pos[0]}:{pos[1]}" if pos else str(path)
+        lines.append(f"{loc}: {format_path(where)}: {msg}")
+    return lines
+
+def validate(path: Path, data: Any) -> list[str]:
+    """
+    Check content already loaded from `path`. The file is only read again
+    (to find line numbers) when there are problems.
+    """
+    problems = check(data)
+    if not problems:
+        return []
+    return report(path, path.read_text(encoding="utf-8"), problems)
+
+def file_problems(files: list[Path], content_cache: Path | None = None) -> dict[Path, list[str]]:
+    """
+    The problems of every file in `files` that has any, in input order; for
+    batch builds that set invalid inputs aside before starting any compile.
+    """
+    out = {}
+    for f in files:
+        try:
+            lines = validate(f, load_content(f, content_cache))
+        except (OSError, yaml.YAMLError) as e:
+            lines = [f"{f}: {e}"]
+        if lines:
+            out[f] = lines
+    return out
+
+def validate_files(files: list[Path], content_cache: Path | None = None) -> list[str]:
+    """
+    Problems in all `files`, each file's list headed by a count line.
+    """
+    out = []
+    for f, lines in file_problems(files, content_cache).items():
+        out.append(f"{f}: {len(lines)} problem(s)")
+        out.extend(lines)
+    return out
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Check content YAML files against the resume schema.")
+    ap.add_argument("files", nargs="*", type=Path, default=[Path("content.yml")],
+                    help="content files (default: content.yml)")
+    args = ap.parse_args(argv)
+    problems = validate_files(args.files)
+    for line in problems:
+        print(line, file=sys.stderr)
+    if problems:
+        sys.exit(1)
+    print(f"{len(args.files)} file(s) ok")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local preview server.
+
+  python scripts/serve.py [--port 8000] [content.yml]
+
+index.html is rendered in memory from the content file and re-rendered only
+when that file changes; cv.pdf is served from site/cv.pdf (build it with
+build_pdf.py or `build.py --watch`). Responses carry strong ETags derived
+from the content hash, honour If-None-Match with 304s, and are precompressed
+once per version with gzip (and brotli when the module is installed).
+"""
+
+from __future__ import annotations
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+import argparse
+import gzip
+import hashlib
+import sys
+import threading
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+import build_web
+from fragments import MemoryFragmentCache
+from model import load_document
+from watch import snapshot
+
+ROOT = Path(__file__).resolve().parents[1]
+CONTENT = ROOT / "content.yml"
+OUT_PDF = ROOT / "site" / "cv.pdf"
+# Below this, compression costs more than it saves
+MIN_COMPRESS = 512
+
+class Asset:
+    """
+    One version of a response body plus its precompressed variants.
+    """
+    __slots__ = ("content_type", "etag", "variants")
+
+    def __init__(self, body: bytes, content_type: str):
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS and not content_type.startswith("application/pdf"):
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+
+    def pick(self, accept_encoding: str) -> tuple[str, bytes, str]:
+        """
+        (encoding, body, strong ETag) for the client's Accept-Encoding.
+        Each encoding is a different representation, so it gets its own ETag.
+        """
+        accepted = {tok.split(";")[0].strip() for tok in accept_encoding.lower().split(",")}
+        for enc in ("br", "gzip"):
+            if enc in self.variants and enc in accepted:
+                return enc, self.variants[enc], f'"{self.etag}-{enc}"'
+        return "identity", self.variants["identity"], f'"{self.etag}"'
+
+def none_match(if_none_match: str, etag: str) -> bool:
+    """
+    True when an If-None-Match header value matches `etag`. The header is a
+    comma-separated list (or "*"), compared weakly as RFC 7232 3.2 requires:
+    a W/ prefix on either side is ignored.
+    """
+    ours = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == ours:
+            return True
+    return False
+
+class Source:
+    """
+    Rebuild an Asset only when the watched files change.
+    """
+    def __init__(self, paths: list[Path], build: Callable[[], Asset]):
+        self.paths = paths
+        self.build = build
+        self.lock = threading.Lock()
+        self.stamp: tuple | None = None
+        self.asset: Asset | None = None
+
+    def get(self) -> Asset:
+        with self.lock:
+            stamp = snapshot(self.paths)
+            if self.asset is None or stamp != self.stamp:
+                self.asset = self.build()
+                self.stamp = stamp
+            return self.asset
+
+def make_sources(content: Path, pdf: Path) -> dict[str, Source]:
+    # Shared across re-renders so only the sections that changed are rendered again
+    fragments = MemoryFragmentCache("web", build_web.RENDERER_VERSION)
+
+    def index() -> Asset:
+        html = build_web.render_html(load_document(content), fragments)
+        print(f"Rendered index.html from {content}", file=sys.stderr)
+        return Asset(html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def cv() -> Asset:
+        return Asset(pdf.read_bytes(), "application/pdf")
+
+    index_src = Source([content], index)
+    return {"/": index_src, "/index.html": index_src, "/cv.pdf": Source([pdf], cv)}
+
+class Handler(BaseHTTPRequestHandler):
+    sources: dict[str, Source] = {}
+
+    def do_HEAD(self) -> None:
+        self.respond(head=True)
+
+    def do_GET(self) -> None:
+        self.respond(head=False)
+
+    def respond(self, head: bool) -> None:
+        src = self.sources.get(self.path.split("?", 1)[0])
+        if src is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            asset = src.get()
+        except FileNotFoundError as e:
+            self.send_error(HTTPStatus.NOT_FOUND, explain=f"{e.filename} does not exist yet; build it first")
+            return
+        except Exception as e:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, explain=f"{type(e).__name__}: {e}")
+            return
+
+        encoding, body, etag = asset.pick(self.headers.get("Accept-Encoding", ""))
+        # Several If-None-Match headers are equivalent to one joined with commas
+        not_modified = none_match(",".join(self.headers.get_all("If-None-Match", [])), etag)
+
+        self.send_response(HTTPStatus.NOT_MODIFIED if not_modified else HTTPStatus.OK)
+        self.send_header("ETag", etag)
+        # Always revalidate; the ETag makes that a cheap 304
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", asset.content_type)
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Serve a live preview of the resume.")
+    ap.add_argument("content", nargs="?", type=Path, default=CONTENT, help="content YAML (default: content.yml)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--pdf", type=Path, default=OUT_PDF, help="PDF to serve as /cv.pdf (default: site/cv.pdf)")
+    args = ap.parse_args(argv)
+
+    Handler.sources = make_sources(args.content, args.pdf)
+    with ThreadingHTTPServer((args.host, args.port), Handler) as srv:
+        print(f"Serving http://{args.host}:{srv.server_address[1]}/ (Ctrl-C to stop)")
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Page layouts with named __SLOT__ placeholders, compiled once.
+
+compile_template() splits a layout once into its literal text and slot
+names. fill() is then a single "".join over literals and values: the layout
+is copied once and slot values are never scanned again (a value that happens
+to contain "__BODY__" stays as it is). write() streams the same layout into
+a file; slot values may then be iterables of strings.
+
+Slot names are upper case: __NAME__, __HEADER__, __BODY__, ...
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, TextIO, Union
+import re
+
+SLOT_RE = re.compile(r"__([A-Z][A-Z0-9_]*?)__")
+
+SlotValue = Union[str, Iterable[str]]
+
+class TemplateError(ValueError):
+    pass
+
+class Template:
+    __slots__ = ("name", "source", "literals", "slots")
+
+    def __init__(self, name: str, source: str, literals: list[str], slots: list[str]):
+        self.name = name
+        self.source = source
+        # literals[i] precedes slots[i]; the last literal follows the last slot
+        self.literals = tuple(literals)
+        self.slots = tuple(slots)
+
+    def check(self, known: Iterable[str], required: Iterable[str] = ()) -> Template:
+        """
+        Fail on slots the renderer does not provide and on required slots that are missing.
+        """
+        known = set(known)
+        unknown = sorted(set(self.slots) - known)
+        if unknown:
+            raise TemplateError(f"{self.name}: unknown slot(s) {', '.join(f'__{s}__' for s in unknown)}; "
+                                f"available: {', '.join(f'__{s}__' for s in sorted(known))}")
+        missing = [s for s in required if s not in self.slots]
+        if missing:
+            raise TemplateError(f"{self.name}: missing required slot(s) {', '.join(f'__{s}__' for s in missing)}")
+        return self
+
+    def fill(self, **values: str) -> str:
+        out: list[str] = []
+        push = out.append
+        try:
+            for lit, slot in zip(self.literals, self.slots):
+                push(lit)
+                push(values[slot])
+        except KeyError as e:
+            raise TemplateError(f"{self.name}: no value for slot __{e.args[0]}__") from None
+        push(self.literals[-1])
+        return "".join(out)
+
+    def write(self, out: TextIO, **values: SlotValue) -> None:
+        """
+        Stream the layout into `out`. A slot value that is not a str is
+        iterated and its pieces written as they are produced.
+        """
+        w = out.write
+        for lit, slot in zip(self.literals, self.slots):
+            w(lit)
+            v = values[slot]
+            if isinstance(v, str):
+                w(v)
+            else:
+                for piece in v:
+                    w(piece)
+        w(self.literals[-1])
+
+def compile_template(text: str, name: str = "<template>") -> Template:
+    literals: list[str] = []
+    slots: list[str] = []
+    pos = 0
+    for m in SLOT_RE.finditer(text):
+        literals.append(text[pos:m.start()])
+        slots.append(m.group(1))
+        pos = m.end()
+    literals.append(text[pos:])
+    return Template(name, text, literals, slots)
+
+def load_template(path: Path, known: Iterable[str], required: Iterable[str] = ()) -> Template:
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise TemplateError(f"cannot read template {path}: {e.strerror}") from None
+    return compile_template(text, str(path)).check(known, required)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precompiled xelatex format for the fixed part of the CV preamble.
+
+Everything in the template before the \\endofdump marker (document class,
+geometry, hyperref, enumitem and the section/list setup) is dumped once with
+mylatexformat into a .fmt file keyed on the preamble and engine version.
+Later compiles load that format instead of re-reading the packages. Fonts are
+selected after the marker because XeTeX cannot store native fonts in a format.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from templates import TemplateError
+
+ROOT = Path(__file__).resolve().parents[1]
+FMT_DIR = ROOT / ".cache" / "fmt"
+FMT_NAME = "cvpreamble"
+# A no-op in normal runs; mylatexformat stops dumping here
+ENDOFDUMP = r"\csname endofdump\endcsname"
+
+def split_preamble(template: str) -> str:
+    """
+    Return the dumpable part of the template, up to and including the marker.
+    Builders call this while loading the template, so --fmt with a template
+    that lacks the marker fails up front with a TemplateError.
+    """
+    i = template.find(ENDOFDUMP)
+    if i < 0:
+        raise TemplateError(f"TeX template has no {ENDOFDUMP} marker, so --fmt is unavailable; "
+                            "add it after the fixed part of the preamble, or drop --fmt")
+    return template[: i + len(ENDOFDUMP)] + "\n"
+
+def format_dir(template: str, engine: str) -> Path:
+    key = hashlib.sha256((engine + "\0" + split_preamble(template)).encode("utf-8")).hexdigest()
+    return FMT_DIR / key[:16]
+
+def format_env(fmt_dir: Path) -> dict[str, str]:
+    # Trailing separator keeps kpathsea's default format search path
+    return dict(os.environ, TEXFORMATS=f"{fmt_dir}{os.pathsep}")
+
+def ensure_format(template: str, engine: str, verbose: bool = True) -> Path | None:
+    """
+    Dump the preamble format if it is not cached yet. Returns the directory holding
+    FMT_NAME.fmt, or None if dumping failed (callers then compile without it).
+    """
+    dest = format_dir(template, engine)
+    if (dest / f"{FMT_NAME}.fmt").exists():
+        return dest
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    work = Path(tempfile.mkdtemp(dir=dest.parent, prefix="dump-"))
+    try:
+        (work / "preamble.tex").write_text(split_preamble(template), encoding="utf-8")
+        cmd = ["xelatex", "-ini", "-interaction=nonstopmode", f"-jobname={FMT_NAME}",
+               "&xelatex", "mylatexformat.ltx", "preamble.tex"]
+        p = subprocess.run(cmd, cwd=str(work), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        if p.returncode != 0 or not (work / f"{FMT_NAME}.fmt").exists():
+            tail = "\n".join(p.stdout.splitlines()[-10:])
+            print(f"Could not dump preamble format, compiling without it:\n{tail}", file=sys.stderr)
+            return None
+        try:
+            work.rename(dest)
+        except OSError:
+            # Another process dumped the same format first
+            if not (dest / f"{FMT_NAME}.fmt").exists():
+                raise
+        if verbose:
+            print(f"Dumped preamble format {dest / FMT_NAME}.fmt")
+        return dest
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in timers and counters for the build pipeline (--profile).
+
+Instrumented code wraps a stage in `with span("name"):` and bumps counters
+with count(). Until enable() is called, span() returns one shared no-op
+context manager and count() returns at once, so the instrumentation left in
+the hot paths costs a function call per stage or section.
+
+When enabled, every span is recorded with its thread; at exit a per-stage
+breakdown is printed to stderr and, if a path was given, the spans are
+written as Chrome trace-event JSON (load it in chrome://tracing or Perfetto).
+"""
+
+from __future__ import annotations
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+ENABLED = False
+_NULL = nullcontext()
+_origin = 0
+# (name, category, start ns, duration ns, thread id)
+_spans: list[tuple[str, str, int, int, int]] = []
+_counts: dict[str, int] = {}
+# Called at report time to add counters that are cheaper to read once than to bump per call
+_collectors: list[Callable[[], dict[str, int]]] = []
+
+class _Span:
+    __slots__ = ("name", "cat", "t0")
+
+    def __init__(self, name: str, cat: str):
+        self.name = name
+        self.cat = cat
+
+    def __enter__(self) -> _Span:
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        t1 = time.perf_counter_ns()
+        # list.append is atomic, so spans from worker threads need no lock
+        _spans.append((self.name, self.cat, self.t0, t1 - self.t0, threading.get_ident()))
+
+def span(name: str, cat: str = "stage"):
+    if not ENABLED:
+        return _NULL
+    return _Span(name, cat)
+
+def count(name: str, n: int = 1) -> None:
+    if ENABLED:
+        _counts[name] = _counts.get(name, 0) + n
+
+def collect(fn: Callable[[], dict[str, int]]) -> None:
+    _collectors.append(fn)
+
+def enable(trace: Path | None = None) -> None:
+    """
+    Start recording. The report is printed (and the trace written) at exit,
+    so early returns and sys.exit() in the builders are covered too.
+    """
+    global ENABLED, _origin
+    ENABLED = True
+    _origin = time.perf_counter_ns()
+    atexit.register(finish, trace)
+
+def report() -> str:
+    total = time.perf_counter_ns() - _origin
+    stats: dict[tuple[str, str], list[int]] = {}
+    for name, cat, _, dur, _ in sorted(_spans, key=lambda s: s[2]):
+        s = stats.setdefault((cat, name), [0, 0])
+        s[0] += 1
+        s[1] += dur
+
+    lines = [f"{'stage':<34} {'calls':>6} {'total ms':>10} {'mean ms':>9} {'% wall':>7}"]
+    for (cat, name), (calls, dur) in stats.items():
+        label = f"{cat}:{name}"
+        lines.append(f"{label:<34} {calls:>6} {dur / 1e6:>10.2f} {dur / calls / 1e6:>9.3f} {100 * dur / total:>6.1f}%")
+    lines.append(f"{'wall':<34} {'':>6} {total / 1e6:>10.2f}")
+
+    counters = dict(_counts)
+    for fn in _collectors:
+        counters.update(fn())
+    if counters:
+        lines.append("")
+        lines.extend(f"{name:<34} {n:>6}" for name, n in counters.items())
+    return "\n".join(lines)
+
+def trace_events() -> dict:
+    pid = os.getpid()
+    threads: dict[int, int] = {}
+    events = []
+    for name, cat, t0, dur, ident in _spans:
+        tid = threads.setdefault(ident, len(threads))
+        events.append({"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                       "ts": (t0 - _origin) / 1e3, "dur": dur / 1e3})
+    events.sort(key=lambda e: e["ts"])
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def finish(trace: Path | None = None) -> None:
+    print("\n" + report(), file=sys.stderr)
+    if trace is not None:
+        trace.parent.mkdir(parents=True, exist_ok=True)
+        trace.write_text(json.dumps(trace_events()), encoding="utf-8")
+        print(f"Wrote trace {trace}", file=sys.stderr)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Minimal TrueType reader and subsetter for embedding fonts in the TeX-free
+PDF engine (pdfwriter.py).
+
+TrueType reads what embedding needs: the Unicode cmap, advance widths, the
+descriptor metrics and the glyph outlines. subset() writes a font with only
+the glyphs in use (plus the components of composite glyphs): every other
+glyph is emptied but keeps its id, so a PDF can address glyphs by their
+original ids (CIDToGIDMap /Identity). Hinting tables are kept; names,
+layout and the cmap are dropped, since the PDF maps codes to glyphs itself.
+
+Only glyf-outline fonts are handled. CFF-flavoured OpenType (.otf) and
+collections (.ttc) raise FontError.
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+import struct
+
+# Tables a PDF viewer needs from an embedded TrueType font (PDF 32000, 9.9)
+KEEP_TABLES = ("head", "hhea", "maxp", "hmtx", "loca", "glyf", "cvt ", "fpgm", "prep")
+
+# Composite glyph flags
+_ARGS_ARE_WORDS = 0x0001
+_HAVE_SCALE = 0x0008
+_MORE_COMPONENTS = 0x0020
+_HAVE_XY_SCALE = 0x0040
+_HAVE_2X2 = 0x0080
+
+class FontError(ValueError):
+    pass
+
+def _checksum(data: bytes) -> int:
+    data += b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+class TrueType:
+    def __init__(self, data: bytes, name: str = "font"):
+        if data[:4] == b"OTTO":
+            raise FontError(f"{name}: CFF-based OpenType fonts are not supported, use a TrueType (.ttf) font")
+        if data[:4] == b"ttcf":
+            raise FontError(f"{name}: font collections are not supported, use a single .ttf")
+        if data[:4] not in (b"\0\1\0\0", b"true"):
+            raise FontError(f"{name}: not a TrueType font")
+        self.name = name
+        self.data = data
+        self.tables: dict[str, tuple[int, int]] = {}
+        (count,) = struct.unpack_from(">H", data, 4)
+        for i in range(count):
+            tag, _, offset, length = struct.unpack_from(">4sIII", data, 12 + 16 * i)
+            self.tables[tag.decode("latin-1")] = (offset, length)
+        missing = [t for t in ("head", "hhea", "maxp", "hmtx", "loca", "glyf", "cmap") if t not in self.tables]
+        if missing:
+            raise FontError(f"{name}: missing tables {', '.join(missing)}")
+        try:
+            self._parse()
+        except struct.error:
+            raise FontError(f"{name}: truncated or corrupt font") from None
+        if self.embedding & 0x000F == 0x0002:
+            raise FontError(f"{name}: the font's license does not allow embedding")
+
+    def table(self, tag: str) -> bytes:
+        offset, length = self.tables[tag]
+        return self.data[offset:offset + length]
+
+    def _parse(self) -> None:
+        head = self.table("head")
+        self.units_per_em, = struct.unpack_from(">H", head, 18)
+        self.bbox = struct.unpack_from(">4h", head, 36)
+        long_loca = struct.unpack_from(">h", head, 50)[0] == 1
+        self.ascent, self.descent = struct.unpack_from(">hh", self.table("hhea"), 4)
+        num_metrics, = struct.unpack_from(">H", self.table("hhea"), 34)
+        self.num_glyphs, = struct.unpack_from(">H", self.table("maxp"), 4)
+
+        hmtx = self.table("hmtx")
+        advances = [struct.unpack_from(">H", hmtx, 4 * i)[0] for i in range(num_metrics)]
+        self.advances = advances + [advances[-1]] * (self.num_glyphs - num_metrics)
+
+        loca = self.table("loca")
+        n = self.num_glyphs + 1
+        self.loca = list(struct.unpack_from(f">{n}I", loca)) if long_loca else [2 * x for x in struct.unpack_from(f">{n}H", loca)]
+
+        self.cmap = self._parse_cmap(self.table("cmap"))
+        if not self.cmap:
+            raise FontError(f"{self.name}: no Unicode cmap")
+
+        self.italic_angle = 0.0
+        if "post" in self.tables:
+            self.italic_angle = struct.unpack_from(">i", self.table("post"), 4)[0] / 65536.0
+        self.cap_height = self.ascent
+        self.weight = 400
+        self.embedding = 0
+        if "OS/2" in self.tables:
+            os2 = self.table("OS/2")
+            self.weight, = struct.unpack_from(">H", os2, 4)
+            self.embedding, = struct.unpack_from(">H", os2, 8)
+            if struct.unpack_from(">H", os2, 0)[0] >= 2 and len(os2) >= 90:
+                self.cap_height, = struct.unpack_from(">h", os2, 88)
+        self.postscript_name = self._parse_name(6) or "Embedded"
+
+    @staticmethod
+    def _parse_cmap(cmap: bytes) -> dict[int, int]:
+        subtables = {}
+        (count,) = struct.unpack_from(">H", cmap, 2)
+        for i in range(count):
+            platform, encoding, offset = struct.unpack_from(">HHI", cmap, 4 + 8 * i)
+            subtables[(platform, encoding)] = offset
+        # Full Unicode first, then the BMP
+        for key in ((3, 10), (0, 4), (0, 6), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)):
+            offset = subtables.get(key)
+            if offset is None:
+                continue
+            fmt, = struct.unpack_from(">H", cmap, offset)
+            if fmt == 12:
+                n, = struct.unpack_from(">I", cmap, offset + 12)
+                out = {}
+                for j in range(n):
+                    start, end, gid = struct.unpack_from(">III", cmap, offset + 16 + 12 * j)
+                    for cp in range(start, end + 1):
+                        out[cp] = gid + cp - start
+                return out
+            if fmt == 4:
+                seg2, = struct.unpack_from(">H", cmap, offset + 6)
+                segs = seg2 // 2
+                ends = struct.unpack_from(f">{segs}H", cmap, offset + 14)
+                starts = struct.unpack_from(f">{segs}H", cmap, offset + 16 + seg2)
+                deltas = struct.unpack_from(f">{segs}h", cmap, offset + 16 + 2 * seg2)
+                range_at = offset + 16 + 3 * seg2
+                ranges = struct.unpack_from(f">{segs}H", cmap, range_at)
+                out = {}
+                for j in range(segs):
+                    for cp in range(starts[j], ends[j] + 1):
+                        if cp == 0xFFFF:
+                            continue
+                        if ranges[j]:
+                            at = range_at + 2 * j + ranges[j] + 2 * (cp - starts[j])
+                            gid, = struct.unpack_from(">H", cmap, at)
+                            if gid:
+                                gid = (gid + deltas[j]) & 0xFFFF
+                        else:
+                            gid = (cp + deltas[j]) & 0xFFFF
+                        if gid:
+                            out[cp] = gid
+                return out
+        return {}
+
+    def _parse_name(self, name_id: int) -> str:
+        if "name" not in self.tables:
+            return ""
+        name = self.table("name")
+        count, storage = struct.unpack_from(">2H", name, 2)
+        for i in range(count):
+            platform, encoding, _, nid, length, offset = struct.unpack_from(">6H", name, 6 + 12 * i)
+            if nid != name_id:
+                continue
+            raw = name[storage + offset:storage + offset + length]
+            text = raw.decode("utf-16-be", "replace") if platform in (0, 3) else raw.decode("latin-1")
+            # A PDF name: no spaces or delimiters
+            return "".join(c for c in text if c.isascii() and c.isalnum() or c in "-_")
+        return ""
+
+    def glyph(self, gid: int) -> bytes:
+        start, end = self.loca[gid], self.loca[gid + 1]
+        offset = self.tables["glyf"][0]
+        return self.data[offset + start:offset + end]
+
+    def components(self, gid: int) -> list[int]:
+        """
+        The glyphs a composite glyph is built from (none for a simple glyph).
+        """
+        g = self.glyph(gid)
+        if len(g) < 10 or struct.unpack_from(">h", g, 0)[0] >= 0:
+            return []
+        out = []
+        at = 10
+        while True:
+            flags, component = struct.unpack_from(">HH", g, at)
+            out.append(component)
+            at += 4 + (4 if flags & _ARGS_ARE_WORDS else 2)
+            if flags & _HAVE_SCALE:
+                at += 2
+            elif flags & _HAVE_XY_SCALE:
+                at += 4
+            elif flags & _HAVE_2X2:
+                at += 8
+            if not flags & _MORE_COMPONENTS:
+                return out
+
+    def closure(self, gids: set[int]) -> set[int]:
+        """
+        `gids` plus .notdef and every glyph a composite among them uses.
+        """
+        keep = {0}
+        todo = list(gids)
+        while todo:
+            gid = todo.pop()
+            if gid not in keep and gid < self.num_glyphs:
+                keep.add(gid)
+                todo.extend(self.components(gid))
+        return keep
+
+    def subset(self, gids: set[int]) -> bytes:
+        """
+        A font with only the glyphs `gids` (and what they need), under their original ids.
+        """
+        keep = self.closure(gids)
+        glyf = bytearray()
+        loca = [0]
+        hmtx = bytearray()
+        for gid in range(self.num_glyphs):
+            if gid in keep:
+                g = self.glyph(gid)
+                glyf += g + b"\0" * (-len(g) % 4)
+                lsb = struct.unpack_from(">h", g, 2)[0] if len(g) >= 10 else 0
+                hmtx += struct.pack(">Hh", self.advances[gid], lsb)
+            else:
+                hmtx += b"\0\0\0\0"
+            loca.append(len(glyf))
+        head = bytearray(self.table("head"))
+        head[8:12] = b"\0\0\0\0"            # checkSumAdjustment, set below
+        head[50:52] = struct.pack(">h", 1)  # long loca
+        hhea = bytearray(self.table("hhea"))
+        hhea[34:36] = struct.pack(">H", self.num_glyphs)  # every glyph gets a full metric
+        tables = {
+            "head": bytes(head),
+            "hhea": bytes(hhea),
+            "maxp": self.table("maxp"),
+            "hmtx": bytes(hmtx),
+            "loca": struct.pack(f">{len(loca)}I", *loca),
+            "glyf": bytes(glyf),
+        }
+        for tag in KEEP_TABLES:
+            if tag not in tables and tag in self.tables:
+                tables[tag] = self.table(tag)
+        return _font_file(tables)
+
+def _font_file(tables: dict[str, bytes]) -> bytes:
+    tags = sorted(tables)
+    n = len(tags)
+    entry_selector = n.bit_length() - 1
+    search_range = 16 << entry_selector
+    out = bytearray(struct.pack(">IHHHH", 0x00010000, n, search_range, entry_selector, 16 * n - search_range))
+    offset = 12 + 16 * n
+    body = bytearray()
+    for tag in tags:
+        data = tables[tag]
+        out += struct.pack(">4sIII", tag.encode("latin-1"), _checksum(data), offset + len(body), len(data))
+        body += data + b"\0" * (-len(data) % 4)
+    out += body
+    head_at = 12 + 16 * n + sum(len(tables[t]) + (-len(tables[t]) % 4) for t in tags[:tags.index("head")])
+    out[head_at + 8:head_at + 12] = struct.pack(">I", (0xB1B0AFBA - _checksum(bytes(out))) & 0xFFFFFFFF)
+    return bytes(out)
+
+@lru_cache(maxsize=8)
+def load(path: Path) -> TrueType:
+    """
+    The parsed font at `path`, read once per process.
+    """
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        raise FontError(f"{path}: {e.strerror}") from None
+    return TrueType(data, str(path))
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Render several variants of the CV from one parse of content.yml.
+
+variants.yml maps a variant name to the sections it shows and the entries it
+keeps:
+
+  academic: {}                         # the default page
+  industry:
+    sections: [education, experience, industry_experience, skills]
+  recent:
+    exclude: [references]
+    filters:
+      publications: {since: 2023, limit: 5}
+      experience: {since: 2021}
+
+`sections` lists body sections in page order (default: every section the
+normal build shows), `exclude` drops some of them. A filter keeps entries
+whose years (publication year, education/experience period, or years in an
+honors line) reach `since` / start by `until`, then the first `limit`;
+entries without a year are kept.
+
+The content is loaded once. All variants share one fragment cache per
+renderer, so a section that is the same in several variants is rendered
+once; the PDFs are then compiled in parallel. Output goes to
+site/<variant>/index.html and site/<variant>/cv.pdf.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any
+import argparse
+import asyncio
+import math
+import re
+import sys
+import time
+
+from batch import JobResult, default_workers, report
+import build_pdf
+import build_web
+from fragments import FRAGMENT_DIR, FragmentCache, MemoryFragmentCache
+from loader import CONTENT_CACHE_DIR, parse_yaml
+from model import DEFAULT_SECTIONS, SECTIONS, ContentError, Document, load_document
+from pdf_cache import CACHE_DIR, DEFAULT_MAX_BYTES, PdfCache
+import reproducible
+from scheduler import DEFAULT_MEM_MB, DEFAULT_TIMEOUT, Limits, bounded
+from templates import Template, TemplateError
+from tex_format import ensure_format, split_preamble
+import timing
+
+ROOT = Path(__file__).resolve().parents[1]
+CONTENT = ROOT / "content.yml"
+VARIANTS = ROOT / "variants.yml"
+OUT_PATTERN = "site/{name}"
+TEX_DIR = build_pdf.BUILD_DIR / "variants"
+
+VARIANT_KEYS = ("sections", "exclude", "filters")
+FILTER_KEYS = ("since", "until", "limit")
+_NAME_RE = re.compile(r"[A-Za-z0-9][\w.-]*")
+_YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+_PRESENT_RE = re.compile(r"\b(?:present|now|current)\b", re.I)
+
+class VariantError(ValueError):
+    pass
+
+@dataclass(slots=True)
+class EntryFilter:
+    since: int | None = None
+    until: int | None = None
+    limit: int | None = None
+
+@dataclass(slots=True)
+class Variant:
+    name: str
+    sections: list[str] = field(default_factory=lambda: list(DEFAULT_SECTIONS))
+    filters: dict[str, EntryFilter] = field(default_factory=dict)
+
+def _names(v: Any, where: str) -> list[str]:
+    if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+        raise VariantError(f"{where}: expected a list of section names")
+    unknown = [x for x in v if x not in SECTIONS]
+    if unknown:
+        raise VariantError(f"{where}: unknown section(s) {', '.join(unknown)}; available: {', '.join(SECTIONS)}")
+    return v
+
+def _filter(v: Any, where: str) -> EntryFilter:
+    if not isinstance(v, dict):
+        raise VariantError(f"{where}: expected a mapping with {', '.join(FILTER_KEYS)}")
+    f = EntryFilter()
+    for k, x in v.items():
+        if k not in FILTER_KEYS:
+            raise VariantError(f"{where}: unknown key {k!r}; expected {', '.join(FILTER_KEYS)}")
+        if not isinstance(x, int) or isinstance(x, bool) or x < 0:
+            raise VariantError(f"{where}.{k}: expected a non-negative integer, got {x!r}")
+        setattr(f, k, x)
+    return f
+
+def parse_variant(name: Any, spec: Any) -> Variant:
+    if not isinstance(name, str) or not _NAME_RE.fullmatch(name):
+        raise VariantError(f"{name!r}: variant names are used as directory names (letters, digits, . _ -)")
+    spec = spec or {}
+    if not isinstance(spec, dict):
+        raise VariantError(f"{name}: expected a mapping, got {type(spec).__name__}")
+    for k in spec:
+        if k not in VARIANT_KEYS:
+            raise VariantError(f"{name}: unknown key {k!r}; expected {', '.join(VARIANT_KEYS)}")
+
+    sections = _names(spec["sections"], f"{name}.sections") if "sections" in spec else list(DEFAULT_SECTIONS)
+    if "exclude" in spec:
+        drop = set(_names(spec["exclude"], f"{name}.exclude"))
+        sections = [s for s in sections if s not in drop]
+
+    filters = spec.get("filters") or {}
+    if not isinstance(filters, dict):
+        raise VariantError(f"{name}.filters: expected a mapping of section names")
+    _names(list(filters), f"{name}.filters")
+    if "skills" in filters:
+        raise VariantError(f"{name}.filters.skills: only list sections can be filtered")
+    return Variant(name, list(dict.fromkeys(sections)),
+                   {k: _filter(v, f"{name}.filters.{k}") for k, v in filters.items()})
+
+def load_variants(path: Path) -> list[Variant]:
+    try:
+        data = parse_yaml(path.read_text(encoding="utf-8"))
+    except OSError as e:
+        raise VariantError(f"cannot read {path}: {e.strerror}") from None
+    if not isinstance(data, dict) or not data:
+        raise VariantError(f"{path}: expected a mapping of variant names")
+    try:
+        return [parse_variant(name, spec) for name, spec in data.items()]
+    except VariantError as e:
+        raise VariantError(f"{path}: {e}") from None
+
+def entry_years(entry: Any) -> tuple[float, float] | None:
+    """
+    (first, last) year an entry covers; last is infinite for "... – Present".
+    None when the entry has no year.
+    """
+    s = entry if isinstance(entry, str) else getattr(entry, "year", "") or getattr(entry, "period", "")
+    years = [int(y) for y in _YEAR_RE.findall(s)]
+    if not years:
+        return None
+    return min(years), math.inf if _PRESENT_RE.search(s) else max(years)
+
+def filter_entries(entries: list, f: EntryFilter) -> list:
+    out = []
+    for e in entries:
+        span = entry_years(e)
+        if span is not None:
+            if f.since is not None and span[1] < f.since:
+                continue
+            if f.until is not None and span[0] > f.until:
+                continue
+        out.append(e)
+    return out if f.limit is None else out[:f.limit]
+
+def apply_variant(doc: Document, v: Variant) -> Document:
+    """
+    A shallow copy of `doc` showing only the variant's sections and entries.
+    Unfiltered sections are the same objects, so their fragments are shared.
+    """
+    changes = {name: filter_entries(getattr(doc, name), f) for name, f in v.filters.items()}
+    return replace(doc, sections=list(v.sections), **changes)
+
+def variant_dir(pattern: str, name: str) -> Path:
+    out = Path(pattern.format(name=name))
+    return out if out.is_absolute() else ROOT / out
+
+def write_variant(doc: Document, v: Variant, out_dir: Path, web_fragments: FragmentCache,
+                  tex_fragments: FragmentCache | None, html_layout: Template = build_web.HTML_LAYOUT,
+                  tex_layout: Template = build_pdf.TEX_LAYOUT) -> tuple[Path, Path | None]:
+    """
+    Write the variant's HTML and, with `tex_fragments`, its .tex. Returns both paths.
+    """
+    vdoc = apply_variant(doc, v)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    html = out_dir / "index.html"
+    with open(html, "w", encoding="utf-8", buffering=build_web.WRITE_BUFFER) as f:
+        build_web.write_html(vdoc, f, web_fragments, html_layout)
+    tex = None
+    if tex_fragments is not None:
+        tex = build_pdf.write_tex_doc(vdoc, TEX_DIR / v.name, tex_fragments, tex_layout)
+    return html, tex
+
+async def compile_variants(jobs: list[tuple[str, Path, Path]], concurrency: int, limits: Limits,
+                           **kwargs: Any) -> list[JobResult]:
+    """
+    Compile (name, tex, out_pdf) jobs with at most `concurrency` xelatex processes at once.
+    """
+    calls = [lambda name=name, tex=tex, out=out: build_pdf.compile_tex_job(tex, out, limits, name, **kwargs)
+             for name, tex, out in jobs]
+    results = await bounded(calls, concurrency)
+    return [
+        JobResult(tex, error=f"{type(r).__name__}: {r}") if isinstance(r, Exception) else JobResult(tex, r)
+        for (_, tex, _), r in zip(jobs, results)
+    ]
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Render every CV variant in a variants file from one parse of the content.")
+    ap.add_argument("spec", nargs="?", type=Path, default=VARIANTS, help="variants file (default: variants.yml)")
+    ap.add_argument("--content", type=Path, default=CONTENT, help="content YAML (default: content.yml)")
+    ap.add_argument("--only", action="append", default=[], metavar="NAME",
+                    help="build only this variant (repeatable)")
+    ap.add_argument("-o", "--out", default=OUT_PATTERN,
+                    help="output directory pattern with {name} (default: %(default)s)")
+    ap.add_argument("--no-pdf", action="store_true", help="only build the HTML")
+    ap.add_argument("-j", "--workers", type=int, default=0,
+                    help="concurrent xelatex jobs (0 = all cores, default: 0)")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                    help="kill an xelatex job after this many seconds, all passes included (0 = never, default: %(default)g)")
+    ap.add_argument("--mem-limit-mb", type=int, default=DEFAULT_MEM_MB,
+                    help="address-space limit per xelatex process, POSIX only (0 = none, default: %(default)d)")
+    ap.add_argument("--content-cache", nargs="?", type=Path, const=CONTENT_CACHE_DIR, default=None, metavar="DIR",
+                    help=f"reuse parsed YAML for unchanged files (default dir: {CONTENT_CACHE_DIR.relative_to(ROOT)})")
+    ap.add_argument("--fragment-cache", nargs="?", type=Path, const=FRAGMENT_DIR, default=None, metavar="DIR",
+                    help="keep rendered sections on disk across runs (default: in memory, shared by the variants)")
+    ap.add_argument("--no-cache", action="store_true", help="always run xelatex, ignoring the compiled-PDF cache")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                    help="evict least recently used PDF cache entries beyond this size (default: %(default)g)")
+    ap.add_argument("--fmt", action="store_true", help="use a precompiled preamble format for xelatex")
+    ap.add_argument("--html-template", type=Path, default=None, metavar="FILE",
+                    help="HTML layout with __TITLE__, __NAME__, __CSS__, __STYLES__ and __BODY__ slots (default: built-in)")
+    ap.add_argument("--tex-template", type=Path, default=None, metavar="FILE",
+                    help="LaTeX layout with __NAME__, __HEADER__ and __BODY__ slots (default: built-in)")
+    ap.add_argument("--reproducible", action="store_true",
+                    help="pin the PDF dates and /ID (SOURCE_DATE_EPOCH, default: last commit time)")
+    ap.add_argument("--profile", nargs="?", const="", default=None, metavar="TRACE.json",
+                    help="print a per-stage timing breakdown; with a path, also write a Chrome trace")
+    args = ap.parse_args(argv)
+    if args.profile is not None:
+        timing.enable(Path(args.profile) if args.profile else None)
+
+    try:
+        if args.reproducible:
+            reproducible.enable()
+        variants = load_variants(args.spec)
+        html_layout = build_web.load_layout(args.html_template)
+        tex_layout = build_pdf.load_layout(args.tex_template)
+        if args.fmt and not args.no_pdf:
+            split_preamble(tex_layout.source)
+    except (VariantError, TemplateError, ValueError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    if args.only:
+        missing = sorted(set(args.only) - {v.name for v in variants})
+        if missing:
+            print(f"No such variant(s) in {args.spec}: {', '.join(missing)}", file=sys.stderr)
+            sys.exit(2)
+        variants = [v for v in variants if v.name in args.only]
+
+    t0 = time.perf_counter()
+    try:
+        doc = load_document(args.content, args.content_cache)
+    except ContentError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    engine = "" if args.no_pdf else build_pdf.check_xelatex()
+    if args.fragment_cache:
+        web_fragments = build_web.fragment_cache(args.fragment_cache)
+        tex_fragments = build_pdf.fragment_cache(args.fragment_cache)
+    else:
+        web_fragments = MemoryFragmentCache("web", build_web.RENDERER_VERSION, keep=0)
+        tex_fragments = MemoryFragmentCache("tex", build_pdf.RENDERER_VERSION, keep=0)
+
+    jobs = []
+    for v in variants:
+        out_dir = variant_dir(args.out, v.name)
+        html, tex = write_variant(doc, v, out_dir, web_fragments, None if args.no_pdf else tex_fragments,
+                                  html_layout, tex_layout)
+        print(f"Wrote {html}")
+        if tex is not None:
+            jobs.append((v.name, tex, out_dir / build_pdf.OUT_PDF.name))
+    print(web_fragments.summary())
+
+    if jobs:
+        print(tex_fragments.summary())
+        cache = None if args.no_cache else PdfCache(CACHE_DIR, int(args.cache_max_mb * 2**20))
+        fmt_dir = ensure_format(tex_layout.source, engine) if args.fmt else None
+        limits = Limits(args.timeout or None, args.mem_limit_mb * 2**20 or None)
+        t1 = time.perf_counter()
+        results = asyncio.run(compile_variants(jobs, args.workers or default_workers(), limits,
+                                               engine=engine, cache=cache, fmt_dir=fmt_dir))
+        for (_, _, out), r in zip(jobs, results):
+            if r.ok:
+                print(f"Wrote {out}")
+        if report(results, time.perf_counter() - t1, verb="Compiled"):
+            sys.exit(1)
+    print(f"Built {len(variants)} variant(s) in {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
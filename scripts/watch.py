@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File watching and debouncing for `build.py --watch`.
+
+Watching is stat polling (mtime, size) at a short interval: it needs no
+third-party inotify binding and behaves the same on every platform, and a
+stat call on two files every 50ms costs nothing measurable.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable
+import sys
+import threading
+import time
+
+POLL_INTERVAL = 0.05
+
+def snapshot(paths: list[Path]) -> tuple:
+    out = []
+    for p in paths:
+        try:
+            st = p.stat()
+            out.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            out.append(None)
+    return tuple(out)
+
+def watch(paths: list[Path], on_change: Callable[[], None], interval: float = POLL_INTERVAL) -> None:
+    """
+    Call on_change() whenever any of `paths` changes, until interrupted.
+    Exceptions from on_change are printed and watching continues.
+    """
+    last = snapshot(paths)
+    while True:
+        time.sleep(interval)
+        cur = snapshot(paths)
+        if cur == last:
+            continue
+        last = cur
+        try:
+            on_change()
+        except Exception as e:
+            print(f"Build failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+class Debouncer:
+    """
+    Run fn(arg, cancel_event) `delay` seconds after the last schedule() call.
+
+    A new schedule() restarts the delay and sets the cancel event of a run that
+    is already in progress, so a burst of saves leads to a single run with the
+    latest argument. Runs never overlap: a new one waits for the cancelled one
+    to wind down.
+    """
+    def __init__(self, delay: float, fn: Callable[[Any, threading.Event], None]):
+        self.delay = delay
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._cancel: threading.Event | None = None
+
+    def schedule(self, arg: Any) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._cancel is not None:
+                self._cancel.set()
+            self._timer = threading.Timer(self.delay, self._run, args=(arg,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self, arg: Any) -> None:
+        cancel = threading.Event()
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+            self._cancel = cancel
+        with self._run_lock:
+            if not cancel.is_set():
+                self.fn(arg, cancel)
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._cancel is not None:
+                self._cancel.set()